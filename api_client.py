@@ -0,0 +1,538 @@
+# ===========================================================
+#      Cricbuzz API client — request coalescing + quota budget
+# ===========================================================
+#
+# Every page and loader goes through get():
+#
+#   * single-flight: concurrent identical GETs (same path + params) share one
+#     upstream call, so ten sessions opening the same player cost one request
+#   * quota budget: calls are counted per RapidAPI key and endpoint class in
+#     api_quota_usage (Postgres, shared by the dashboard and the loaders) and
+#     checked against the configured daily / monthly budgets. A reserve of each
+#     budget is kept for interactive traffic: backfills stop first.
+#   * degraded mode: when the budget runs low, interactive calls are answered
+#     from the last good response (marked with stale_since) instead of failing.
+#   * latency budget: an interactive call waits at most its endpoint class's
+#     budget. Once the class's recent p95 has passed without an answer a duplicate
+#     (hedged) request is sent and the first answer wins; when the budget runs out
+#     the last good response is served (stale_reason "slow") while the upstream
+#     call finishes in the background and refreshes it for the next rerun.
+#
+# Budgets (0 = unlimited, usage is still counted):
+#   API_DAILY_BUDGET / API_MONTHLY_BUDGET         whole key
+#   API_CLASS_BUDGETS="scorecard=300/6000,player=200/4000"   per class, daily/monthly
+#   API_INTERACTIVE_RESERVE=0.2                   share of each budget backfills may not use
+#
+# Latency budgets (seconds, interactive calls only; loaders keep their timeouts):
+#   API_LATENCY_BUDGETS="matches=3,scorecard=4"   per class, API_LATENCY_BUDGET for the rest
+#
+#   python -m api_client        # usage this month vs budget
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+import metrics
+
+API_HOST = "cricbuzz-cricket.p.rapidapi.com"
+API_BASE = f"https://{API_HOST}"
+
+INTERACTIVE = "interactive"
+BACKFILL = "backfill"
+
+DAILY_BUDGET = int(os.getenv("API_DAILY_BUDGET", "0"))
+MONTHLY_BUDGET = int(os.getenv("API_MONTHLY_BUDGET", "0"))
+INTERACTIVE_RESERVE = float(os.getenv("API_INTERACTIVE_RESERVE", "0.2"))
+SYNC_SECONDS = float(os.getenv("API_QUOTA_SYNC_SECONDS", "10"))
+SYNC_RETRY_MAX = float(os.getenv("API_QUOTA_SYNC_RETRY_MAX", "300"))    # backoff cap while the DB is down
+SYNC_CONNECT_TIMEOUT = int(os.getenv("API_QUOTA_SYNC_CONNECT_TIMEOUT", "3"))
+STALE_CACHE_SIZE = int(os.getenv("API_STALE_CACHE_SIZE", "512"))
+
+LATENCY_BUDGET = float(os.getenv("API_LATENCY_BUDGET", "5"))
+HEDGE_MIN_SAMPLES = int(os.getenv("API_HEDGE_MIN_SAMPLES", "20"))  # below this, hedge at half the budget
+LATENCY_WINDOW = 200                                                 # recent latencies kept per class
+UPSTREAM_WORKERS = int(os.getenv("API_UPSTREAM_WORKERS", "16"))
+
+
+def _parse_class_budgets(spec):
+    out = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        name, _, limits = part.partition("=")
+        daily, _, monthly = limits.partition("/")
+        out[name.strip()] = (int(daily or 0), int(monthly or 0))
+    return out
+
+
+CLASS_BUDGETS = _parse_class_budgets(os.getenv("API_CLASS_BUDGETS", ""))
+
+LATENCY_BUDGETS = {"matches": 3.0, "scorecard": 4.0, "match": 4.0, "player": 4.0, "rankings": 4.0}
+LATENCY_BUDGETS.update({
+    name.strip(): float(value)
+    for name, _, value in (p.partition("=") for p in os.getenv("API_LATENCY_BUDGETS", "").split(",") if "=" in p)
+})
+
+
+def endpoint_class(path):
+    """'/mcenter/v1/123/scard' -> 'scorecard'; the unit budgets are configured in."""
+    parts = [p for p in path.split("?")[0].split("/") if p]
+    head = parts[0] if parts else ""
+    if head == "matches":
+        return "matches"
+    if head == "mcenter":
+        return "scorecard" if parts[-1] == "scard" else "match"
+    if head == "stats":
+        return "rankings" if "rankings" in parts else "player"
+    if head in ("series", "teams", "venues"):
+        return head
+    return "other"
+
+
+class QuotaExhausted(Exception):
+    def __init__(self, cls, priority, retry_after):
+        self.endpoint_class = cls
+        self.priority = priority
+        self.retry_after = retry_after      # seconds until the tightest exhausted budget resets
+        super().__init__(f"API budget exhausted for {cls} ({priority}), resets in {retry_after / 3600:.1f}h")
+
+
+class ApiTimeout(TimeoutError):
+    """An interactive call ran out of its latency budget and there was no earlier copy to serve."""
+
+
+class ApiResult:
+    """What get() returns; shared by coalesced callers, so it is read-only."""
+    __slots__ = ("status_code", "headers", "text", "stale_since", "stale_reason")
+
+    def __init__(self, status_code, headers, text, stale_since=None, stale_reason=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        self.stale_since = stale_since      # epoch seconds of the cached copy, None when fresh
+        self.stale_reason = stale_reason    # "quota" (budget low) | "slow" (latency budget ran out)
+
+    def stale(self, reason):
+        return ApiResult(self.status_code, self.headers, self.text, self.stale_since, reason)
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}: {self.text[:200]}")
+
+
+# ---------------- Quota budget ----------------
+def _reset_in(now, period):
+    if period == "day":
+        nxt = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        nxt = (now.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return (nxt - now).total_seconds()
+
+
+class QuotaBudget:
+    """
+    Per-key call counts, flushed to api_quota_usage every SYNC_SECONDS by a
+    daemon thread (and once at exit) so the dashboard process and the loaders
+    see each other's usage; checks never wait on the database. While the DB is
+    unreachable it counts in-process and retries the sync with backoff.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._thread = None
+        self._table_ready = False # api_quota_usage created by this process
+        self._pending = {}        # (pool, cls, day) -> calls not yet flushed
+        self._flushing = {}       # calls being written by the current sync
+        self._day = {}            # (pool, cls) -> calls on _synced_day, as of last sync
+        self._month = {}          # (pool, cls) -> calls in _synced_day's month, as of last sync
+        self._synced_day = None   # UTC date of the last successful sync
+        self._next_sync = 0.0     # monotonic time of the next sync attempt
+        self._failures = 0        # consecutive failed syncs
+
+    @staticmethod
+    def pool(key):
+        # identifies the RapidAPI subscription without storing the key itself
+        return (key or "")[-6:]
+
+    def _used(self, pool, cls, today):
+        """(day, month) usage for `cls` (None = whole pool), including unflushed calls."""
+        def total(base, period):
+            own = sum(v for (p, c), v in base.items() if p == pool and (cls is None or c == cls))
+            pend = sum(v for src in (self._pending, self._flushing) for (p, c, day), v in src.items()
+                       if p == pool and (cls is None or c == cls) and period(day) == period(today))
+            return own + pend
+        # synced counts of an earlier UTC day / month no longer apply
+        synced = self._synced_day
+        day = self._day if synced == today else {}
+        month = self._month if synced and synced.replace(day=1) == today.replace(day=1) else {}
+        return total(day, lambda d: d), total(month, lambda d: d.replace(day=1))
+
+    def _limits(self, cls):
+        yield None, DAILY_BUDGET, MONTHLY_BUDGET
+        if cls in CLASS_BUDGETS:
+            yield (cls,) + CLASS_BUDGETS[cls]
+
+    def check(self, key, cls, priority):
+        """
+        'ok', 'low' (inside the interactive reserve) or raise QuotaExhausted.
+        Backfill traffic is refused as soon as it would eat into the reserve.
+        """
+        now = datetime.now(timezone.utc)
+        self.start()
+        pool, state, retry = self.pool(key), "ok", 0.0
+        with self._lock:
+            for scope, daily, monthly in self._limits(cls):
+                day_used, month_used = self._used(pool, scope, now.date())
+                for period, used, limit in (("day", day_used, daily), ("month", month_used, monthly)):
+                    if not limit:
+                        continue
+                    if used >= limit:
+                        state, retry = "exhausted", max(retry, _reset_in(now, period))
+                    elif used >= limit * (1 - INTERACTIVE_RESERVE):
+                        if priority == BACKFILL:
+                            state, retry = "exhausted", max(retry, _reset_in(now, period))
+                        elif state == "ok":
+                            state = "low"
+        if state == "exhausted":
+            metrics.inc("cricbuzz_api_quota_denied_total", endpoint_class=cls, priority=priority)
+            raise QuotaExhausted(cls, priority, retry)
+        return state
+
+    def record(self, key, cls):
+        k = (self.pool(key), cls, datetime.now(timezone.utc).date())
+        with self._lock:
+            self._pending[k] = self._pending.get(k, 0) + 1
+
+    # ---------------- Shared counters ----------------
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="api-quota", daemon=True)
+                self._thread.start()
+                atexit.register(self._sync)         # a loader's last calls still count
+
+    def _loop(self):
+        while True:
+            time.sleep(max(0.0, self._next_sync - time.monotonic()))
+            self._sync()
+
+    def _sync(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        with self._sync_lock:
+            with self._lock:
+                self._next_sync = time.monotonic() + SYNC_SECONDS
+                pending = self._flushing = self._pending
+                self._pending = {}
+            try:
+                day, month = self._flush(pending, now.date())
+            except Exception as e:
+                # database unreachable: keep counting locally, retry with backoff
+                with self._lock:
+                    for k, v in pending.items():
+                        self._pending[k] = self._pending.get(k, 0) + v
+                    self._flushing = {}
+                    self._failures += 1
+                    self._next_sync = time.monotonic() + min(SYNC_SECONDS * 2 ** self._failures, SYNC_RETRY_MAX)
+                if self._failures == 1:
+                    print(f"⚠️ api quota: usage not shared, retrying with backoff ({e})")
+                return
+            with self._lock:
+                self._day, self._month, self._flushing = day, month, {}
+                self._synced_day = now.date()
+                if self._failures:
+                    print("✅ api quota: usage shared again")
+                self._failures = 0
+
+    def _flush(self, pending, today):
+        import db
+        conn = db.connect(connect_timeout=SYNC_CONNECT_TIMEOUT)
+        try:
+            with conn, conn.cursor() as cur:
+                if not self._table_ready:
+                    ensure_tables(cur)
+                for (pool, cls, d), calls in pending.items():
+                    cur.execute("""
+                        INSERT INTO api_quota_usage (pool, endpoint_class, day, calls) VALUES (%s,%s,%s,%s)
+                        ON CONFLICT (pool, endpoint_class, day) DO UPDATE
+                        SET calls = api_quota_usage.calls + EXCLUDED.calls
+                    """, (pool, cls, d, calls))
+                cur.execute("""
+                    SELECT pool, endpoint_class, SUM(calls) FILTER (WHERE day = %s), SUM(calls)
+                    FROM api_quota_usage WHERE day >= date_trunc('month', %s::date)
+                    GROUP BY pool, endpoint_class
+                """, (today, today))
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+        self._table_ready = True
+        return ({(p, c): d or 0 for p, c, d, _ in rows},
+                {(p, c): m or 0 for p, c, _, m in rows})
+
+
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS api_quota_usage (
+        pool            TEXT NOT NULL,      -- last 6 chars of the RapidAPI key
+        endpoint_class  TEXT NOT NULL,
+        day             DATE NOT NULL,
+        calls           INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (pool, endpoint_class, day)
+    );
+    """)
+
+
+budget = QuotaBudget()
+
+
+# ---------------- Last-good responses ----------------
+_stale_lock = threading.Lock()
+_stale = OrderedDict()      # request key -> ApiResult (LRU)
+
+
+def _remember(k, res):
+    with _stale_lock:
+        _stale[k] = ApiResult(res.status_code, res.headers, res.text, time.time())
+        _stale.move_to_end(k)
+        while len(_stale) > STALE_CACHE_SIZE:
+            _stale.popitem(last=False)
+
+
+def _cached(k):
+    with _stale_lock:
+        return _stale.get(k)
+
+
+# ---------------- Latency budget + hedging ----------------
+class _Latency:
+    """Recent successful upstream latencies per endpoint class."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}          # cls -> deque of seconds
+
+    def add(self, cls, seconds):
+        with self._lock:
+            self._samples.setdefault(cls, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def p95(self, cls):
+        with self._lock:
+            samples = sorted(self._samples.get(cls, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+latency = _Latency()
+
+_pool = None
+_pool_lock = threading.Lock()
+_background = {}            # request key -> upstream futures still running after their caller gave up
+_background_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(UPSTREAM_WORKERS, thread_name_prefix="api-upstream")
+        return _pool
+
+
+def latency_budget(cls):
+    return LATENCY_BUDGETS.get(cls, LATENCY_BUDGET)
+
+
+def hedge_after(cls):
+    """Seconds to wait before hedging: the class's recent p95, never more than half its budget."""
+    p95 = latency.p95(cls)
+    half = latency_budget(cls) / 2
+    return half if p95 is None else min(p95, half)
+
+
+def _upstream(k, path, params, key, cls, timeout):
+    """One upstream attempt. A 200 refreshes the last good copy, even if its caller has moved on."""
+    budget.record(key, cls)
+    start = time.perf_counter()
+    r = metrics.http_get(f"{API_BASE}{path}", params=params, timeout=timeout,
+                         headers={"x-rapidapi-key": key, "x-rapidapi-host": API_HOST})
+    res = ApiResult(r.status_code, r.headers, r.text)
+    if r.status_code == 200:
+        latency.add(cls, time.perf_counter() - start)
+        _remember(k, res)
+    return res
+
+
+def _park(k, futures):
+    """Leave unfinished attempts running; later callers for `k` join them instead of adding more."""
+    pending = [f for f in futures if not f.done()]
+    if not pending:
+        return
+    with _background_lock:
+        _background[k] = pending
+
+    def done(_):
+        with _background_lock:
+            if _background.get(k) is pending and all(f.done() for f in pending):
+                del _background[k]
+    for f in pending:
+        f.add_done_callback(done)
+
+
+def _within_budget(k, path, params, key, cls, endpoint, timeout):
+    """
+    ApiResult from the first attempt to answer within the latency budget, None when
+    the budget ran out (attempts keep running in the background). A hedge is sent
+    once hedge_after() has passed, if the quota is not running low.
+    """
+    with _background_lock:
+        futures = [f for f in _background.pop(k, ()) if not f.done()]
+    if not futures:
+        futures = [_executor().submit(_upstream, k, path, params, key, cls, timeout)]
+    start = time.monotonic()
+    deadline = start + latency_budget(cls)
+    hedge_at = start + hedge_after(cls) if len(futures) == 1 else None
+    error = None
+    while True:
+        now = time.monotonic()
+        until = min(deadline, hedge_at) if hedge_at is not None else deadline
+        done, _ = wait([f for f in futures if not f.done()] or futures,
+                       timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None:
+                if len(futures) > 1:
+                    metrics.inc("cricbuzz_api_hedge_wins_total", endpoint=endpoint,
+                                attempt="hedge" if f is futures[-1] else "first")
+                _park(k, futures)
+                return f.result()
+            error = f.exception()
+        if all(f.done() for f in futures):
+            raise error
+        if time.monotonic() >= deadline:
+            _park(k, futures)
+            return None
+        if hedge_at is not None and time.monotonic() >= hedge_at:
+            hedge_at = None
+            try:
+                ok = budget.check(key, cls, INTERACTIVE) == "ok"
+            except QuotaExhausted:
+                ok = False
+            if ok:
+                metrics.inc("cricbuzz_api_hedged_total", endpoint=endpoint)
+                futures.append(_executor().submit(_upstream, k, path, params, key, cls, timeout))
+
+
+# ---------------- Single-flight ----------------
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_inflight_lock = threading.Lock()
+_inflight = {}              # request key -> _Call
+
+
+def _single_flight(k, endpoint, fn):
+    with _inflight_lock:
+        call = _inflight.get(k)
+        leader = call is None
+        if leader:
+            call = _inflight[k] = _Call()
+    if not leader:
+        metrics.inc("cricbuzz_api_coalesced_total", endpoint=endpoint)
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+    try:
+        call.result = fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(k, None)
+        call.event.set()
+
+
+# ---------------- Public API ----------------
+def get(path, params=None, *, key, priority=INTERACTIVE, timeout=10):
+    """
+    GET {API_BASE}{path} -> ApiResult. Identical concurrent calls are coalesced.
+    Interactive calls return within their latency budget (hedged, else the last
+    good copy marked stale); `timeout` bounds each upstream attempt. Raises
+    QuotaExhausted when the budget is spent and there is nothing cached to fall
+    back on (backfills never fall back), ApiTimeout when the latency budget ran
+    out with nothing cached, and requests' exceptions on network errors.
+    """
+    k = (path, tuple(sorted((params or {}).items())))
+    endpoint = metrics.endpoint_label(path)
+    cls = endpoint_class(path)
+
+    def fetch():
+        try:
+            state = budget.check(key, cls, priority)
+        except QuotaExhausted:
+            cached = _cached(k) if priority == INTERACTIVE else None
+            if cached is None:
+                raise
+            state = "exhausted"
+        else:
+            cached = _cached(k) if state == "low" else None
+        if cached is not None:
+            # budget is low or gone: prefer the last good copy over spending the reserve
+            metrics.inc("cricbuzz_api_stale_served_total", endpoint=endpoint, reason=state)
+            return cached.stale("quota")
+
+        if priority != INTERACTIVE:
+            return _upstream(k, path, params, key, cls, timeout)
+        res = _within_budget(k, path, params, key, cls, endpoint, timeout)
+        if res is not None:
+            return res
+        cached = _cached(k)
+        metrics.inc("cricbuzz_api_budget_exceeded_total", endpoint=endpoint,
+                    served="stale" if cached is not None else "none")
+        if cached is None:
+            raise ApiTimeout(f"{endpoint} did not answer within {latency_budget(cls):g}s; "
+                             f"still fetching in the background")
+        return cached.stale("slow")
+
+    # a backfill refused by the budget must not fail an interactive caller waiting on it
+    return _single_flight((priority,) + k, endpoint, fetch)
+
+
+def usage_rows():
+    """[(pool, class, today, month)] from the shared table (for the CLI / admin views)."""
+    import db
+    today = datetime.now(timezone.utc).date()
+    with db.session() as conn, conn.cursor() as cur:
+        ensure_tables(cur)
+        cur.execute("""
+            SELECT pool, endpoint_class, COALESCE(SUM(calls) FILTER (WHERE day = %s), 0), SUM(calls)
+            FROM api_quota_usage WHERE day >= date_trunc('month', %s::date)
+            GROUP BY pool, endpoint_class ORDER BY pool, endpoint_class
+        """, (today, today))
+        return cur.fetchall()
+
+
+if __name__ == "__main__":
+    rows = usage_rows()
+    print(f"{'key':<8}{'class':<12}{'today':>8}{'month':>8}  budget (day/month)")
+    for pool, cls, today_calls, month_calls in rows:
+        daily, monthly = CLASS_BUDGETS.get(cls, (0, 0))
+        print(f"…{pool:<7}{cls:<12}{today_calls:>8}{month_calls:>8}  {daily or '∞'}/{monthly or '∞'}")
+    for pool in sorted({r[0] for r in rows}):
+        day = sum(r[2] for r in rows if r[0] == pool)
+        month = sum(r[3] for r in rows if r[0] == pool)
+        print(f"…{pool:<7}{'(all)':<12}{day:>8}{month:>8}  {DAILY_BUDGET or '∞'}/{MONTHLY_BUDGET or '∞'}")
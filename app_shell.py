@@ -0,0 +1,242 @@
+# ===========================================================
+#          App shell — one entrypoint for every page
+# ===========================================================
+#
+# app.py hands the session to run(), which owns what each page used to repeat:
+#
+#   config      st.set_page_config once per rerun, from the shell only
+#   styling     one stylesheet per page, minified once per process
+#   navigation  st.navigation over PAGES; a page's script (and its heavy imports:
+#               pandas, pyarrow, requests) only runs when that page is opened
+#   tracking    metrics.track_page and the opt-in profiler wrap the page's run
+#   warm-up     once per process, in the background after the first paint: metrics
+#               endpoint, cache bus listener, home counters, DB pool and the heavy
+#               imports, so a new pod serves its first request without waiting on
+#               any of it
+#
+# Pages still run on their own (`streamlit run crud_operations.py`): page() applies
+# config and style when the shell has not; those runs are not tracked.
+#
+#   python startup_bench.py     # time to first paint per page, cold and warm
+
+import importlib
+import os
+import re
+import threading
+from datetime import datetime
+
+import streamlit as st
+from dotenv import load_dotenv
+
+import metrics
+import profiler
+
+TITLE = "🏏 Cricbuzz LiveStats"
+WARM_IMPORTS = os.getenv("APP_WARM_IMPORTS", "1") == "1"
+
+load_dotenv()
+
+# Cricbuzz RapidAPI key for the dashboard pages, from the environment or .env; the
+# loaders' RAPIDAPI_KEY (ingest.common) is used when no separate key is set
+API_KEY = os.getenv("DASHBOARD_RAPIDAPI_KEY") or os.getenv("RAPIDAPI_KEY")
+
+# (script, title, icon); None = the home page callable passed to run(). URLs follow the
+# file names (/live_matches, ...), so links and startup_bench.py can address a page directly
+PAGES = [
+    (None, "Home", "🏠"),
+    ("live_matches.py", "Live Matches", "📡"),
+    ("top_stats.py", "Player Stats", "🏆"),
+    ("sql_queries.py", "SQL Analytics", "🧮"),
+    ("crud_operations.py", "CRUD Operations", "🛠"),
+]
+
+# ---------------- Styles ----------------
+CSS = {
+    "home": """
+/* Background */
+[data-testid="stAppViewContainer"] {
+    background-color: #f5f7fa;
+    background-size: cover;
+}
+
+/* Gradient Title */
+.main-title {
+    font-size: 55px;
+    font-weight: 900;
+    text-align: center;
+    background: linear-gradient(90deg, #FF6F61, #FFD700, #1E90FF);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    text-shadow: 1px 1px 4px rgba(0,0,0,0.4);
+    margin-bottom: -5px;
+}
+
+.sub-title {
+    font-size: 22px;
+    text-align: center;
+    color: #444;
+    font-weight: 600;
+    margin-bottom: 30px;
+}
+
+/* Metric Cards */
+.metric-box {
+    background: white;
+    padding: 20px;
+    border-radius: 18px;
+    text-align: center;
+    color: #222;
+    transition: transform 0.2s ease, box-shadow 0.2s ease;
+    box-shadow: 0px 3px 15px rgba(0,0,0,0.1);
+}
+.metric-box:hover {
+    transform: scale(1.05);
+    box-shadow: 0px 6px 20px rgba(0,0,0,0.15);
+}
+.metric-icon img {
+    width: 60px;
+    margin-bottom: 8px;
+}
+.metric-title {
+    font-size: 16px;
+    font-weight: bold;
+    margin-bottom: 5px;
+}
+.metric-value {
+    font-size: 22px;
+    font-weight: 700;
+    color: #FF6F61;
+}
+
+/* Section Style */
+.section {
+    background: white;
+    padding: 30px;
+    border-radius: 18px;
+    margin-top: 20px;
+    box-shadow: 0px 3px 15px rgba(0,0,0,0.1);
+}
+
+/* Footer */
+.footer {
+    text-align: center;
+    font-size: 14px;
+    color: #555;
+    margin-top: 40px;
+}
+""",
+    "top_stats": """
+h1, h2, h3, h4, h5 { font-family: "Segoe UI", sans-serif !important; font-weight: 600 !important; }
+section[data-testid="stSidebar"] { background-color: #f8f9fa; padding-top: 20px; }
+div[data-testid="stDataFrame"] table { border: 1px solid #ddd; border-radius: 5px; }
+.stMarkdown p { font-size: 16px; }
+""",
+    "crud_operations": """
+div[data-testid="stCaptionContainer"] p {font-size:18px !important;color:#333 !important;font-weight:600 !important;}
+div.stButton > button, button[data-testid="stFormSubmitButton"]{
+  background-color:#4a66d5 !important;color:#fff !important;font-weight:700 !important;border-radius:8px !important;
+  height:42px !important; width:180px !important; border:none !important;
+}
+div.stButton > button:hover, button[data-testid="stFormSubmitButton"]:hover{background-color:#3b53b0 !important;}
+""",
+}
+
+_styles = {}
+_styles_lock = threading.Lock()
+
+
+def _stylesheet(page):
+    with _styles_lock:
+        if page not in _styles:
+            css = re.sub(r"/\*.*?\*/", "", CSS.get(page, ""), flags=re.S)
+            css = re.sub(r"\s*([{};:,])\s*", r"\1", " ".join(css.split()))
+            _styles[page] = f"<style>{css}</style>" if css else ""
+        return _styles[page]
+
+
+def style(page):
+    """Inject `page`'s stylesheet (Streamlit drops injected CSS on every rerun)."""
+    sheet = _stylesheet(page)
+    if sheet:
+        st.markdown(sheet, unsafe_allow_html=True)
+
+
+def stale_caption(response):
+    """Say so under the data when api_client answered from its last good copy."""
+    if not response.stale_since:
+        return
+    why = "API slow" if response.stale_reason == "slow" else "API budget low"
+    st.caption(f"⚠ {why} — showing data cached at "
+               f"{datetime.fromtimestamp(response.stale_since).strftime('%H:%M:%S')}")
+
+
+def api_key():
+    """The dashboard's RapidAPI key; stops the page with an explanation when none is set."""
+    if not API_KEY:
+        st.error("🔑 No Cricbuzz API key configured: set DASHBOARD_RAPIDAPI_KEY (or RAPIDAPI_KEY) "
+                 "in the environment or in .env.")
+        st.stop()
+    return API_KEY
+
+
+# ---------------- Process warm-up ----------------
+_warm_lock = threading.Lock()
+_warmed = False
+
+
+def _warm():
+    import cache_bus
+    import db
+    import home_stats
+    cache_bus.start()                       # cache invalidation listener
+    home_stats.get_counts()                 # starts the counters refresher
+    try:
+        with db.pooled():                   # opens DB_POOL_MIN connections
+            pass
+    except Exception as e:
+        print(f"⚠️ DB pool warm-up failed: {e}")
+    if WARM_IMPORTS:
+        for module in ("pandas", "requests", "result_spool"):      # result_spool pulls in pyarrow
+            importlib.import_module(module)
+
+
+def warm_up():
+    """Once per process: start shared background services without holding up the page."""
+    global _warmed
+    with _warm_lock:
+        if _warmed:
+            return
+        _warmed = True
+    metrics.start_http_server()
+    threading.Thread(target=_warm, name="app-warm-up", daemon=True).start()
+
+
+# ---------------- Pages ----------------
+_local = threading.local()      # Streamlit runs each session's script in its own thread
+
+
+def page(name, title=TITLE):
+    """Top of every page script: config + style unless the shell already applied them this run."""
+    if getattr(_local, "shell", False):
+        style(name)
+        return
+    st.set_page_config(page_title=title, layout="wide")
+    style(name)
+    warm_up()
+
+
+def run(home):
+    """Entrypoint: config, navigation over PAGES (home = callable for the landing page)."""
+    _local.shell = True
+    st.set_page_config(page_title=TITLE, layout="wide")
+    nav = st.navigation([
+        st.Page(script or home, title=title, icon=icon, default=script is None)
+        for script, title, icon in PAGES
+    ])
+    name = nav.url_path or "home"
+    try:
+        with metrics.track_page(name), profiler.profile_rerun(name):
+            nav.run()
+    finally:
+        _local.shell = False
+        warm_up()                           # also after st.stop() / st.rerun() unwind the page
@@ -0,0 +1,209 @@
+# ===========================================================
+#      Cache bus — cross-process invalidation (LISTEN/NOTIFY)
+# ===========================================================
+#
+# Row triggers on the cached tables NOTIFY `CHANNEL` with "table:key" for every
+# insert, delete and real update (unchanged upserts stay quiet), so every write
+# path — the CRUD page, the loaders, a psql session — is covered. Postgres only
+# delivers the event once the write has committed.
+#
+# Every app process runs one listener thread. Cached functions take the version
+# of what they read as an argument:
+#
+#   @st.cache_data(ttl=cache_bus.TTL)
+#   def fetch_player(player_id, version): ...
+#   fetch_player(pid, cache_bus.version("players", pid))
+#
+# version(table) changes on any event for the table, version(table, key) only on
+# events for that key, so an edit reloads just the entries that read it and TTLs
+# can be long. While the listener is disconnected versions also roll over every
+# FALLBACK_TTL seconds (the old short-TTL behaviour), and a reconnect invalidates
+# everything, since events sent in between are lost.
+#
+# Replica reads: the listener records the primary's WAL position when an event
+# arrives; written(table) hands it to query_executor so a refill after an edit is
+# not served by a replica that has not replayed it yet.
+#
+#   python -m cache_bus install     # triggers on an existing database
+#   python -m cache_bus watch       # print events as they arrive
+
+import os
+import select
+import sys
+import threading
+import time
+
+import db
+import metrics
+
+CHANNEL = "cache_bus"
+TTL = int(os.getenv("CACHE_BUS_TTL", "3600"))                      # seconds, cached entries
+FALLBACK_TTL = int(os.getenv("CACHE_BUS_FALLBACK_TTL", "60"))      # while the listener is down
+RECONNECT_SECONDS = 5
+POLL_SECONDS = 5
+
+# table -> key column sent with its events
+TABLES = {"players": "player_id", "teams": "team_id"}
+
+
+# ---------------- Triggers ----------------
+def ensure_triggers(cur, table):
+    """NOTIFY CHANNEL on writes to `table` (called from the loaders' ensure_tables)."""
+    key = TABLES[table]
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION cache_bus_notify() RETURNS trigger AS $$
+        DECLARE
+            old_key TEXT;
+            new_key TEXT;
+        BEGIN
+            IF TG_LEVEL = 'STATEMENT' THEN
+                PERFORM pg_notify('{CHANNEL}', TG_TABLE_NAME || ':');      -- TRUNCATE: whole table
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                old_key := to_jsonb(OLD) ->> TG_ARGV[0];
+                PERFORM pg_notify('{CHANNEL}', TG_TABLE_NAME || ':' || old_key);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                new_key := to_jsonb(NEW) ->> TG_ARGV[0];
+                IF new_key IS DISTINCT FROM old_key THEN
+                    PERFORM pg_notify('{CHANNEL}', TG_TABLE_NAME || ':' || new_key);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql;
+        DROP TRIGGER IF EXISTS {table}_cache_bus ON {table};
+        CREATE TRIGGER {table}_cache_bus AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION cache_bus_notify('{key}');
+        DROP TRIGGER IF EXISTS {table}_cache_bus_update ON {table};
+        CREATE TRIGGER {table}_cache_bus_update AFTER UPDATE ON {table}
+            FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION cache_bus_notify('{key}');
+        DROP TRIGGER IF EXISTS {table}_cache_bus_truncate ON {table};
+        CREATE TRIGGER {table}_cache_bus_truncate AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION cache_bus_notify('{key}');
+    """)
+
+
+# ---------------- Listener ----------------
+class _Bus:
+    def __init__(self):
+        self.connected = False
+        self.generation = 0         # bumped on every (re)connect: events may have been missed
+        self._tables = {}           # table -> events for any of its keys
+        self._wide = {}             # table -> whole-table events
+        self._keys = {}             # (table, key) -> events for that key
+        self._written = {}          # table -> (primary LSN, unix time) of its latest event
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="cache-bus", daemon=True)
+                self._thread.start()
+
+    def apply(self, table, key, lsn=None):
+        with self._lock:
+            if lsn is not None:
+                self._written[table] = (lsn, time.time())
+            self._tables[table] = self._tables.get(table, 0) + 1
+            if key:
+                self._keys[(table, key)] = self._keys.get((table, key), 0) + 1
+            else:
+                self._wide[table] = self._wide.get(table, 0) + 1
+
+    def version(self, table, key=None):
+        with self._lock:
+            v = (self.generation, self._tables.get(table, 0)) if key is None else \
+                (self.generation, self._wide.get(table, 0), self._keys.get((table, str(key)), 0))
+        if not self.connected:
+            v += (int(time.time() // FALLBACK_TTL),)
+        return v
+
+    def written(self, *tables):
+        with self._lock:
+            tokens = [self._written[t] for t in tables if t in self._written]
+        return max(tokens, key=lambda t: db.lsn_int(t[0]), default=(None, None))
+
+    def _listen(self):
+        conn = db.connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            with self._lock:
+                self.generation += 1
+            self.connected = True
+            print(f"📣 cache bus listening on '{CHANNEL}'")
+            while True:
+                if select.select([conn], [], [], POLL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                events = conn.notifies[:]
+                del conn.notifies[:]
+                if not events:
+                    continue
+                lsn = db.current_lsn(conn)          # at or past the commits that sent them
+                for n in events:
+                    table, _, key = n.payload.partition(":")
+                    self.apply(table, key, lsn)
+                metrics.inc("cricbuzz_cache_bus_events_total", len(events))
+        finally:
+            self.connected = False
+            conn.close()
+
+    def _loop(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"⚠️ cache bus listener down, retrying in {RECONNECT_SECONDS}s: {e}")
+            time.sleep(RECONNECT_SECONDS)
+
+
+_bus = _Bus()
+
+
+def version(table, key=None):
+    """Cache argument for data read from `table` (or only its row `key`); starts the listener."""
+    _bus.start()
+    return _bus.version(table, key)
+
+
+def written(*tables):
+    """(primary LSN, unix time) of the newest event seen for `tables`, (None, None) if none."""
+    return _bus.written(*tables)
+
+
+def invalidate(table, key=None):
+    """Bump versions in this process right after its own commit, ahead of the NOTIFY round trip."""
+    _bus.apply(table, str(key) if key is not None else None)
+
+
+def start():
+    _bus.start()
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "watch"
+    if cmd == "install":
+        conn = db.connect()
+        with conn, conn.cursor() as cur:
+            installed = []
+            for name in TABLES:
+                cur.execute("SELECT to_regclass(%s)", (name,))
+                if cur.fetchone()[0] is not None:
+                    ensure_triggers(cur, name)
+                    installed.append(name)
+        conn.close()
+        print(f"✅ cache bus triggers on {', '.join(installed) or 'nothing (no tables yet)'}")
+    else:
+        conn = db.connect()
+        conn.autocommit = True
+        conn.cursor().execute(f"LISTEN {CHANNEL}")
+        print(f"📣 listening on '{CHANNEL}' (Ctrl-C to stop)")
+        while True:
+            if select.select([conn], [], [], POLL_SECONDS) != ([], [], []):
+                conn.poll()
+                while conn.notifies:
+                    print(conn.notifies.pop(0).payload)
@@ -1,61 +1,63 @@
 # pages/crud_operations.py
-import os
-import pandas as pd
 import streamlit as st
-import psycopg2
 from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
+
+import app_shell
+import cache_bus
+import metrics
+import profiler
+import query_executor
 
 # ===============================
-# ENV + DB
+# DB
 # ===============================
-load_dotenv()
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = int(os.getenv("DB_PORT", "5432"))
-DB_NAME = os.getenv("DB_NAME", "rudra")
-DB_USER = os.getenv("DB_USER", "postgres")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "Rudra0718")
-
-def get_conn():
-    return psycopg2.connect(
-        host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD
-    )
+def get_conn(name, write=False, after=None):
+    """
+    Pooled connection admitted ahead of dashboard analytics (query_executor.CRUD).
+    Reads may be served by the replica; writes go to the primary, are committed
+    when the block exits, and later reads
+    from this session (or refills after `after`, see cache_bus) wait for the
+    replica to catch up with them.
+    """
+    return query_executor.connection(name, query_executor.CRUD, write=write, after=after)
 
 # ===============================
-# PAGE CONFIG + CSS
+# PAGE CONFIG (app_shell)
 # ===============================
-st.set_page_config(page_title="🏏 CRUD – Players", layout="wide")
+app_shell.page("crud_operations", title="🏏 CRUD – Players")
 st.title("🏏 CRUD Operations — Players")
 st.caption("Manage player master data (add, update, delete, view).")
 
-st.markdown("""
-<style>
-div[data-testid="stCaptionContainer"] p {font-size:18px !important;color:#333 !important;font-weight:600 !important;}
-div.stButton > button, button[data-testid="stFormSubmitButton"]{
-  background-color:#4a66d5 !important;color:#fff !important;font-weight:700 !important;border-radius:8px !important;
-  height:42px !important; width:180px !important; border:none !important;
-}
-div.stButton > button:hover, button[data-testid="stFormSubmitButton"]:hover{background-color:#3b53b0 !important;}
-</style>
-""", unsafe_allow_html=True)
-
 # ===============================
 # HELPERS
 # ===============================
-@st.cache_data(ttl=60)
-def fetch_teams():
-    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+# Cached reads take cache_bus versions of what they read: edits anywhere (other
+# replicas, the loaders) invalidate just those entries, so TTLs can be long.
+@st.cache_data(ttl=cache_bus.TTL)
+def fetch_teams(version):
+    metrics.cache_miss("fetch_teams")
+    with get_conn("fetch_teams", after=cache_bus.written("teams")) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur, \
+            metrics.track_query("fetch_teams") as q:
         cur.execute("SELECT team_id, team_name, country FROM teams ORDER BY team_name;")
-        return cur.fetchall()
+        rows = cur.fetchall()
+        q.rows = len(rows)
+        return rows
 
-@st.cache_data(ttl=60)
-def fetch_players_min():
-    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+@st.cache_data(ttl=cache_bus.TTL)
+def fetch_players_min(version):
+    metrics.cache_miss("fetch_players_min")
+    with get_conn("fetch_players_min", after=cache_bus.written("players")) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur, \
+            metrics.track_query("fetch_players_min") as q:
         cur.execute("SELECT player_id, full_name FROM players ORDER BY full_name;")
-        return cur.fetchall()
+        rows = cur.fetchall()
+        q.rows = len(rows)
+        return rows
 
-def fetch_player(player_id: int):
-    with get_conn() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+@st.cache_data(ttl=cache_bus.TTL, max_entries=512)
+def fetch_player(player_id: int, version):
+    metrics.cache_miss("fetch_player")
+    with get_conn("fetch_player", after=cache_bus.written("players")) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur, \
+            metrics.track_query("fetch_player") as q:
         cur.execute("""
             SELECT player_id, full_name, nick_name, role, batting_style, bowling_style,
                    COALESCE(is_keeper,false) AS is_keeper,
@@ -64,10 +66,12 @@ def fetch_player(player_id: int):
             FROM players
             WHERE player_id=%s
         """, (player_id,))
-        return cur.fetchone()
+        row = cur.fetchone()
+        q.rows = 1 if row else 0
+        return row
 
 def upsert_player(row: dict, mode: str):
-    with get_conn() as conn, conn.cursor() as cur:
+    with get_conn(f"upsert_player:{mode}", write=True) as conn, conn.cursor() as cur, metrics.track_query(f"upsert_player:{mode}") as q:
         if mode == "insert":
             cur.execute("""
                 INSERT INTO players
@@ -91,15 +95,20 @@ def upsert_player(row: dict, mode: str):
                 row["bowling_style"], row["is_keeper"], row["is_captain"],
                 row["team_id"], row["player_id"]
             ))
-        conn.commit()
+        q.rows = cur.rowcount
+    cache_bus.invalidate("players", row["player_id"])   # other processes hear it via NOTIFY
 
 def delete_player(player_id: int):
-    with get_conn() as conn, conn.cursor() as cur:
+    with get_conn("delete_player", write=True) as conn, conn.cursor() as cur, metrics.track_query("delete_player") as q:
         cur.execute("DELETE FROM players WHERE player_id=%s", (player_id,))
-        conn.commit()
+        q.rows = cur.rowcount
+    cache_bus.invalidate("players", player_id)
 
-def view_players_df():
-    with get_conn() as conn, conn.cursor() as cur:
+@st.cache_data(ttl=cache_bus.TTL)
+def view_players_df(version):
+    import pandas as pd
+    metrics.cache_miss("view_players_df")
+    with get_conn("view_players_df", after=cache_bus.written("players", "teams")) as conn, conn.cursor() as cur, metrics.track_query("view_players_df") as q:
         cur.execute("""
             SELECT
               p.player_id,
@@ -118,100 +127,50 @@ def view_players_df():
             ORDER BY p.player_id;
         """)
         rows = cur.fetchall()
+        q.rows = len(rows)
         cols = [d[0] for d in cur.description]
         return pd.DataFrame(rows, columns=cols)
 
 # ===============================
 # TABS
 # ===============================
-tab_add, tab_update, tab_delete, tab_view = st.tabs(["➕ Add","✏️ Update","🗑 Delete","📊 View"])
+# only the open tab runs (and queries); switching tabs reruns the page
+tab_add, tab_update, tab_delete, tab_view = st.tabs(["➕ Add","✏️ Update","🗑 Delete","📊 View"],
+                                                    key="crud_tab", on_change="rerun")
 
 # ---------------- Add ----------------
-with tab_add:
-    with st.form("add_form", clear_on_submit=True):
-        st.subheader("➕ Add New Player")
-        c1, c2 = st.columns(2)
-        with c1:
-            player_id = st.number_input("Player ID (BIGINT, must be unique)", min_value=1, step=1)
-            full_name = st.text_input("Full Name")
-            nick_name = st.text_input("Nick Name", value="")
-            role      = st.text_input("Role (Batsman/Bowler/All-rounder)", value="")
-        with c2:
-            batting_style = st.text_input("Batting Style", value="")
-            bowling_style = st.text_input("Bowling Style", value="")
-            is_keeper     = st.checkbox("Is Wicket-Keeper?", value=False)
-            is_captain    = st.checkbox("Is Captain?", value=False)
-
-        teams = fetch_teams()
-        team_map = {"— (no team)": None}
-        for t in teams:
-            team_map[f"{t['team_name']} ({t['country']})"] = t["team_id"]
-        team_label = st.selectbox("Team", list(team_map.keys()))
-        team_id = team_map[team_label]
+with tab_add, profiler.span("tab: add"):
+    if tab_add.open:
+        with st.form("add_form", clear_on_submit=True):
+            st.subheader("➕ Add New Player")
+            c1, c2 = st.columns(2)
+            with c1:
+                player_id = st.number_input("Player ID (BIGINT, must be unique)", min_value=1, step=1)
+                full_name = st.text_input("Full Name")
+                nick_name = st.text_input("Nick Name", value="")
+                role      = st.text_input("Role (Batsman/Bowler/All-rounder)", value="")
+            with c2:
+                batting_style = st.text_input("Batting Style", value="")
+                bowling_style = st.text_input("Bowling Style", value="")
+                is_keeper     = st.checkbox("Is Wicket-Keeper?", value=False)
+                is_captain    = st.checkbox("Is Captain?", value=False)
 
-        add_btn = st.form_submit_button("✅ Add Player")
-        if add_btn:
-            if not player_id or not str(full_name).strip():
-                st.error("Player ID and Full Name are required.")
-            else:
-                try:
-                    upsert_player({
-                        "player_id": int(player_id),
-                        "full_name": full_name.strip(),
-                        "nick_name": (nick_name or "").strip(),
-                        "role": (role or "").strip(),
-                        "batting_style": (batting_style or "").strip(),
-                        "bowling_style": (bowling_style or "").strip(),
-                        "is_keeper": bool(is_keeper),
-                        "is_captain": bool(is_captain),
-                        "team_id": team_id
-                    }, mode="insert")
-                    st.success(f"🎉 Added player '{full_name}' (ID {int(player_id)})")
-                    fetch_players_min.clear()  # refresh cache
-                except Exception as e:
-                    st.error(f"Insert failed: {e}")
+            metrics.cache_lookup("fetch_teams")
+            teams = fetch_teams(cache_bus.version("teams"))
+            team_map = {"— (no team)": None}
+            for t in teams:
+                team_map[f"{t['team_name']} ({t['country']})"] = t["team_id"]
+            team_label = st.selectbox("Team", list(team_map.keys()))
+            team_id = team_map[team_label]
 
-# ---------------- Update ----------------
-with tab_update:
-    st.subheader("✏️ Update Player")
-    plist = fetch_players_min()
-    if not plist:
-        st.info("No players found to update.")
-    else:
-        display = [f"{p['full_name']} (ID {p['player_id']})" for p in plist]
-        pick = st.selectbox("Select Player", display)
-        sel_id = int(pick.rsplit("ID", 1)[1].strip(") ").strip())
-        current = fetch_player(sel_id)
-
-        if current:
-            with st.form("upd_form", clear_on_submit=False):
-                c1, c2 = st.columns(2)
-                with c1:
-                    full_name = st.text_input("Full Name", value=current["full_name"] or "")
-                    nick_name = st.text_input("Nick Name", value=current["nick_name"] or "")
-                    role      = st.text_input("Role", value=current["role"] or "")
-                with c2:
-                    batting_style = st.text_input("Batting Style", value=current["batting_style"] or "")
-                    bowling_style = st.text_input("Bowling Style", value=current["bowling_style"] or "")
-                    is_keeper     = st.checkbox("Is Wicket-Keeper?", value=current["is_keeper"])
-                    is_captain    = st.checkbox("Is Captain?", value=current["is_captain"])
-
-                teams = fetch_teams()
-                team_map = {"— (no team)": None}
-                for t in teams:
-                    team_map[f"{t['team_name']} ({t['country']})"] = t["team_id"]
-
-                # Preselect current team label
-                rev_map = {v: k for k, v in team_map.items()}
-                pre_label = rev_map.get(current["team_id"], "— (no team)")
-                team_label = st.selectbox("Team", list(team_map.keys()), index=list(team_map.keys()).index(pre_label))
-                team_id = team_map[team_label]
-
-                upd_btn = st.form_submit_button("🔄 Update Player")
-                if upd_btn:
+            add_btn = st.form_submit_button("✅ Add Player")
+            if add_btn:
+                if not player_id or not str(full_name).strip():
+                    st.error("Player ID and Full Name are required.")
+                else:
                     try:
                         upsert_player({
-                            "player_id": sel_id,
+                            "player_id": int(player_id),
                             "full_name": full_name.strip(),
                             "nick_name": (nick_name or "").strip(),
                             "role": (role or "").strip(),
@@ -220,42 +179,102 @@ with tab_update:
                             "is_keeper": bool(is_keeper),
                             "is_captain": bool(is_captain),
                             "team_id": team_id
-                        }, mode="update")
-                        st.success(f"✅ Updated player (ID {sel_id})")
-                        fetch_players_min.clear()  # refresh cache
+                        }, mode="insert")
+                        st.success(f"🎉 Added player '{full_name}' (ID {int(player_id)})")
                     except Exception as e:
-                        st.error(f"Update failed: {e}")
+                        st.error(f"Insert failed: {e}")
+
+# ---------------- Update ----------------
+with tab_update, profiler.span("tab: update"):
+    if tab_update.open:
+        st.subheader("✏️ Update Player")
+        metrics.cache_lookup("fetch_players_min")
+        plist = fetch_players_min(cache_bus.version("players"))
+        if not plist:
+            st.info("No players found to update.")
+        else:
+            display = [f"{p['full_name']} (ID {p['player_id']})" for p in plist]
+            pick = st.selectbox("Select Player", display)
+            sel_id = int(pick.rsplit("ID", 1)[1].strip(") ").strip())
+            metrics.cache_lookup("fetch_player")
+            current = fetch_player(sel_id, cache_bus.version("players", sel_id))
+
+            if current:
+                with st.form("upd_form", clear_on_submit=False):
+                    c1, c2 = st.columns(2)
+                    with c1:
+                        full_name = st.text_input("Full Name", value=current["full_name"] or "")
+                        nick_name = st.text_input("Nick Name", value=current["nick_name"] or "")
+                        role      = st.text_input("Role", value=current["role"] or "")
+                    with c2:
+                        batting_style = st.text_input("Batting Style", value=current["batting_style"] or "")
+                        bowling_style = st.text_input("Bowling Style", value=current["bowling_style"] or "")
+                        is_keeper     = st.checkbox("Is Wicket-Keeper?", value=current["is_keeper"])
+                        is_captain    = st.checkbox("Is Captain?", value=current["is_captain"])
+
+                    metrics.cache_lookup("fetch_teams")
+                    teams = fetch_teams(cache_bus.version("teams"))
+                    team_map = {"— (no team)": None}
+                    for t in teams:
+                        team_map[f"{t['team_name']} ({t['country']})"] = t["team_id"]
+
+                    # Preselect current team label
+                    rev_map = {v: k for k, v in team_map.items()}
+                    pre_label = rev_map.get(current["team_id"], "— (no team)")
+                    team_label = st.selectbox("Team", list(team_map.keys()), index=list(team_map.keys()).index(pre_label))
+                    team_id = team_map[team_label]
+
+                    upd_btn = st.form_submit_button("🔄 Update Player")
+                    if upd_btn:
+                        try:
+                            upsert_player({
+                                "player_id": sel_id,
+                                "full_name": full_name.strip(),
+                                "nick_name": (nick_name or "").strip(),
+                                "role": (role or "").strip(),
+                                "batting_style": (batting_style or "").strip(),
+                                "bowling_style": (bowling_style or "").strip(),
+                                "is_keeper": bool(is_keeper),
+                                "is_captain": bool(is_captain),
+                                "team_id": team_id
+                            }, mode="update")
+                            st.success(f"✅ Updated player (ID {sel_id})")
+                        except Exception as e:
+                            st.error(f"Update failed: {e}")
 
 # ---------------- Delete ----------------
-with tab_delete:
-    st.subheader("🗑 Delete Player")
-    plist = fetch_players_min()
-    if not plist:
-        st.info("No players to delete.")
-    else:
-        display = [f"{p['full_name']} (ID {p['player_id']})" for p in plist]
-        pick = st.selectbox("Select Player to Delete", display)
-        sel_id = int(pick.rsplit("ID", 1)[1].strip(") ").strip())
-        confirm = st.checkbox("I understand this will permanently delete the player.", value=False)
-        if st.button("🚨 Delete Player"):
-            if not confirm:
-                st.error("Please tick the confirmation box.")
-            else:
-                try:
-                    delete_player(sel_id)
-                    st.success(f"❌ Deleted player ID {sel_id}")
-                    fetch_players_min.clear()  # refresh cache
-                except Exception as e:
-                    st.error(f"Delete failed: {e}")
+with tab_delete, profiler.span("tab: delete"):
+    if tab_delete.open:
+        st.subheader("🗑 Delete Player")
+        metrics.cache_lookup("fetch_players_min")
+        plist = fetch_players_min(cache_bus.version("players"))
+        if not plist:
+            st.info("No players to delete.")
+        else:
+            display = [f"{p['full_name']} (ID {p['player_id']})" for p in plist]
+            pick = st.selectbox("Select Player to Delete", display)
+            sel_id = int(pick.rsplit("ID", 1)[1].strip(") ").strip())
+            confirm = st.checkbox("I understand this will permanently delete the player.", value=False)
+            if st.button("🚨 Delete Player"):
+                if not confirm:
+                    st.error("Please tick the confirmation box.")
+                else:
+                    try:
+                        delete_player(sel_id)
+                        st.success(f"❌ Deleted player ID {sel_id}")
+                    except Exception as e:
+                        st.error(f"Delete failed: {e}")
 
 # ---------------- View ----------------
-with tab_view:
-    st.subheader("📊 Player Records")
-    try:
-        df = view_players_df()
-        if df.empty:
-            st.warning("No records found.")
-        else:
-            st.dataframe(df, width="stretch", height=440)
-    except Exception as e:
-        st.error(f"Query failed: {e}")
+with tab_view, profiler.span("tab: view"):
+    if tab_view.open:
+        st.subheader("📊 Player Records")
+        try:
+            metrics.cache_lookup("view_players_df")
+            df = view_players_df((cache_bus.version("players"), cache_bus.version("teams")))
+            if df.empty:
+                st.warning("No records found.")
+            else:
+                st.dataframe(df, width="stretch", height=440)
+        except Exception as e:
+            st.error(f"Query failed: {e}")
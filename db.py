@@ -0,0 +1,312 @@
+# ===========================================================
+#                 Shared DB configuration
+# ===========================================================
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool as pg_pool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "port": int(os.getenv("DB_PORT", "5432")),
+    "dbname": os.getenv("DB_NAME", "rudra"),
+    "user": os.getenv("DB_USER", "postgres"),
+    "password": os.getenv("DB_PASSWORD", "Rudra0718"),
+}
+
+# Read-only dashboard queries may go to a replica (libpq DSN / URL); unset = primary only
+REPLICA_DSN = os.getenv("DB_REPLICA_DSN", "")
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "10"))          # seconds
+REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "5"))
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# psycopg2 keeps at most POOL_MIN idle connections and closes the rest on return,
+# so POOL_MIN is also how many connections keep their prepared statements warm
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "4"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "8"))
+
+
+def _conn_kwargs(role):
+    return {"dsn": REPLICA_DSN} if role == REPLICA else DB_CONFIG
+
+
+def connect(role=PRIMARY, **kwargs):
+    """New connection; extra libpq options (connect_timeout, ...) pass through."""
+    return psycopg2.connect(**_conn_kwargs(role), **kwargs)
+
+
+@contextmanager
+def session(role=PRIMARY, **kwargs):
+    """
+    connect() for one transaction: commits (rolls back on error) and closes on exit.
+    A bare `with connect() as conn` only ends the transaction and leaks the connection.
+    """
+    conn = connect(role, **kwargs)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+# ---------------- Replica routing ----------------
+def lsn_int(lsn):
+    """'16/B374D848' -> comparable int."""
+    hi, lo = lsn.split("/")
+    return (int(hi, 16) << 32) | int(lo, 16)
+
+
+class _ReplicaHealth:
+    """Cached replica state, re-checked at most every REPLICA_CHECK_SECONDS."""
+
+    def __init__(self):
+        self.checked_at = 0.0
+        self.ok = False
+        self.lag = None             # seconds behind the primary
+        self.replay_lsn = None      # int, None if the replica is not a streaming standby
+        self.reason = "unchecked"
+        self._lock = threading.Lock()
+
+    def _check(self):
+        conn = connect(REPLICA)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET statement_timeout = '1s'")
+                # a caught-up standby on an idle primary replays nothing, so its replay
+                # timestamp ages without it lagging: count it as 0s behind
+                cur.execute("""
+                    SELECT pg_is_in_recovery(),
+                           pg_last_wal_replay_lsn()::text,
+                           CASE WHEN NOT pg_is_in_recovery() THEN 0
+                                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                           END
+                """)
+                in_recovery, replay_lsn, lag = cur.fetchone()
+        finally:
+            conn.close()
+        self.replay_lsn = lsn_int(replay_lsn) if in_recovery and replay_lsn else None
+        self.lag = float(lag or 0)
+        self.ok = self.lag <= REPLICA_MAX_LAG
+        self.reason = "ok" if self.ok else f"lag {self.lag:.1f}s"
+
+    def status(self):
+        with self._lock:
+            if time.monotonic() - self.checked_at >= REPLICA_CHECK_SECONDS:
+                try:
+                    self._check()
+                except psycopg2.Error as e:
+                    self.ok, self.reason = False, f"unreachable: {str(e).strip()[:80]}"
+                self.checked_at = time.monotonic()
+            return self
+
+    def mark_down(self, reason):
+        with self._lock:
+            self.ok, self.reason, self.checked_at = False, reason, time.monotonic()
+
+
+replica_health = _ReplicaHealth()
+
+
+def route_read(min_lsn=None, written_at=None):
+    """
+    PRIMARY or REPLICA for a read. Falls back to the primary when no replica is
+    configured, it is unreachable or lags more than REPLICA_MAX_LAG, and - for
+    read-your-writes - until the replica has replayed `min_lsn` (the caller's last
+    write). Replicas whose progress cannot be compared by LSN are skipped for
+    REPLICA_MAX_LAG seconds after `written_at` instead.
+    """
+    if not REPLICA_DSN:
+        return PRIMARY
+    health = replica_health.status()
+    if not health.ok:
+        return PRIMARY
+    if min_lsn is not None:
+        if health.replay_lsn is not None:
+            if health.replay_lsn < lsn_int(min_lsn):
+                return PRIMARY
+        elif written_at is not None and time.time() - written_at < REPLICA_MAX_LAG:
+            return PRIMARY
+    return REPLICA
+
+
+def current_lsn(conn):
+    """Primary WAL position right after a write (the read-your-writes token)."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_current_wal_lsn()::text")
+        return cur.fetchone()[0]
+
+
+# ---------------- Pool ----------------
+class PooledConnection(extensions.connection):
+    """Connection that remembers which statements it has PREPAREd (they live as long as the session)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.role = PRIMARY
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+# getconn() raises instead of waiting, so each pool is fronted by a semaphore
+_pool_slots = {PRIMARY: threading.BoundedSemaphore(POOL_MAX), REPLICA: threading.BoundedSemaphore(POOL_MAX)}
+
+
+def get_pool(role=PRIMARY):
+    with _pool_lock:
+        if role not in _pools:
+            _pools[role] = pg_pool.ThreadedConnectionPool(POOL_MIN, POOL_MAX, connection_factory=PooledConnection,
+                                                          **_conn_kwargs(role))
+        return _pools[role]
+
+
+def _replica_conn():
+    try:
+        return get_pool(REPLICA).getconn()
+    except psycopg2.OperationalError as e:
+        replica_health.mark_down(f"unreachable: {str(e).strip()[:80]}")
+        print(f"⚠️ replica unavailable, reading from primary: {e}")
+        return None
+
+
+@contextmanager
+def _borrow(role, getconn):
+    with _pool_slots[role]:
+        conn = getconn()
+        if conn is None:
+            yield None
+            return
+        conn.role = role
+        try:
+            yield conn
+        finally:
+            get_pool(role).putconn(conn, close=bool(conn.closed))
+
+
+@contextmanager
+def pooled(role=PRIMARY):
+    """
+    Borrow a pooled connection for `role`; the pool rolls back what is left open on
+    return. A replica that cannot be reached falls back to the primary (conn.role says
+    where the connection actually went).
+    """
+    if role == REPLICA:
+        with _borrow(REPLICA, _replica_conn) as conn:
+            if conn is not None:
+                yield conn
+                return
+    with _borrow(PRIMARY, get_pool(PRIMARY).getconn) as conn:
+        yield conn
+
+
+# ---------------- Prepared statements ----------------
+_PLACEHOLDER = re.compile(r"\$(\d+)")
+
+
+def statement_name(sql, types=()):
+    return "q_" + hashlib.sha1((sql + "|" + ",".join(types)).encode()).hexdigest()[:16]
+
+
+def prepare(conn, sql, types=()):
+    """PREPARE `sql` once per pooled connection; returns the statement name."""
+    name = statement_name(sql, types)
+    if name not in conn.prepared:
+        type_list = f" ({', '.join(types)})" if types else ""
+        with conn.cursor() as cur:
+            cur.execute(f"PREPARE {name}{type_list} AS {sql}")
+        conn.prepared.add(name)
+    return name
+
+
+def _execute_sql(name, args):
+    return f"EXECUTE {name} ({', '.join(['%s'] * len(args))})" if args else f"EXECUTE {name}"
+
+
+def execute_prepared(conn, sql, types=(), args=()):
+    """
+    Run `sql` (with $1..$n placeholders of Postgres `types`) as a server-side prepared
+    statement, PREPAREd once per pooled connection, and return (columns, rows).
+    """
+    name = prepare(conn, sql, types)
+    with conn.cursor() as cur:
+        cur.execute(_execute_sql(name, args), list(args))
+        columns = [d[0] for d in cur.description]
+        return columns, cur.fetchall()
+
+
+def estimate_rows(conn, sql, types=(), args=()):
+    """Planner's row estimate for the prepared statement (EXPLAIN, nothing is executed)."""
+    name = prepare(conn, sql, types)
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (FORMAT JSON) " + _execute_sql(name, args), list(args))
+        plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def fetch_prepared(conn, sql, types=(), args=(), chunk_rows=5000, max_rows=None):
+    """
+    Prepared-statement counterpart of stream(): (description, rows) chunks. A plain
+    cursor holds its whole result client-side, so with `max_rows` the statement is
+    capped at max_rows + 1 rows and None is returned when the result is larger
+    (the caller re-runs it through stream()).
+    """
+    if max_rows is not None:
+        sql = f"SELECT * FROM ({sql}) capped LIMIT {int(max_rows) + 1}"     # keeps the inner ORDER BY
+    name = prepare(conn, sql, types)
+    cur = conn.cursor()
+    try:
+        cur.execute(_execute_sql(name, args), list(args))
+    except BaseException:
+        cur.close()
+        raise
+    if max_rows is not None and cur.rowcount > max_rows:
+        cur.close()
+        return None
+    return _chunks(cur, chunk_rows)
+
+
+def _chunks(cur, chunk_rows):
+    with cur:
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield cur.description, rows
+
+
+# ---------------- Server-side cursors ----------------
+def to_pyformat(sql, types=()):
+    """'$1' placeholders -> psycopg2 '%(p1)s::type' so the same SQL can back a DECLAREd cursor."""
+    sql = sql.replace("%", "%%")
+    return _PLACEHOLDER.sub(lambda m: f"%(p{m.group(1)})s::{types[int(m.group(1)) - 1]}", sql)
+
+
+def stream(conn, sql, types=(), args=(), chunk_rows=5000):
+    """
+    Yield (description, rows) chunks from a named server-side cursor, so only
+    `chunk_rows` rows are ever held client-side. DECLARE cannot wrap EXECUTE, so
+    this path plans the statement afresh.
+    """
+    params = {f"p{i}": a for i, a in enumerate(args, start=1)}
+    with conn.cursor(name=f"stream_{statement_name(sql, types)[2:]}") as cur:
+        cur.itersize = chunk_rows
+        cur.execute(to_pyformat(sql, types), params)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield cur.description, rows
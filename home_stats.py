@@ -0,0 +1,141 @@
+# ===========================================================
+#         Home page counters (cached, refreshed in background)
+# ===========================================================
+#
+# The landing page must never wait on Postgres, so the summary cards read an
+# in-process snapshot that a daemon thread refreshes every REFRESH_SECONDS.
+#
+#   site_counters   exact counts, rewritten by the ingest pipeline after each run
+#   pg_class        reltuples estimates (summed over partitions) for anything the
+#                   counters table does not have yet
+#
+# Values are (number, exact) pairs; the page marks estimates with "~".
+
+import os
+import threading
+import time
+
+import db
+import metrics
+
+REFRESH_SECONDS = float(os.getenv("HOME_STATS_REFRESH_SECONDS", "60"))
+FIRST_LOAD_WAIT = 0.05      # seconds the very first render may wait for the first snapshot
+
+# counter name -> exact query run by the ingest (cheap enough there, not on the page)
+COUNTERS = {
+    "matches":   ("matches", "SELECT COUNT(*) FROM matches"),
+    "players":   ("players", "SELECT COUNT(*) FROM players"),
+    "countries": ("teams",   "SELECT COUNT(DISTINCT country) FROM teams"),
+}
+
+
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS site_counters (
+        name        TEXT PRIMARY KEY,
+        value       BIGINT NOT NULL,
+        updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+
+def refresh_counters(cur):
+    """Recompute the exact counters (called by the ingest after a run)."""
+    ensure_tables(cur)
+    out = {}
+    for name, (table, sql) in COUNTERS.items():
+        cur.execute("SELECT to_regclass(%s)", (table,))
+        if cur.fetchone()[0] is None:
+            continue
+        cur.execute(sql)
+        out[name] = cur.fetchone()[0]
+        cur.execute("""
+            INSERT INTO site_counters (name, value) VALUES (%s, %s)
+            ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP
+        """, (name, out[name]))
+    return out
+
+
+def read_counts(cur):
+    """{name: (value, exact)} from site_counters, falling back to planner estimates."""
+    counts = {}
+    cur.execute("SELECT to_regclass('site_counters')")
+    if cur.fetchone()[0] is not None:
+        cur.execute("SELECT name, value FROM site_counters")
+        counts = {name: (value, True) for name, value in cur.fetchall()}
+
+    missing = [COUNTERS[n][0] for n in COUNTERS if n not in counts and n != "countries"]
+    if missing:
+        # reltuples is -1 until the first ANALYZE; partitioned parents hold 0, so sum the children
+        cur.execute("""
+            SELECT parent.relname, SUM(GREATEST(child.reltuples, 0))::BIGINT, MIN(child.reltuples)
+            FROM pg_class parent
+            LEFT JOIN pg_inherits i ON i.inhparent = parent.oid
+            JOIN pg_class child ON child.oid = COALESCE(i.inhrelid, parent.oid)
+            WHERE parent.relname = ANY(%s) AND parent.relnamespace = 'public'::regnamespace
+            GROUP BY parent.relname
+        """, (missing,))
+        for relname, estimate, lowest in cur.fetchall():
+            if lowest is not None and lowest >= 0:
+                counts[relname] = (estimate, False)
+
+    if "countries" not in counts:
+        cur.execute("SELECT to_regclass('teams')")
+        if cur.fetchone()[0] is not None:
+            cur.execute(COUNTERS["countries"][1])       # teams is a few hundred rows
+            counts["countries"] = (cur.fetchone()[0], True)
+    return counts
+
+
+class _Refresher:
+    def __init__(self):
+        self.snapshot = None            # {name: (value, exact)}
+        self.updated_at = None
+        self._first = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        conn = db.connect(db.route_read())      # dashboard read: replica when healthy
+        try:
+            with metrics.track_query("home_counts") as q, conn.cursor() as cur:
+                cur.execute("SET statement_timeout = '2s'")
+                snap = read_counts(cur)
+                q.rows = len(snap)
+        finally:
+            conn.close()
+        self.snapshot, self.updated_at = snap, time.time()
+
+    def _loop(self):
+        while True:
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"⚠️ home counters refresh failed: {e}")
+            self._first.set()
+            time.sleep(REFRESH_SECONDS)
+
+    def get(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="home-stats", daemon=True)
+                self._thread.start()
+        if self.snapshot is None:
+            self._first.wait(FIRST_LOAD_WAIT)
+        return self.snapshot or {}
+
+
+_refresher = _Refresher()
+
+
+def get_counts():
+    """Latest snapshot ({} until the first refresh lands); never blocks beyond FIRST_LOAD_WAIT."""
+    return _refresher.get()
+
+
+def display(counts, name):
+    value = counts.get(name)
+    if value is None:
+        return "—"
+    n, exact = value
+    return f"{n:,}" if exact else f"~{n:,}"
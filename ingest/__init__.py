@@ -0,0 +1 @@
+"""Cricbuzz → Postgres loaders. Run with `python -m ingest` (see ingest/pipeline.py)."""
@@ -0,0 +1,5 @@
+import sys
+
+from ingest.pipeline import main
+
+sys.exit(main())
@@ -0,0 +1,376 @@
+# ===========================================================
+#       Player_career_stats Table (derived from scorecards)
+# ===========================================================
+#
+# Career totals per player and format, aggregated with pandas group-bys from
+# batting_scorecard / bowling_scorecard / fielding_scorecard instead of three
+# /stats/v1/player/{id}/... calls per player:
+#
+#   batting   matches, innings, runs, balls, 100s, 50s, highest, average, SR,
+#             not outs, ducks
+#   bowling   wickets, balls, runs conceded, average, economy, 4w / 5w / 10w, BBI, BBM
+#   fielding  catches, stumpings (the fielder named in the dismissal is matched to
+#             that match's batters and bowlers; unmatched names are left out)
+#
+# Formats follow player_master_stats: Test / ODI / T20I for international series
+# and IPL; other matches are left out. Totals cover the matches we have ingested.
+#
+# Incremental: scorecards.process_match queues every match it (re)writes in
+# career_stats_pending, and a run recomputes only the players of queued matches,
+# from all their rows. An empty table (or --full) recomputes everyone.
+#
+#   python -m ingest --stages career_stats      # scorecards, then the aggregates
+#   python -m ingest.career_stats --full        # recompute everyone, no API calls
+#   python -m ingest.career_stats --check       # compare with the API rows in player_master_stats
+#
+# With MASTER_STATS_SOURCE=local the master_stats stage copies these rows into
+# player_master_stats instead of calling the stats API (see master_stats.py).
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+import db
+
+TABLES = ["player_career_stats", "career_stats_pending"]
+
+INTERNATIONAL = {"TEST": "Test", "ODI": "ODI", "T20": "T20I", "T20I": "T20I"}
+IPL = "indian premier league"
+NOT_OUT = r"^\s*(?:not out|batting|retired hurt|absent hurt)?\s*$"   # dismissal texts that are not a wicket
+
+COUNT_COLUMNS = ["matches", "innings", "runs", "balls_faced", "hundreds", "fifties", "highest_score",
+                 "not_outs", "ducks", "wickets", "balls_bowled", "runs_conceded",
+                 "four_wicket_hauls", "five_wicket_hauls", "ten_wicket_hauls", "catches", "stumpings"]
+STAT_COLUMNS = ["matches", "innings", "runs", "balls_faced", "hundreds", "fifties", "highest_score",
+                "batting_average", "strike_rate", "not_outs", "ducks",
+                "wickets", "balls_bowled", "runs_conceded", "bowling_average", "economy_rate",
+                "four_wicket_hauls", "five_wicket_hauls", "ten_wicket_hauls",
+                "best_bowling_innings", "best_bowling_match", "catches", "stumpings"]
+PROFILE_COLUMNS = ["player_name", "team_name", "role", "batting_style", "bowling_style"]
+
+
+# ---------------- DB Setup ----------------
+def ensure_pending(cur):
+    """Queue of matches whose players need recomputing (written by the scorecards stage)."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS career_stats_pending (
+            match_id  BIGINT PRIMARY KEY,
+            queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def ensure_tables(cur):
+    ensure_pending(cur)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS player_career_stats (
+            player_id BIGINT,
+            format TEXT,
+            player_name TEXT NOT NULL,
+            team_name TEXT,
+            role TEXT,
+            batting_style TEXT,
+            bowling_style TEXT,
+            matches INT,
+            innings INT,
+            runs INT,
+            balls_faced INT,
+            hundreds INT,
+            fifties INT,
+            highest_score INT,
+            batting_average DECIMAL(6,2),
+            strike_rate DECIMAL(6,2),
+            not_outs INT,
+            ducks INT,
+            wickets INT,
+            balls_bowled INT,
+            runs_conceded INT,
+            bowling_average DECIMAL(6,2),
+            economy_rate DECIMAL(6,2),
+            four_wicket_hauls INT,
+            five_wicket_hauls INT,
+            ten_wicket_hauls INT,
+            best_bowling_innings TEXT,
+            best_bowling_match TEXT,
+            catches INT,
+            stumpings INT,
+            last_match_date DATE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (player_id, format)
+        )
+    """)
+    # incremental runs read a few players' rows from every season
+    for table in ("batting_scorecard", "bowling_scorecard"):
+        cur.execute("SELECT to_regclass(%s)", (table,))
+        if cur.fetchone()[0] is not None:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_player_idx ON {table} (player_id)")
+
+
+def mark_pending(cur, match_id):
+    cur.execute("INSERT INTO career_stats_pending (match_id) VALUES (%s) ON CONFLICT DO NOTHING", (match_id,))
+
+
+# ---------------- Load ----------------
+def _frame(cur, sql, args=()):
+    cur.execute(sql, args)
+    return pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+
+
+def _where(column, values):
+    return ("", ()) if values is None else (f"WHERE {column} = ANY(%s)", (list(values),))
+
+
+def load(cur, players=None):
+    """Scorecard rows of `players` (None = everyone) with their match's format."""
+    where, args = _where("player_id", players)
+    bat = _frame(cur, f"""
+        SELECT match_id, player_id, player_name, team_name, runs, balls_faced, dismissal, match_date
+        FROM batting_scorecard {where}
+    """, args)
+    bowl = _frame(cur, f"""
+        SELECT match_id, player_id, player_name, team_name, overs, runs_conceded, wickets, match_date
+        FROM bowling_scorecard {where}
+    """, args)
+
+    match_ids = None if players is None else sorted(set(bat["match_id"]) | set(bowl["match_id"]))
+    where, args = _where("match_id", match_ids)
+    field = _frame(cur, f"""
+        SELECT match_id, player_name, team_name, catches, stumpings
+        FROM fielding_scorecard {where}
+    """, args)
+    matches = _frame(cur, f"""
+        SELECT m.match_id, m.match_format, s.series_type, s.series_name
+        FROM matches m LEFT JOIN series s USING (series_id) {where.replace('match_id', 'm.match_id')}
+    """, args)
+    if players is None:
+        roster = pd.concat([bat, bowl])[["match_id", "team_name", "player_id", "player_name"]]
+    else:
+        roster = _frame(cur, f"""
+            SELECT match_id, team_name, player_id, player_name FROM batting_scorecard {where}
+            UNION
+            SELECT match_id, team_name, player_id, player_name FROM bowling_scorecard {where}
+        """, args * 2)
+    cur.execute("SELECT to_regclass('players')")
+    if cur.fetchone()[0] is not None:
+        where, args = _where("player_id", players)
+        profiles = _frame(cur, f"""
+            SELECT player_id, full_name, role, batting_style, bowling_style FROM players {where}
+        """, args)
+    else:
+        profiles = pd.DataFrame(columns=["player_id", "full_name", "role", "batting_style", "bowling_style"])
+    return bat, bowl, field, roster, formats(matches), profiles
+
+
+def formats(matches):
+    """match_id -> player_master_stats format; matches outside those formats are dropped."""
+    series = matches["series_name"].fillna("").str.lower()
+    intl = matches["series_type"].fillna("").str.lower().eq("international")
+    fmt = matches["match_format"].fillna("").str.upper().map(INTERNATIONAL)
+    out = matches[["match_id"]].assign(
+        format=np.where(series.str.contains(IPL, regex=False), "IPL", np.where(intl, fmt, None)))
+    return out.dropna(subset=["format"])
+
+
+# ---------------- Aggregate ----------------
+def resolve_fielders(field, roster):
+    """
+    Fielding rows keyed by the fielder's hashed name -> the player id of the batter or
+    bowler of that match and team with the same surname (dismissals say "c Kohli b ...").
+    Rows without exactly one such player are dropped.
+    """
+    surname = lambda s: s.fillna("").str.lower().str.strip().str.split().str[-1]
+    name = (field["player_name"].fillna("")
+            .str.replace(r"\s+b\s+.*$", "", regex=True)          # "Carey b Zampa" (stumping text)
+            .str.replace(r"\(sub\)", "", regex=True))
+    f = field.assign(surname=surname(name), row=np.arange(len(field)))
+    r = roster.drop_duplicates(["match_id", "team_name", "player_id"])
+    r = r.assign(surname=surname(r["player_name"]))[["match_id", "team_name", "surname", "player_id"]]
+    cand = f.merge(r, on=["match_id", "team_name", "surname"])
+    unique = cand.groupby("row")["player_id"].transform("size").eq(1)
+    return cand[unique].drop(columns=["surname", "row"]), len(field) - int(unique.sum())
+
+
+def batting_totals(bat):
+    dismissal = bat["dismissal"].fillna("")
+    runs = bat["runs"].fillna(0)
+    out = ~dismissal.str.match(NOT_OUT, case=False)
+    batted = bat["balls_faced"].fillna(0).gt(0) | runs.gt(0) | dismissal.str.strip().ne("")
+    df = bat.assign(runs=runs, balls_faced=bat["balls_faced"].fillna(0), innings=batted,
+                    not_outs=batted & ~out, ducks=batted & out & runs.eq(0),
+                    hundreds=runs.ge(100), fifties=runs.ge(50) & runs.lt(100))
+    return df.groupby(["player_id", "format"]).agg(
+        innings=("innings", "sum"), runs=("runs", "sum"), balls_faced=("balls_faced", "sum"),
+        hundreds=("hundreds", "sum"), fifties=("fifties", "sum"), highest_score=("runs", "max"),
+        not_outs=("not_outs", "sum"), ducks=("ducks", "sum"))
+
+
+def _best(df, keys):
+    """'w/r' of each group's best figures: most wickets, then fewest runs."""
+    best = df.sort_values(["wickets", "runs_conceded"], ascending=[False, True]).drop_duplicates(keys)
+    return best.set_index(keys)["wickets"].astype(int).astype(str) + "/" + \
+        best.set_index(keys)["runs_conceded"].astype(int).astype(str)
+
+
+def bowling_totals(bowl):
+    overs = bowl["overs"].fillna(0).astype(float)
+    whole = np.floor(overs)
+    df = bowl.assign(balls_bowled=whole * 6 + np.round((overs - whole) * 10),
+                     wickets=bowl["wickets"].fillna(0), runs_conceded=bowl["runs_conceded"].fillna(0))
+    keys = ["player_id", "format"]
+    totals = df.groupby(keys).agg(
+        wickets=("wickets", "sum"), balls_bowled=("balls_bowled", "sum"), runs_conceded=("runs_conceded", "sum"),
+        four_wicket_hauls=("wickets", lambda w: int((w == 4).sum())),
+        five_wicket_hauls=("wickets", lambda w: int((w >= 5).sum())))
+    per_match = df.groupby(keys + ["match_id"], as_index=False)[["wickets", "runs_conceded"]].sum()
+    totals["ten_wicket_hauls"] = per_match[per_match["wickets"] >= 10].groupby(keys).size()
+    totals["best_bowling_innings"] = _best(df, keys)
+    totals["best_bowling_match"] = _best(per_match, keys)
+    return totals
+
+
+def aggregate(bat, bowl, field, roster, fmts, profiles, players=None):
+    """
+    One row per (player_id, format) with player_master_stats' stat columns. With
+    `players`, catches resolved to their team-mates and opponents are left out.
+    """
+    bat = bat.merge(fmts, on="match_id").assign(match_date=lambda d: pd.to_datetime(d["match_date"]))
+    bowl = bowl.merge(fmts, on="match_id").assign(match_date=lambda d: pd.to_datetime(d["match_date"]))
+    field, unresolved = resolve_fielders(field, roster)
+    if players is not None:
+        field = field[field["player_id"].isin(list(players))]
+    field = field.merge(fmts, on="match_id")
+    keys = ["player_id", "format"]
+
+    # appearances: batting rows include did-not-bat entries, so they count as matches
+    seen = pd.concat([df[keys + ["match_id", "team_name", "match_date"]] for df in (bat, bowl)] +
+                     [field[keys + ["match_id"]]])
+    stats = seen.groupby(keys).agg(matches=("match_id", "nunique"), last_match_date=("match_date", "max"))
+    stats = stats.join(batting_totals(bat), how="left") \
+                 .join(bowling_totals(bowl), how="left") \
+                 .join(field.groupby(keys)[["catches", "stumpings"]].sum(), how="left")
+    for column in COUNT_COLUMNS:
+        stats[column] = stats[column].fillna(0).astype(int) if column in stats else 0
+    for column in ("best_bowling_innings", "best_bowling_match"):
+        stats[column] = stats[column].fillna("") if column in stats else ""
+
+    dismissals = stats["innings"] - stats["not_outs"]
+    ratio = lambda num, den: np.where(den > 0, num / den.where(den > 0, 1), 0.0).round(2)
+    stats["batting_average"] = ratio(stats["runs"], dismissals)
+    stats["strike_rate"] = ratio(stats["runs"] * 100, stats["balls_faced"])
+    stats["bowling_average"] = ratio(stats["runs_conceded"], stats["wickets"])
+    stats["economy_rate"] = ratio(stats["runs_conceded"] * 6, stats["balls_bowled"])
+
+    # names and team from the latest scorecard row, profile columns from players when known
+    latest = pd.concat([bat, bowl]).sort_values("match_date").drop_duplicates("player_id", keep="last")
+    latest = latest.set_index("player_id")[["player_name", "team_name"]]
+    profiles = profiles.drop_duplicates("player_id").set_index("player_id")
+    stats = stats.reset_index().join(latest, on="player_id").join(profiles, on="player_id")
+    stats["player_name"] = stats["full_name"].fillna(stats["player_name"]).fillna("Unknown")
+    return stats[keys + PROFILE_COLUMNS + STAT_COLUMNS + ["last_match_date"]], unresolved
+
+
+# ---------------- Save ----------------
+
+def save(cur, stats, players=None):
+    """Replace the rows of `players` (None = the whole table) with `stats`."""
+    if players is None:
+        cur.execute("DELETE FROM player_career_stats")
+    else:
+        cur.execute("DELETE FROM player_career_stats WHERE player_id = ANY(%s)", (list(players),))
+    rows = stats.astype(object).where(stats.notna(), None).values.tolist()
+    columns = ", ".join(stats.columns)
+    execute_values(cur, f"INSERT INTO player_career_stats ({columns}) VALUES %s", rows, page_size=1000)
+    return len(rows)
+
+
+def refresh(cur, full=False):
+    """Recompute the players of queued matches (everyone when `full` or the table is empty)."""
+    cur.execute("SELECT match_id FROM career_stats_pending")
+    pending = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT NOT EXISTS (SELECT 1 FROM player_career_stats)")
+    full = full or cur.fetchone()[0]
+    players = None
+    if not full:
+        if not pending:
+            print("✔ career stats up to date")
+            return 0
+        cur.execute("""
+            SELECT player_id FROM batting_scorecard WHERE match_id = ANY(%s)
+            UNION
+            SELECT player_id FROM bowling_scorecard WHERE match_id = ANY(%s)
+        """, (pending, pending))
+        players = [r[0] for r in cur.fetchall()]
+
+    stats, unresolved = aggregate(*load(cur, players), players=players)
+    saved = save(cur, stats, players)
+    cur.execute("DELETE FROM career_stats_pending WHERE match_id = ANY(%s)", (pending,))
+    scope = "all players" if players is None else f"{len(players)} players from {len(pending)} matches"
+    print(f"✔ Career stats: {saved} rows for {scope}"
+          + (f", ⚠ {unresolved} fielding rows without a matching player" if unresolved else ""))
+    return saved
+
+
+# ---------------- STAGE ----------------
+def run(ctx):
+    with ctx.conn.cursor() as cur:
+        return refresh(cur)
+
+
+# ---------------- Cross-check ----------------
+CHECK_COLUMNS = ["matches", "innings", "runs", "balls_faced", "hundreds", "fifties", "highest_score",
+                 "not_outs", "ducks", "wickets", "balls_bowled", "runs_conceded", "catches", "stumpings"]
+
+
+def cross_check(cur):
+    """
+    (player_id, format, player_name, column, local, api) for every counter that differs
+    between player_career_stats and the API-sourced player_master_stats.
+    """
+    picked = ", ".join(f"d.{c} AS local_{c}, a.{c} AS api_{c}" for c in CHECK_COLUMNS)
+    df = _frame(cur, f"""
+        SELECT d.player_id, d.format, d.player_name, {picked}
+        FROM player_career_stats d JOIN player_master_stats a USING (player_id, format)
+    """)
+    long = pd.concat([
+        df[["player_id", "format", "player_name"]].assign(
+            column=c, local=df[f"local_{c}"].fillna(0).astype(int), api=df[f"api_{c}"].fillna(0).astype(int))
+        for c in CHECK_COLUMNS
+    ]) if len(df) else pd.DataFrame(columns=["player_id", "format", "player_name", "column", "local", "api"])
+    return len(df), long[long["local"] != long["api"]]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m ingest.career_stats",
+                                description="Career aggregates derived from the scorecard tables")
+    p.add_argument("--full", action="store_true", help="recompute every player, not just queued matches")
+    p.add_argument("--check", action="store_true", help="compare with the API rows in player_master_stats")
+    args = p.parse_args(argv)
+
+    conn = db.connect()
+    try:
+        with conn.cursor() as cur:
+            ensure_tables(cur)
+            if not args.check:
+                refresh(cur, full=args.full)
+                conn.commit()
+                return 0
+            compared, diffs = cross_check(cur)
+    finally:
+        conn.close()
+
+    # local totals only cover ingested matches: below the API is expected, above it is a bug
+    over = diffs[diffs["local"] > diffs["api"]]
+    print(f"{compared} player/format rows in both tables, "
+          f"{compared - diffs[['player_id', 'format']].drop_duplicates().shape[0]} identical")
+    if len(diffs):
+        print(f"{'player':<28}{'format':<7}{'column':<16}{'local':>8}{'api':>8}")
+        for r in diffs.sort_values(["player_name", "format", "column"]).itertuples():
+            flag = "  ⚠ above API" if r.local > r.api else ""
+            print(f"{str(r.player_name)[:27]:<28}{r.format:<7}{r.column:<16}{r.local:>8}{r.api:>8}{flag}")
+    return 1 if len(over) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+# ===========================================================
+#              Shared API client + helpers for loaders
+# ===========================================================
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+import api_client
+import models
+
+load_dotenv()
+
+# RapidAPI key from the environment or .env; api_get refuses to run without one
+API_KEY = os.getenv("RAPIDAPI_KEY")
+
+# conservative rate limiter
+SLEEP_BETWEEN_CALLS = float(os.getenv("INGEST_SLEEP_BETWEEN_CALLS", "0.15"))
+
+# in-process retries: exponential backoff with full jitter, base * 2**attempt capped at MAX_WAIT
+RETRY_BASE = float(os.getenv("INGEST_RETRY_BASE", "0.5"))
+RETRY_MAX_WAIT = float(os.getenv("INGEST_RETRY_MAX_WAIT", "30"))
+
+# parsed /matches/v1/{live,recent,completed} listings are shared by the stages of a run
+LISTING_TTL = float(os.getenv("INGEST_LISTING_TTL", "300"))
+
+
+class FetchFailed(Exception):
+    """Raised by api_get when a request still fails after its retries (429, 5xx, network, auth)."""
+
+    def __init__(self, path, status=None, retry_after=None, reason=""):
+        self.path = path
+        self.status = status              # HTTP status, None for network errors
+        self.retry_after = retry_after    # seconds the server asked us to wait, if any
+        super().__init__(f"{path}: {reason or status}")
+
+
+def backoff_delay(attempt, base=RETRY_BASE, cap=RETRY_MAX_WAIT):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """Retry-After as delta-seconds or an HTTP date -> seconds (None if absent/unparseable)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+def require_api_key():
+    """Fail before the first request (not item by item through the fetch queue) without a key."""
+    if not API_KEY:
+        raise RuntimeError("RAPIDAPI_KEY is not set: export it or add it to .env")
+
+
+def api_get(path: str, params: Optional[dict] = None, retries: int = 3,
+            timeout: int = 25) -> Optional[Dict[str, Any]]:
+    """
+    GET {API_BASE}{path} -> JSON dict, or None on 204/404/empty body.
+    429/5xx/network errors are retried with jittered exponential backoff (honouring
+    Retry-After); when they persist, FetchFailed is raised so the caller can defer the
+    item to the fetch queue instead of silently dropping it. Loader traffic is
+    backfill priority: once the API budget is down to the interactive reserve,
+    items are deferred until it resets.
+    """
+    require_api_key()
+    status, retry_after, reason = None, None, ""
+    for i in range(retries):
+        try:
+            r = api_client.get(path, params, key=API_KEY, priority=api_client.BACKFILL, timeout=timeout)
+        except api_client.QuotaExhausted as e:
+            raise FetchFailed(path, None, e.retry_after, str(e))
+        except Exception as e:
+            status, retry_after, reason = None, None, f"{type(e).__name__}: {e}"
+        else:
+            if r.status_code == 200:
+                time.sleep(SLEEP_BETWEEN_CALLS)
+                return r.json() if r.text.strip() else None
+            if r.status_code in (404, 204):
+                time.sleep(SLEEP_BETWEEN_CALLS)
+                return None
+            status, retry_after = r.status_code, parse_retry_after(r.headers.get("Retry-After"))
+            reason = f"HTTP {status}"
+            if status != 429 and status < 500:
+                break                      # other 4xx (bad key, quota) will not fix itself in seconds
+        if i == retries - 1:
+            break
+        wait = backoff_delay(i)
+        if retry_after is not None:
+            if retry_after > RETRY_MAX_WAIT:
+                break                      # leave the long wait to the fetch queue
+            wait = max(wait, retry_after)
+        time.sleep(wait)
+    raise FetchFailed(path, status, retry_after, reason)
+
+
+_listings = {}
+_listings_lock = threading.Lock()
+
+
+def match_list(ep, timeout=30):
+    """
+    /matches/v1/{ep} parsed into [models.Series], fetched and parsed once per
+    LISTING_TTL for all stages (teams, players, series, scorecards, partnerships).
+    FetchFailed propagates; an empty listing is [].
+    """
+    with _listings_lock:
+        hit = _listings.get(ep)
+        if hit and time.monotonic() - hit[0] < LISTING_TTL:
+            return hit[1]
+    series = models.parse_match_list(api_get(f"/matches/v1/{ep}", timeout=timeout) or {})
+    with _listings_lock:
+        _listings[ep] = (time.monotonic(), series)
+    return series
+
+
+# ---------------- Helpers ----------------
+def clean_name(s):
+    return (s or "").replace("†", "").strip()
+
+
+def try_int(x):
+    try:
+        return int(x)
+    except Exception:
+        return None
+
+
+def try_float(x):
+    try:
+        return float(x)
+    except Exception:
+        return None
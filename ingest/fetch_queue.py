@@ -0,0 +1,145 @@
+# ===========================================================
+#        Durable retry queue for failed / rate-limited fetches
+# ===========================================================
+#
+# When api_get gives up on an item (429, 5xx, network), the stage defers it
+# here instead of checkpointing it as done. Every later run drains the due
+# items of a stage (through that stage's drain_item handler) before doing its
+# normal work, so a rate-limited run loses nothing and the next run only
+# re-fetches what is missing. Until an item is due again (or once it is dead)
+# the normal pass skips it too, so a new run does not undo the backoff.
+#
+# One row per (stage, item): attempts count every failure of the item, whichever
+# endpoint it failed on (endpoint records the latest).
+#
+#   next_attempt_at = now + max(Retry-After, jitter(BASE * 2**attempts, capped at MAX_DELAY))
+#   after MAX_ATTEMPTS the row is parked as 'dead' (python -m ingest --queue shows it)
+
+import json
+import os
+import random
+
+import metrics
+from ingest.common import FetchFailed
+
+QUEUE_BASE_DELAY = float(os.getenv("INGEST_QUEUE_BASE_DELAY", "60"))           # seconds
+QUEUE_MAX_DELAY = float(os.getenv("INGEST_QUEUE_MAX_DELAY", str(6 * 3600)))
+MAX_ATTEMPTS = int(os.getenv("INGEST_QUEUE_MAX_ATTEMPTS", "8"))
+
+
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS fetch_queue (
+        stage            TEXT NOT NULL,
+        endpoint         TEXT NOT NULL,              -- of the latest failure, e.g. /mcenter/v1/{id}/scard
+        item_key         TEXT NOT NULL,              -- the stage's checkpoint key (match id, team id, ...)
+        path             TEXT,
+        context          JSONB,                      -- whatever drain_item needs to redo the item
+        status           TEXT NOT NULL DEFAULT 'pending',   -- pending | dead
+        attempts         INT NOT NULL DEFAULT 1,
+        last_status      INT,
+        last_error       TEXT,
+        next_attempt_at  TIMESTAMP NOT NULL,
+        created_at       TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at       TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (stage, item_key)
+    );
+    CREATE INDEX IF NOT EXISTS fetch_queue_due ON fetch_queue (stage, next_attempt_at)
+        WHERE status = 'pending';
+    """)
+    # queues created with one row per endpoint: fold each item into its most-attempted row
+    cur.execute("""
+        SELECT 1 FROM pg_index i JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = 'fetch_queue'::regclass AND i.indisprimary AND a.attname = 'endpoint'
+    """)
+    if cur.fetchone():
+        cur.execute("""
+            DELETE FROM fetch_queue f USING fetch_queue g
+            WHERE f.stage = g.stage AND f.item_key = g.item_key
+              AND (f.attempts, f.updated_at, f.endpoint) < (g.attempts, g.updated_at, g.endpoint)
+        """)
+        cur.execute("ALTER TABLE fetch_queue DROP CONSTRAINT fetch_queue_pkey, ADD PRIMARY KEY (stage, item_key)")
+
+
+def next_delay(attempts, retry_after=None):
+    """Seconds until the next attempt after `attempts` failures."""
+    delay = random.uniform(0.5, 1.0) * min(QUEUE_MAX_DELAY, QUEUE_BASE_DELAY * 2 ** (attempts - 1))
+    return max(delay, retry_after or 0)
+
+
+def enqueue(cur, stage, key, err, context=None):
+    """Record (or re-record) an item whose fetch raised FetchFailed `err`. Returns the attempt count."""
+    endpoint = metrics.endpoint_label(err.path)
+    cur.execute("SELECT attempts FROM fetch_queue WHERE stage=%s AND item_key=%s", (stage, str(key)))
+    row = cur.fetchone()
+    attempts = (row[0] if row else 0) + 1
+    delay = next_delay(attempts, err.retry_after)
+    cur.execute("""
+        INSERT INTO fetch_queue (stage, endpoint, item_key, path, context, status, attempts,
+                                 last_status, last_error, next_attempt_at)
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s, CURRENT_TIMESTAMP + make_interval(secs => %s))
+        ON CONFLICT (stage, item_key) DO UPDATE SET
+            endpoint = EXCLUDED.endpoint, path = EXCLUDED.path, context = EXCLUDED.context, status = EXCLUDED.status,
+            attempts = EXCLUDED.attempts, last_status = EXCLUDED.last_status,
+            last_error = EXCLUDED.last_error, next_attempt_at = EXCLUDED.next_attempt_at,
+            updated_at = CURRENT_TIMESTAMP
+    """, (stage, endpoint, str(key), err.path,
+          json.dumps(context) if context is not None else None,
+          "dead" if attempts >= MAX_ATTEMPTS else "pending",
+          attempts, err.status, str(err)[:2000], delay))
+    metrics.inc("cricbuzz_ingest_deferred_total", stage=stage, endpoint=endpoint)
+    return attempts
+
+
+def resolve(cur, stage, key):
+    cur.execute("DELETE FROM fetch_queue WHERE stage=%s AND item_key=%s", (stage, str(key)))
+
+
+def due(cur, stage):
+    cur.execute("""
+        SELECT item_key, context FROM fetch_queue
+        WHERE stage=%s AND status='pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY next_attempt_at
+    """, (stage,))
+    return cur.fetchall()
+
+
+def parked(cur, stage):
+    """Item keys the normal pass leaves alone: waiting out their backoff, or dead."""
+    cur.execute("""
+        SELECT item_key FROM fetch_queue
+        WHERE stage=%s AND (status='dead' OR next_attempt_at > CURRENT_TIMESTAMP)
+    """, (stage,))
+    return {r[0] for r in cur.fetchall()}
+
+
+def drain(ctx, handler):
+    """
+    Retry the due items of ctx.stage via handler(ctx, cur, key, context) -> rows.
+    Each item is committed on its own; items whose fetch fails again are pushed back,
+    any other error fails the stage as it would on a normal run.
+    """
+    rows = 0
+    with ctx.conn.cursor() as cur:
+        items = due(cur, ctx.stage)
+        if not items:
+            return 0
+        print(f"🔁 {ctx.stage}: draining {len(items)} queued item(s)")
+        for key, context in items:
+            try:
+                rows += handler(ctx, cur, key, context) or 0
+            except FetchFailed as e:
+                ctx.defer(key, e, context)
+                continue
+            resolve(cur, ctx.stage, key)
+            ctx.mark_done(key)
+    return rows
+
+
+def stats(cur):
+    cur.execute("""
+        SELECT stage, endpoint, status, COUNT(*), MAX(attempts),
+               MIN(next_attempt_at) FILTER (WHERE status = 'pending')
+        FROM fetch_queue GROUP BY stage, endpoint, status ORDER BY stage, endpoint, status
+    """)
+    return cur.fetchall()
@@ -0,0 +1,308 @@
+# ===========================================================
+#        Ball_by_ball Table (live follower, incremental)
+# ===========================================================
+#
+# Follows every match in progress through the commentary endpoint instead of
+# re-downloading full scorecards:
+#
+#   /matches/v1/live              which matches are in progress (shared listing)
+#   /mcenter/v1/{id}/comm         the latest deliveries + the miniscore, once per poll
+#   /mcenter/v1/{id}/hcomm        older pages, only to close a gap
+#
+# Each poll appends the deliveries after the last ball stored for that innings
+# to ball_by_ball and applies the miniscore to the live rows: match_innings
+# totals, the two batters' and two bowlers' lines in batting_scorecard /
+# bowling_scorecard, and the final line of the batter named in lastWicket.
+# Other batters who left the crease (a second wicket between polls, retired
+# hurt) keep their last live line until the full scorecard replaces it.
+#
+# When the latest page no longer reaches back to the last stored ball (first
+# poll of a match, or the follower was stopped), older pages are read until it
+# does; on the first poll the earlier innings are read back from their end too.
+# Either way at most GAP_PAGES pages per innings, so a match picked up late can
+# miss the start of a long innings.
+#
+# The API has no "since ball N" parameter, so a poll is one comm request and
+# the follower keeps only what it has not stored yet. A match is polled every
+# LIVE_POLL_SECONDS while balls arrive (about four requests per over at the
+# default) and backs off to LIVE_IDLE_POLL_SECONDS through breaks and delays.
+# Finished matches drop out; the scorecards stage then replaces their live
+# rows with the full /scard (fielding included).
+#
+#   python -m ingest.live_follower                    # follow until stopped
+#   python -m ingest.live_follower --once             # one poll per live match
+#   python -m ingest.live_follower --match 12345 --once
+
+import argparse
+import heapq
+import os
+import time
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+
+import db
+from ingest import partitions, scorecards
+from ingest.common import api_get, match_list, FetchFailed, LISTING_TTL
+from models import parse_commentary
+
+POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "60"))
+IDLE_POLL_SECONDS = float(os.getenv("LIVE_IDLE_POLL_SECONDS", "300"))
+GAP_PAGES = int(os.getenv("LIVE_GAP_PAGES", "10"))
+
+NOT_STARTED = ("preview", "upcoming", "complete")
+
+# ---------------- Tables ----------------
+# partitioned by year on match_date like the scorecard tables (see ingest/partitions.py)
+def create_ball_by_ball(cur, name="ball_by_ball"):
+    cur.execute(f"""CREATE TABLE IF NOT EXISTS {name} (
+        match_id BIGINT, innings_id SMALLINT, ball_nbr SMALLINT,
+        over_ball NUMERIC(4,1),
+        batter_id BIGINT, bowler_id BIGINT,
+        batter TEXT, bowler TEXT,
+        runs SMALLINT, extras SMALLINT, extra_type TEXT, wicket BOOLEAN,
+        bowled_at TIMESTAMP,
+        match_date DATE NOT NULL,
+        PRIMARY KEY (match_id, innings_id, ball_nbr, match_date)
+    ) PARTITION BY RANGE (match_date);""")
+
+def ensure_tables(cur):
+    partitions.require(cur, "ball_by_ball")
+    create_ball_by_ball(cur)
+    scorecards.ensure_tables(cur)
+
+def last_balls(cur, match_id):
+    cur.execute("SELECT innings_id, MAX(ball_nbr) FROM ball_by_ball WHERE match_id = %s GROUP BY innings_id",
+                (match_id,))
+    return dict(cur.fetchall())
+
+# ---------------- API ----------------
+class Follow:
+    """One live match: the last stored ball per innings and its poll interval."""
+
+    def __init__(self, match, last):
+        self.match = match
+        self.last = last                # innings_id -> last ball_nbr in ball_by_ball
+        self.interval = POLL_SECONDS
+        self.caught_up = False          # earlier innings read back (first poll)
+
+def _oldest(deliveries):
+    return min((d.timestamp_ms for d in deliveries if d.timestamp_ms), default=None)
+
+def page_back(follow, inn, first, tms, new):
+    """
+    hcomm pages of innings `inn` from before `tms` into `new`, until they reach the
+    ball after the last stored one (or GAP_PAGES); returns the API calls made.
+    """
+    have, calls = follow.last.get(inn, 0), 0
+    while first > have + 1 and tms and calls < GAP_PAGES:
+        page, _ = parse_commentary(api_get(f"/mcenter/v1/{follow.match.match_id}/hcomm",
+                                           {"iid": inn, "tms": tms}, timeout=15) or {}, follow.match)
+        calls += 1
+        page = [d for d in page if d.innings_id == inn and have < d.ball_nbr < first]
+        if not page:
+            break
+        new.update(((d.innings_id, d.ball_nbr), d) for d in page)
+        first, tms = min(d.ball_nbr for d in page), _oldest(page)
+    return calls
+
+def fetch_new(follow):
+    """(deliveries not stored yet, LiveState, API calls made)."""
+    mid = follow.match.match_id
+    deliveries, live = parse_commentary(api_get(f"/mcenter/v1/{mid}/comm", timeout=15) or {}, follow.match)
+    new = {(d.innings_id, d.ball_nbr): d for d in deliveries
+           if d.ball_nbr > follow.last.get(d.innings_id, 0)}
+    calls = 1
+
+    # the page covers the last over or two: page back through hcomm to the last stored ball
+    for inn in sorted({i for i, _ in new}):
+        first = min(b for i, b in new if i == inn)
+        calls += page_back(follow, inn, first, _oldest([d for d in deliveries if d.innings_id == inn]), new)
+
+    # first poll: innings that ended before the page starts are read back from their end
+    if not follow.caught_up:
+        current = min((d.innings_id for d in deliveries), default=live.innings_id) or 0
+        for inns in live.innings:
+            if inns.innings_id < current:
+                calls += page_back(follow, inns.innings_id, float("inf"), _oldest(deliveries), new)
+    return [new[k] for k in sorted(new)], live, calls
+
+# ---------------- Upserts ----------------
+def _resolve(name, players):
+    """Commentary short name ("Rohit", "de Kock") -> id of the one player whose full name has all its words."""
+    words = name.lower().split()
+    if not words:
+        return None
+    ids = {pid for pid, full in players if set(words) <= set((full or "").lower().split())}
+    return ids.pop() if len(ids) == 1 else None
+
+def apply_live(cur, match_id, live, match_date):
+    """Innings totals, the current batters' / bowlers' lines and the last dismissal from the miniscore."""
+    for inns in live.innings:
+        scorecards.upsert_innings(cur, match_id, inns.number, inns.innings_id, inns.bat_team_id, inns.bat_team,
+                                  inns.bowl_team_id, inns.bowl_team, inns.runs, inns.wickets, inns.overs)
+    current = next((i for i in live.innings if i.innings_id == live.innings_id), None)
+    if current is None:
+        return
+    iid = current.innings_id
+    cur.execute("""SELECT player_id, player_name, batting_position, dismissal
+                   FROM batting_scorecard WHERE match_id = %s AND innings_id = %s""", (match_id, iid))
+    rows = cur.fetchall()
+    positions = {pid: pos for pid, _, pos, _ in rows}
+    for b in live.batting:
+        if b.player_id not in positions:
+            positions[b.player_id] = max(positions.values(), default=0) + 1
+        scorecards.upsert_batting(cur, match_id, iid, current.bat_team, positions[b.player_id], b, match_date)
+    for bowler in live.bowling:
+        scorecards.upsert_bowling(cur, match_id, iid, current.bowl_team, bowler, match_date)
+
+    # lastWicket: the final line of the latest dismissal; nobody else is marked out
+    w = live.last_wicket
+    if w is None:
+        return
+    at_crease = {b.player_id for b in live.batting}
+    for pid, name, _, dismissal in rows:
+        if name == w.name and pid not in at_crease and dismissal != w.dismissal:
+            cur.execute("""UPDATE batting_scorecard SET runs = %s, balls_faced = %s, dismissal = %s,
+                               is_not_out = FALSE
+                           WHERE match_id = %s AND innings_id = %s AND player_id = %s""",
+                        (w.runs, w.balls, w.dismissal, match_id, iid, pid))
+
+def insert_deliveries(cur, match_id, deliveries, match_date):
+    innings = sorted({d.innings_id for d in deliveries})
+    cur.execute("SELECT innings_id, player_id, player_name FROM batting_scorecard WHERE match_id = %s "
+                "AND innings_id = ANY(%s)", (match_id, innings))
+    batters = cur.fetchall()
+    cur.execute("SELECT innings_id, player_id, player_name FROM bowling_scorecard WHERE match_id = %s "
+                "AND innings_id = ANY(%s)", (match_id, innings))
+    bowlers = cur.fetchall()
+
+    rows = []
+    for d in deliveries:
+        bat = [(pid, n) for i, pid, n in batters if i == d.innings_id]
+        bowl = [(pid, n) for i, pid, n in bowlers if i == d.innings_id]
+        rows.append((
+            match_id, d.innings_id, d.ball_nbr, d.over,
+            (d.batting.player_id if d.batting else None) or _resolve(d.batter, bat),
+            (d.bowling.player_id if d.bowling else None) or _resolve(d.bowler, bowl),
+            d.batter or None, d.bowler or None,
+            d.runs, d.extras, d.extra_type, d.wicket,
+            datetime.fromtimestamp(d.timestamp_ms / 1000) if d.timestamp_ms else None,
+            match_date,
+        ))
+    execute_values(cur, """
+        INSERT INTO ball_by_ball (
+            match_id, innings_id, ball_nbr, over_ball, batter_id, bowler_id, batter, bowler,
+            runs, extras, extra_type, wicket, bowled_at, match_date
+        ) VALUES %s
+        ON CONFLICT DO NOTHING
+    """, rows)
+
+# ---------------- Follower ----------------
+def poll(conn, follow):
+    """One comm request (plus gap pages) applied in one transaction; True once the match is over."""
+    match = follow.match
+    mid = match.match_id
+    try:
+        deliveries, live, calls = fetch_new(follow)
+    except FetchFailed as e:
+        follow.interval = min(follow.interval * 2, IDLE_POLL_SECONDS)
+        print(f"⚠️ {mid}: {e} — next poll in {follow.interval:.0f}s")
+        return False
+
+    try:
+        with conn.cursor() as cur:
+            match_date = partitions.match_date(cur, mid, match)
+            for table in ("ball_by_ball", "batting_scorecard", "bowling_scorecard"):
+                partitions.ensure_for(cur, table, match_date)
+            apply_live(cur, mid, live, match_date)
+            if deliveries:
+                insert_deliveries(cur, mid, deliveries, match_date)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        follow.interval = min(follow.interval * 2, IDLE_POLL_SECONDS)
+        print(f"❌ {mid}: {e}")
+        return False
+
+    for d in deliveries:
+        follow.last[d.innings_id] = max(follow.last.get(d.innings_id, 0), d.ball_nbr)
+    follow.caught_up = True
+    follow.interval = POLL_SECONDS if deliveries else min(follow.interval * 2, IDLE_POLL_SECONDS)
+    score = next((f"{i.bat_team} {i.runs}/{i.wickets} ({i.overs:g})" for i in live.innings
+                  if i.innings_id == live.innings_id), live.state or "no score")
+    print(f"🏏 {match.team1.short_name or match.team1.name} v {match.team2.short_name or match.team2.name}: "
+          f"+{len(deliveries)} balls, {calls} call(s) — {score}")
+    return live.complete
+
+def live_now(only=None):
+    """{match_id: Match} in progress on the live listing (optionally only the ids in `only`)."""
+    return {m.match_id: m for s in match_list("live") for m in s.matches
+            if m.state.lower() not in NOT_STARTED and (not only or m.match_id in only)}
+
+def follow(conn, only=None, once=False):
+    follows, due = {}, []               # match_id -> Follow, heap of (next poll, match_id)
+    listed, next_listing = {}, 0.0
+    while True:
+        now = time.monotonic()
+        if now >= next_listing:
+            try:
+                listed = live_now(only)
+            except FetchFailed as e:
+                print(f"⚠️ live listing: {e}")
+            next_listing = now + LISTING_TTL
+            for mid, match in listed.items():
+                if mid in follows:
+                    follows[mid].match = match
+                    continue
+                with conn.cursor() as cur:
+                    follows[mid] = Follow(match, last_balls(cur, mid))
+                conn.commit()
+                heapq.heappush(due, (now, mid))
+                print(f"👀 following {match.desc} {match.team1.name} v {match.team2.name} ({mid})")
+
+        if once:
+            for f in follows.values():
+                poll(conn, f)
+            return len(follows)
+        if not due:
+            time.sleep(max(0.0, next_listing - now))
+            continue
+
+        at, mid = due[0]
+        if at > now:
+            time.sleep(min(at, next_listing) - now)
+            continue
+        heapq.heappop(due)
+        # off the listing: one last poll for the closing balls, then stop following
+        if poll(conn, follows[mid]) or mid not in listed:
+            print(f"🏁 {mid}: no longer live")
+            del follows[mid]
+        else:
+            heapq.heappush(due, (time.monotonic() + follows[mid].interval, mid))
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m ingest.live_follower",
+                                description="Ball-by-ball follower for matches in progress")
+    p.add_argument("--match", type=int, nargs="+", help="only these match ids")
+    p.add_argument("--once", action="store_true", help="poll every live match once and exit")
+    args = p.parse_args(argv)
+
+    conn = db.connect()
+    try:
+        with conn.cursor() as cur:
+            ensure_tables(cur)
+        conn.commit()
+        n = follow(conn, set(args.match or ()), args.once)
+        if args.once:
+            print(f"✅ polled {n} live match(es)")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,289 @@
+# ===========================================================
+#                 Player_master_stats Table
+# ===========================================================
+import os
+import re
+import time
+from urllib.parse import quote
+from datetime import datetime, timezone
+
+from ingest.career_stats import STAT_COLUMNS
+from ingest.common import api_get, FetchFailed
+
+TABLES = ["player_master_stats"]
+
+# api: /stats/v1/player/{id}/... per player; local: copy player_career_stats (career_stats.py)
+SOURCE = os.getenv("MASTER_STATS_SOURCE", "api")
+
+# ---------------- DB Setup ----------------
+def ensure_tables(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS player_master_stats (
+            player_id BIGINT,
+            format TEXT,
+            player_name TEXT NOT NULL,
+            team_name TEXT,
+            role TEXT,
+            batting_style TEXT,
+            bowling_style TEXT,
+            matches INT,
+            innings INT,
+            runs INT,
+            balls_faced INT,
+            hundreds INT,
+            fifties INT,
+            highest_score INT,
+            batting_average DECIMAL(6,2),
+            strike_rate DECIMAL(6,2),
+            not_outs INT,
+            ducks INT,
+            wickets INT,
+            balls_bowled INT,
+            runs_conceded INT,
+            bowling_average DECIMAL(6,2),
+            economy_rate DECIMAL(6,2),
+            four_wicket_hauls INT,
+            five_wicket_hauls INT,
+            ten_wicket_hauls INT,
+            best_bowling_innings TEXT,
+            best_bowling_match TEXT,
+            catches INT,
+            stumpings INT,
+            icc_bat_best_rank INT,
+            icc_bowl_best_rank INT,
+            icc_allround_best_rank INT,
+            created_at TIMESTAMP,
+            PRIMARY KEY (player_id, format)
+        )
+    """)
+
+def save_to_db(cur, record):
+    sql = """
+        INSERT INTO player_master_stats (
+            player_id, format, player_name, team_name, role,
+            batting_style, bowling_style,
+            matches, innings, runs, balls_faced,
+            hundreds, fifties, highest_score, batting_average, strike_rate,
+            not_outs, ducks,
+            wickets, balls_bowled, runs_conceded, bowling_average, economy_rate,
+            four_wicket_hauls, five_wicket_hauls, ten_wicket_hauls,
+            best_bowling_innings, best_bowling_match,
+            catches, stumpings,
+            icc_bat_best_rank, icc_bowl_best_rank, icc_allround_best_rank,
+            created_at
+        )
+        VALUES (%s,%s,%s,%s,%s,%s,%s,
+                %s,%s,%s,%s,
+                %s,%s,%s,%s,%s,
+                %s,%s,
+                %s,%s,%s,%s,%s,
+                %s,%s,%s,
+                %s,%s,
+                %s,%s,
+                %s,%s,%s,
+                %s)
+        ON CONFLICT (player_id, format) DO UPDATE SET
+            matches=EXCLUDED.matches,
+            innings=EXCLUDED.innings,
+            runs=EXCLUDED.runs,
+            balls_faced=EXCLUDED.balls_faced,
+            hundreds=EXCLUDED.hundreds,
+            fifties=EXCLUDED.fifties,
+            highest_score=EXCLUDED.highest_score,
+            batting_average=EXCLUDED.batting_average,
+            strike_rate=EXCLUDED.strike_rate,
+            not_outs=EXCLUDED.not_outs,
+            ducks=EXCLUDED.ducks,
+            wickets=EXCLUDED.wickets,
+            balls_bowled=EXCLUDED.balls_bowled,
+            runs_conceded=EXCLUDED.runs_conceded,
+            bowling_average=EXCLUDED.bowling_average,
+            economy_rate=EXCLUDED.economy_rate,
+            four_wicket_hauls=EXCLUDED.four_wicket_hauls,
+            five_wicket_hauls=EXCLUDED.five_wicket_hauls,
+            ten_wicket_hauls=EXCLUDED.ten_wicket_hauls,
+            best_bowling_innings=EXCLUDED.best_bowling_innings,
+            best_bowling_match=EXCLUDED.best_bowling_match,
+            catches=EXCLUDED.catches,
+            stumpings=EXCLUDED.stumpings,
+            icc_bat_best_rank=EXCLUDED.icc_bat_best_rank,
+            icc_bowl_best_rank=EXCLUDED.icc_bowl_best_rank,
+            icc_allround_best_rank=EXCLUDED.icc_allround_best_rank,
+            created_at=EXCLUDED.created_at;
+    """
+    cur.execute(sql, record)
+
+# ---------------- API Helpers ----------------
+def search_player(query):
+    data = api_get(f"/stats/v1/player/search?plrN={quote(query)}")
+    return data.get("player", [])[0] if data and data.get("player") else None
+
+def get_player_profile(pid):
+    return api_get(f"/stats/v1/player/{pid}") or {}
+
+def get_stats(pid, stat_type):
+    return api_get(f"/stats/v1/player/{pid}/{stat_type}") or {}
+
+def extract_stats_table(stats_json):
+    if not stats_json or "headers" not in stats_json or "values" not in stats_json:
+        return {}
+    headers = stats_json["headers"][1:]
+    stats = {}
+    for row in stats_json["values"]:
+        row_vals = row["values"]
+        rowheader = row_vals[0].strip()
+        for i, fmt in enumerate(headers, start=1):
+            stats.setdefault(fmt, {})[rowheader] = row_vals[i]
+    return stats
+
+# ---------------- Normalizers ----------------
+def to_int(v):
+    try:
+        return int(re.sub(r"[^0-9]", "", str(v))) if v else 0
+    except:
+        return 0
+
+def to_float(v):
+    try:
+        return float(str(v).replace("-", "0")) if v else 0.0
+    except:
+        return 0.0
+
+# ---------------- Mapping ----------------
+def map_stats(bat, bowl, fld, fmt):
+    """Map raw Cricbuzz stats → DB columns"""
+    b = bat.get(fmt, {})
+    bw = bowl.get(fmt, {})
+    f = fld.get(fmt, {})
+
+    return {
+        "matches": to_int(b.get("Matches")),
+        "innings": to_int(b.get("Innings")),
+        "runs": to_int(b.get("Runs")),
+        "balls_faced": to_int(b.get("Balls") or b.get("BF")),
+        "hundreds": to_int(b.get("100s")),
+        "fifties": to_int(b.get("50s")),
+        "highest_score": to_int(b.get("Highest") or 0),
+        "batting_average": to_float(b.get("Average")),
+        "strike_rate": to_float(b.get("SR")),
+        "not_outs": to_int(b.get("Not Out") or b.get("NO")),
+        "ducks": to_int(b.get("Ducks") or b.get("0")),
+        "wickets": to_int(bw.get("Wickets") or bw.get("Wkts")),
+        "balls_bowled": to_int(bw.get("Balls")),
+        "runs_conceded": to_int(bw.get("Runs")),
+        "bowling_average": to_float(bw.get("Average") or bw.get("Avg")),
+        "economy_rate": to_float(bw.get("Eco") or bw.get("Econ")),
+        "four_wicket_hauls": to_int(bw.get("4w")),
+        "five_wicket_hauls": to_int(bw.get("5w")),
+        "ten_wicket_hauls": to_int(bw.get("10w")),
+        "best_bowling_innings": bw.get("BBI",""),
+        "best_bowling_match": bw.get("BBM",""),
+        "catches": to_int(f.get("Ct") or f.get("Catches")),
+        "stumpings": to_int(f.get("St") or f.get("Stumpings"))
+    }
+
+def load_player(cur, name):
+    """Search `name` and upsert one row per format they played; returns rows saved."""
+    saved = 0
+    player = search_player(name)
+    if not player:
+        print(f"❌ Not found: {name}")
+        return 0
+
+    pid = int(player["id"])
+    pname = player["name"]
+    team = player.get("teamName","Unknown")
+
+    profile = get_player_profile(pid)
+    role = profile.get("role","Unknown")
+    bat_style = profile.get("bat","Unknown")
+    bowl_style = profile.get("bowl","Unknown")
+
+    rankings = profile.get("rankings", {})
+    icc_bat_best = rankings.get("bat", {}).get("testBestRank") or rankings.get("bat", {}).get("odiBestRank")
+    icc_bowl_best = rankings.get("bowl", {}).get("testBestRank") or rankings.get("bowl", {}).get("odiBestRank")
+    icc_all_best = rankings.get("all", {}).get("testBestRank") or rankings.get("all", {}).get("odiBestRank")
+
+    bat = extract_stats_table(get_stats(pid, "batting"))
+    bowl = extract_stats_table(get_stats(pid, "bowling"))
+    fld = extract_stats_table(get_stats(pid, "fielding"))
+
+    # Merge T20 → T20I
+    for ds in (bat,bowl,fld):
+        if "T20" in ds:
+            ds.setdefault("T20I", {}).update(ds.pop("T20"))
+
+    for fmt in ["Test","ODI","T20I","IPL"]:
+        if fmt in bat or fmt in bowl or fmt in fld:
+            stats = map_stats(bat,bowl,fld,fmt)
+
+            record = [
+                pid, fmt, pname, team, role, bat_style, bowl_style,
+                stats["matches"], stats["innings"], stats["runs"], stats["balls_faced"],
+                stats["hundreds"], stats["fifties"], stats["highest_score"], stats["batting_average"], stats["strike_rate"],
+                stats["not_outs"], stats["ducks"],
+                stats["wickets"], stats["balls_bowled"], stats["runs_conceded"], stats["bowling_average"], stats["economy_rate"],
+                stats["four_wicket_hauls"], stats["five_wicket_hauls"], stats["ten_wicket_hauls"],
+                stats["best_bowling_innings"], stats["best_bowling_match"],
+                stats["catches"], stats["stumpings"],
+                icc_bat_best, icc_bowl_best, icc_all_best,
+                datetime.now(timezone.utc)
+            ]
+
+            save_to_db(cur, record)
+            saved += 1
+            print(f"✅ Saved {pname} {fmt}")
+    return saved
+
+# ---------------- Local source ----------------
+def copy_local(cur):
+    """Upsert every player_career_stats row (derived from our scorecards); ICC ranks are kept."""
+    columns = ", ".join(STAT_COLUMNS)
+    cur.execute(f"""
+        INSERT INTO player_master_stats (
+            player_id, format, player_name, team_name, role, batting_style, bowling_style,
+            {columns}, created_at
+        )
+        SELECT player_id, format, player_name, team_name, role, batting_style, bowling_style,
+               {columns}, CURRENT_TIMESTAMP
+        FROM player_career_stats
+        ON CONFLICT (player_id, format) DO UPDATE SET
+            {", ".join(f"{c}=EXCLUDED.{c}" for c in STAT_COLUMNS)},
+            created_at=EXCLUDED.created_at
+    """)
+    print(f"✅ Copied {cur.rowcount} derived career rows into player_master_stats")
+    return cur.rowcount
+
+# ---------------- STAGE ----------------
+def drain_item(ctx, cur, name, context):
+    return load_player(cur, name)
+
+def run(ctx):
+    if SOURCE == "local":
+        with ctx.conn.cursor() as cur:
+            return copy_local(cur)
+
+    players_list = ["Sachin Tendulkar","Jacques Kallis","Rahul Dravid","Brian Lara","Ricky Ponting",
+        "Virat Kohli","Kumar Sangakkara","Joe Root","Steven Smith","Kane Williamson",
+        "AB de Villiers","Mahela Jayawardene","Chris Gayle","Rohit Sharma","Jos Buttler",
+        "Suryakumar Yadav","Yashasvi Jaiswal","Travis Head","David Warner","Babar Azam",
+        "Adam Gilchrist","Muttiah Muralitharan","Shane Warne","Wasim Akram","Glenn McGrath",
+        "MS Dhoni","Allan Border","Inzamam-ul-Haq","Saeed Anwar","Anil Kumble",
+        "Rashid Khan","Jacques Rudolph","Michael Clarke","Kevin Pietersen","Javed Miandad",
+        "Ben Stokes","Shahid Afridi","Lasith Malinga","Dwayne Bravo","Imran Khan"]
+
+    cur = ctx.conn.cursor()
+    saved = 0
+    for name in players_list:
+        if ctx.is_done(name):
+            continue
+        try:
+            saved += load_player(cur, name)
+        except FetchFailed as e:
+            ctx.defer(name, e)
+            continue
+        ctx.mark_done(name)
+        time.sleep(1.5)
+
+    cur.close()
+    return saved
@@ -0,0 +1,405 @@
+# ===========================================================
+#       Yearly range partitions (matches + scorecard tables)
+# ===========================================================
+#
+#   python -m ingest.partitions list                    # partitions + row estimates
+#   python -m ingest.partitions migrate                 # move unpartitioned tables over, online
+#   python -m ingest.partitions archive --before 2024   # detach old seasons into the archive schema
+#
+# matches is partitioned on start_date; the scorecard tables, partnerships and
+# ball_by_ball carry a denormalized match_date (= matches.start_date::date) and are
+# partitioned on it, one partition per calendar year (<table>_y2025). A date
+# filter on start_date / match_date therefore only touches the seasons it
+# covers. The pipeline creates this year's and FUTURE_YEARS upcoming
+# partitions before every run; rows for other years create theirs on demand.
+# When a match is rescheduled, series_matches moves its rows to the new date.
+#
+# migrate copies a live, unpartitioned table into its partitioned twin in
+# BATCH_ROWS batches while a trigger mirrors concurrent writes, then swaps the
+# names under a short ACCESS EXCLUSIVE lock. The old table is kept as
+# <table>_legacy until dropped by hand. Legacy partnerships may repeat a
+# (match, innings, wicket); the copy keeps the latest row of each (NATURAL_KEYS).
+
+import argparse
+import os
+from datetime import date
+
+import db
+
+FIRST_YEAR = int(os.getenv("INGEST_PARTITION_FIRST_YEAR", "2024"))
+FUTURE_YEARS = int(os.getenv("INGEST_PARTITION_FUTURE_YEARS", "1"))
+BATCH_ROWS = int(os.getenv("INGEST_PARTITION_BATCH_ROWS", "5000"))
+ARCHIVE_SCHEMA = "archive"
+
+# table -> (partition key, row key)
+PARTITIONED = {
+    "matches":            ("start_date", ("match_id",)),
+    "batting_scorecard":  ("match_date", ("match_id", "innings_id", "player_id")),
+    "bowling_scorecard":  ("match_date", ("match_id", "innings_id", "player_id")),
+    "fielding_scorecard": ("match_date", ("match_id", "innings_id", "player_id")),
+    "partnerships":       ("match_date", ("id",)),
+    "ball_by_ball":       ("match_date", ("match_id", "innings_id", "ball_nbr")),
+}
+
+# tables whose partitioned layout is unique on more than the row key: the old
+# partnerships loader inserted plainly, so legacy rows can repeat a (match, innings,
+# wicket). migrate keeps the row with the highest id of each.
+NATURAL_KEYS = {
+    "partnerships": ("match_id", "innings_number", "wicket_number"),
+}
+
+_known = set()      # (table, year) partitions known to be committed
+
+
+# ---------------- Partitions ----------------
+def partition_name(table, year):
+    return f"{table}_y{year}"
+
+
+def is_partitioned(cur, table):
+    cur.execute("""
+        SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid
+                       WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace)
+    """, (table,))
+    return cur.fetchone()[0]
+
+
+def require(cur, table):
+    """Stop early when `table` still has the pre-partitioning layout."""
+    cur.execute("SELECT to_regclass(%s)", (table,))
+    if cur.fetchone()[0] is not None and not is_partitioned(cur, table):
+        raise RuntimeError(f"{table} is not partitioned yet: run `python -m ingest.partitions migrate`")
+
+
+def create_year(cur, table, year, parent=None):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {partition_name(table, year)} PARTITION OF {parent or table}
+        FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+    """)
+
+
+def ensure_for(cur, table, d):
+    """Make sure the partition holding date `d` exists (called before writing a row)."""
+    year = d.year
+    if (table, year) in _known:
+        return
+    # not cached: a rollback of the caller's transaction would also drop the partition
+    cur.execute("SELECT to_regclass(%s)", (partition_name(table, year),))
+    if cur.fetchone()[0] is None:
+        create_year(cur, table, year)
+        print(f"🗂 created partition {partition_name(table, year)}")
+
+
+def ensure_future(cur, tables=None):
+    """FIRST_YEAR .. this year + FUTURE_YEARS for every partitioned table (the caller commits)."""
+    last = date.today().year + FUTURE_YEARS
+    for table in tables or PARTITIONED:
+        cur.execute("SELECT to_regclass(%s)", (table,))
+        if cur.fetchone()[0] is None or not is_partitioned(cur, table):
+            continue
+        for year in range(FIRST_YEAR, last + 1):
+            cur.execute("SELECT to_regclass(%s)", (f"{ARCHIVE_SCHEMA}.{partition_name(table, year)}",))
+            if cur.fetchone()[0] is not None:
+                continue                        # season was archived on purpose
+            create_year(cur, table, year)       # IF NOT EXISTS: also recreates after --rebuild
+            _known.add((table, year))
+
+
+def match_date(cur, match_id, match=None):
+    """Denormalized match date for scorecard rows: the parsed match, else matches, else today."""
+    if match is not None and match.start_date:
+        return match.start_date
+    cur.execute("SELECT start_date::date FROM matches WHERE match_id = %s", (match_id,))
+    row = cur.fetchone()
+    return row[0] if row else date.today()
+
+
+def move_match(cur, match_id, d):
+    """
+    Re-file a rescheduled match's rows under its new date `d` (series_matches calls
+    this when start_date changes); Postgres moves updated rows to the right partition.
+    """
+    moved = 0
+    for table, (key, _) in PARTITIONED.items():
+        if key != "match_date":
+            continue
+        cur.execute("SELECT to_regclass(%s)", (table,))
+        if cur.fetchone()[0] is None:
+            continue
+        cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE match_id = %s AND match_date <> %s)",
+                    (match_id, d))
+        if not cur.fetchone()[0]:
+            continue
+        ensure_for(cur, table, d)
+        cur.execute(f"UPDATE {table} SET match_date = %s WHERE match_id = %s AND match_date <> %s",
+                    (d, match_id, d))
+        moved += cur.rowcount
+    if moved:
+        print(f"🗂 match {match_id}: {moved} rows moved to {d}")
+    return moved
+
+
+def list_partitions(cur):
+    cur.execute("""
+        SELECT parent.relname, child.relname, pg_get_expr(child.relpartbound, child.oid),
+               GREATEST(child.reltuples, 0)::BIGINT, pg_total_relation_size(child.oid)
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = ANY(%s) AND parent.relnamespace = 'public'::regnamespace
+        ORDER BY parent.relname, child.relname
+    """, (list(PARTITIONED),))
+    return cur.fetchall()
+
+
+# ---------------- Online migration ----------------
+def _columns(cur, table):
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s ORDER BY ordinal_position
+    """, (table,))
+    return [r[0] for r in cur.fetchall()]
+
+
+def _date_expr(table, row):
+    key, _ = PARTITIONED[table]
+    if key == "start_date":
+        return None
+    # scorecard rows take their match's date; unknown matches land in this year's partition
+    return (f"COALESCE((SELECT m.start_date::date FROM matches m WHERE m.match_id = {row}.match_id),"
+            f" CURRENT_DATE)")
+
+
+def _upsert_latest(table, new, cols):
+    """ON CONFLICT clause of the natural key: the row with the higher row key wins."""
+    key, pk = PARTITIONED[table]
+    latest = f"({', '.join(f'{new}.{c}' for c in pk)}) < ({', '.join(f'EXCLUDED.{c}' for c in pk)})"
+    overwrite = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in NATURAL_KEYS[table])
+    return (f"ON CONFLICT ({', '.join(NATURAL_KEYS[table] + (key,))}) "
+            f"DO UPDATE SET {overwrite} WHERE {latest}")
+
+
+def _install_mirror(cur, table, new, cols):
+    _, pk = PARTITIONED[table]
+    date_expr = _date_expr(table, "NEW")
+    insert_cols = ", ".join(cols + (["match_date"] if date_expr else []))
+    insert_vals = ", ".join([f"NEW.{c}" for c in cols] + ([date_expr] if date_expr else []))
+    match_old = " AND ".join(f"{c} = OLD.{c}" for c in pk)
+    refile = ""
+    if table in NATURAL_KEYS:
+        # a later duplicate of the same natural key wins, and deleting the kept row
+        # brings back the latest one still in the old table
+        natural = NATURAL_KEYS[table]
+        on_conflict = _upsert_latest(table, new, cols)
+        order = ", ".join(f"o.{c} DESC" for c in pk)
+        refile = f"""
+                INSERT INTO {new} ({insert_cols})
+                SELECT {", ".join([f"o.{c}" for c in cols] + [_date_expr(table, "o")])} FROM {table} o
+                WHERE {" AND ".join(f"o.{c} = OLD.{c}" for c in natural)}
+                ORDER BY {order} LIMIT 1
+                {on_conflict};"""
+    else:
+        # a copy batch may insert the same row concurrently: the live write wins
+        conflict = ", ".join(pk + (PARTITIONED[table][0],))
+        overwrite = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c not in pk)
+        on_conflict = f"ON CONFLICT ({conflict}) DO UPDATE SET {overwrite}"
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION {table}_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {new} WHERE {match_old};{refile}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {new} ({insert_cols}) VALUES ({insert_vals})
+                {on_conflict};
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql;
+        DROP TRIGGER IF EXISTS {table}_mirror ON {table};
+        CREATE TRIGGER {table}_mirror AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_mirror();
+    """)
+
+
+def migrate(conn, table, ddl, batch_rows=BATCH_ROWS):
+    """
+    Move unpartitioned `table` into the partitioned layout created by `ddl(cur, name)`
+    without blocking writers: mirror trigger, batched copy in key order, reconcile,
+    then swap names under a lock_timeout-bounded ACCESS EXCLUSIVE lock.
+    """
+    key, pk = PARTITIONED[table]
+    new, legacy = f"{table}_part", f"{table}_legacy"
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s)", (table,))
+        if cur.fetchone()[0] is None or is_partitioned(cur, table):
+            print(f"✔ {table}: nothing to migrate")
+            return 0
+        cols = _columns(cur, table)
+        if key == "start_date":
+            cur.execute(f"SELECT MIN(start_date), MAX(start_date) FROM {table}")
+        else:
+            cur.execute(f"""SELECT MIN(m.start_date), MAX(m.start_date) FROM {table} t
+                            JOIN matches m ON m.match_id = t.match_id""")
+        lo, hi = cur.fetchone()
+        first = min(lo.year if lo else FIRST_YEAR, FIRST_YEAR)
+        last = max(hi.year if hi else 0, date.today().year) + FUTURE_YEARS
+
+        # partition children get their final names; only the parent is renamed at the swap
+        ddl(cur, new)
+        for year in range(first, last + 1):
+            create_year(cur, table, year, parent=new)
+        _install_mirror(cur, table, new, cols)
+    conn.commit()
+    print(f"🔁 {table}: mirroring writes into {new}, copying years {first}-{last}")
+
+    # batched copy in primary key order; each batch is its own short transaction
+    date_expr = _date_expr(table, "o")
+    insert_cols = ", ".join(cols + (["match_date"] if date_expr else []))
+    select_cols = ", ".join([f"o.{c}" for c in cols] + ([date_expr] if date_expr else []))
+    key_cols = ", ".join(f"o.{c}" for c in pk)
+    key_desc = ", ".join(f"o.{c} DESC" for c in pk)
+    natural = NATURAL_KEYS.get(table)
+    if natural:
+        # duplicates within a batch collapse to the latest; later batches overwrite earlier ones
+        rows = (f"SELECT DISTINCT ON ({', '.join(f'o.{c}' for c in natural)}) * FROM batch o "
+                f"ORDER BY {', '.join(f'o.{c}' for c in natural)}, {key_desc}")
+        on_conflict = _upsert_latest(table, new, cols)
+    else:
+        rows, on_conflict = "batch", "ON CONFLICT DO NOTHING"
+    copied, last_key = 0, None
+    while True:
+        with conn.cursor() as cur:
+            where = f"WHERE ({key_cols}) > %s" if last_key is not None else ""
+            cur.execute(f"""
+                WITH batch AS (
+                    SELECT * FROM {table} o {where} ORDER BY {key_cols} LIMIT %s
+                ), ins AS (
+                    INSERT INTO {new} ({insert_cols})
+                    SELECT {select_cols} FROM ({rows}) o
+                    {on_conflict}
+                )
+                SELECT {key_cols}, (SELECT COUNT(*) FROM batch) FROM batch o
+                ORDER BY {key_desc} LIMIT 1
+            """, ((tuple(last_key),) if last_key is not None else ()) + (batch_rows,))
+            row = cur.fetchone()
+        conn.commit()
+        if row is None:
+            break
+        last_key, n = row[:-1], row[-1]
+        copied += n
+        print(f"  … {table}: {copied} rows copied")
+
+    with conn.cursor() as cur:
+        # rows deleted from the old table while their batch was in flight
+        match = " AND ".join(f"o.{c} = n.{c}" for c in pk)
+        cur.execute(f"DELETE FROM {new} n WHERE NOT EXISTS (SELECT 1 FROM {table} o WHERE {match})")
+        if natural:
+            # ... which may have been the kept duplicate: re-file the latest survivor
+            same = " AND ".join(f"n.{c} IS NOT DISTINCT FROM o.{c}" for c in natural)
+            cur.execute(f"""
+                INSERT INTO {new} ({insert_cols})
+                SELECT {select_cols} FROM (
+                    SELECT DISTINCT ON ({', '.join(f'o.{c}' for c in natural)}) * FROM {table} o
+                    WHERE NOT EXISTS (SELECT 1 FROM {new} n WHERE {same})
+                    ORDER BY {', '.join(f'o.{c}' for c in natural)}, {key_desc}
+                ) o
+                {on_conflict}
+            """)
+        conn.commit()
+
+        cur.execute("SET LOCAL lock_timeout = '5s'")
+        cur.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        # duplicates of a natural key were folded into one row, so compare distinct keys
+        count = f"COUNT(DISTINCT ({', '.join(natural)}))" if natural else "COUNT(*)"
+        cur.execute(f"SELECT (SELECT {count} FROM {table}), (SELECT {count} FROM {new})")
+        old_rows, new_rows = cur.fetchone()
+        if old_rows != new_rows:
+            conn.rollback()
+            raise RuntimeError(f"{table}: {old_rows} rows vs {new_rows} in {new}; rerun migrate")
+        cur.execute(f"DROP TRIGGER {table}_mirror ON {table}")
+        cur.execute(f"DROP FUNCTION {table}_mirror()")
+        cur.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        cur.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey")
+        cur.execute(f"ALTER TABLE {new} RENAME TO {table}")
+        cur.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {new}_pkey TO {table}_pkey")
+        if "id" in pk:
+            # keep handing out ids above everything the old table used
+            cur.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+            seq = cur.fetchone()[0]
+            if seq:
+                cur.execute(f"SELECT setval(%s, GREATEST((SELECT MAX(id) FROM {table}), 1))", (seq,))
+    conn.commit()
+    print(f"✅ {table}: {copied} rows migrated, old table kept as {legacy}")
+    return copied
+
+
+# ---------------- Archiving ----------------
+def archive(conn, table, before_year):
+    """Detach partitions older than `before_year` and move them to the archive schema."""
+    conn.autocommit = True          # DETACH ... CONCURRENTLY cannot run inside a transaction
+    moved = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+            for parent, child, _, _, _ in list_partitions(cur):
+                year = int(child.rsplit("_y", 1)[1]) if "_y" in child else None
+                if parent != table or year is None or year >= before_year:
+                    continue
+                cur.execute(f"ALTER TABLE {table} DETACH PARTITION {child} CONCURRENTLY")
+                cur.execute(f"ALTER TABLE {child} SET SCHEMA {ARCHIVE_SCHEMA}")
+                _known.discard((table, year))
+                moved.append(child)
+    finally:
+        conn.autocommit = False
+    for child in moved:
+        print(f"📦 {table}: {child} → {ARCHIVE_SCHEMA}.{child}")
+    return moved
+
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    # stage modules own the DDL; imported here to keep ingest.partitions importable from them
+    from ingest import series_matches, scorecards, partnerships, live_follower
+    ddl = {
+        "matches": series_matches.create_matches,
+        "batting_scorecard": scorecards.create_batting,
+        "bowling_scorecard": scorecards.create_bowling,
+        "fielding_scorecard": scorecards.create_fielding,
+        "partnerships": partnerships.create_partnerships,
+        "ball_by_ball": live_follower.create_ball_by_ball,
+    }
+
+    p = argparse.ArgumentParser(prog="python -m ingest.partitions", description="Yearly partitions")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="partitions and their row estimates")
+    m = sub.add_parser("migrate", help="move unpartitioned tables into the partitioned layout, online")
+    m.add_argument("--tables", nargs="+", choices=list(PARTITIONED), default=list(PARTITIONED))
+    m.add_argument("--batch", type=int, default=BATCH_ROWS, help="rows copied per transaction")
+    a = sub.add_parser("archive", help="detach seasons older than --before into the archive schema")
+    a.add_argument("--before", type=int, required=True, help="first year to keep attached")
+    a.add_argument("--tables", nargs="+", choices=list(PARTITIONED), default=list(PARTITIONED))
+    args = p.parse_args(argv)
+
+    conn = db.connect()
+    try:
+        if args.cmd == "list":
+            with conn.cursor() as cur:
+                rows = list_partitions(cur)
+            print(f"{'table':<20}{'partition':<28}{'rows':>10}{'MB':>8}  bounds")
+            for parent, child, bounds, rows_est, size in rows:
+                print(f"{parent:<20}{child:<28}{rows_est:>10}{size / 1024 / 1024:>8.1f}  {bounds}")
+        elif args.cmd == "migrate":
+            # matches first: the scorecard tables take their match_date from it
+            for table in PARTITIONED:
+                if table in args.tables:
+                    migrate(conn, table, ddl[table], args.batch)
+        else:
+            for table in args.tables:
+                archive(conn, table, args.before)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+# ===========================================================
+#                     Partnerships Table
+# ===========================================================
+import time
+
+import scorecard_archive
+from ingest import partitions
+from ingest.common import api_get, match_list, FetchFailed, clean_name as clean
+from models import Match, parse_match_info, parse_scorecard
+
+TABLES = ["partnerships"]
+
+# Set to True if you only want 100+ partnerships
+ONLY_100_PLUS = False   # <- change to True if needed
+
+ARCHIVE = scorecard_archive.get_archive()
+
+# ---------------- Helpers ----------------
+def only_if_threshold(runs):
+    """Respect the 100+ filter if enabled."""
+    return (runs is not None) and (runs >= 100) if ONLY_100_PLUS else (runs is not None)
+
+# ---------------- DB ----------------
+def ensure_tables(cur):
+    partitions.require(cur, "partnerships")
+    create_partnerships(cur)
+
+def create_partnerships(cur, name="partnerships"):
+    # yearly partitions on the match date (see ingest/partitions.py); one row per
+    # (match, innings, wicket) so re-runs update instead of duplicating
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            id BIGSERIAL,
+            match_id BIGINT,
+            match_format TEXT,
+            team1_name TEXT,
+            team2_name TEXT,
+            innings_number INT,
+            batsman1 TEXT,
+            batsman2 TEXT,
+            runs INT,
+            balls INT,
+            wicket_number INT,
+            match_date DATE NOT NULL,
+            PRIMARY KEY (id, match_date),
+            UNIQUE (match_id, innings_number, wicket_number, match_date)
+        ) PARTITION BY RANGE (match_date);
+    """)
+
+def insert_partnership(cur, match_id, match_format, team1, team2,
+                       inns_no, wicket_no, b1, b2, runs, balls, match_date):
+    """Upsert a partnership row (respects ONLY_100_PLUS)"""
+    if not only_if_threshold(runs):
+        return 0
+    cur.execute("""
+        INSERT INTO partnerships
+            (match_id, match_format, team1_name, team2_name,
+             innings_number, batsman1, batsman2, runs, balls, wicket_number, match_date)
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        ON CONFLICT (match_id, innings_number, wicket_number, match_date) DO UPDATE SET
+            match_format = EXCLUDED.match_format,
+            team1_name = EXCLUDED.team1_name,
+            team2_name = EXCLUDED.team2_name,
+            batsman1 = EXCLUDED.batsman1,
+            batsman2 = EXCLUDED.batsman2,
+            runs = EXCLUDED.runs,
+            balls = EXCLUDED.balls
+    """, (match_id, match_format, team1, team2, inns_no, b1, b2, runs, balls, wicket_no, match_date))
+    return 1
+
+# ---------------- API ----------------
+def fetch_scorecard(match):
+    # finished matches are read from (and saved to) the local archive
+    mid = match.match_id
+    raw = ARCHIVE.get_or_fetch(mid, lambda: api_get(f"/mcenter/v1/{mid}/scard", timeout=30),
+                               complete=match.complete, match_info=match.to_info())
+    return parse_scorecard(raw or {}, match)
+
+# ---------------- Core ----------------
+def process_matches(cur, series_list, ctx):
+    """
+    Inserts partnerships for every match of a parsed listing
+    (prefers API partnerships; falls back to computed from batting list).
+    """
+    written = 0
+    for series in series_list:
+        for match in series.matches:
+            if ctx.is_done(match.match_id):
+                continue
+            try:
+                innings = fetch_scorecard(match)
+            except FetchFailed as e:
+                # rate limited / down: park it in the fetch queue rather than drop the match
+                ctx.defer(match.match_id, e, match.to_info())
+                continue
+
+            written += process_match(cur, match, innings)
+            ctx.mark_done(match.match_id)
+    return written
+
+def replay_archive(cur):
+    written = 0
+    for match_id, payload, info in ARCHIVE.replay():
+        match = parse_match_info(info or {}) or Match(match_id)
+        written += process_match(cur, match, parse_scorecard(payload, match), pause=False)
+    return written
+
+def process_match(cur, match, innings, pause=True):
+    match_id = match.match_id
+    team1 = match.team1.name
+    team2 = match.team2.name
+    match_format = clean(match.format)
+
+    if not innings:
+        return 0
+
+    written = 0
+    match_date = partitions.match_date(cur, match_id, match)
+    partitions.ensure_for(cur, "partnerships", match_date)
+    cur.execute("DELETE FROM partnerships WHERE match_id = %s AND match_date <> %s", (match_id, match_date))
+
+    for inns in innings:
+        inns_idx = inns.number
+        # 1) Use API partnerships if present
+        if inns.partnerships:
+            print(f"🔎 match {match_id} inns {inns_idx}: partnerships from API = {len(inns.partnerships)}")
+            for p in inns.partnerships:
+                written += insert_partnership(cur, match_id, match_format, team1, team2,
+                                   inns_idx, p.wicket_number, p.batsman1, p.batsman2,
+                                   p.runs, p.balls, match_date)
+            # done with this innings
+            continue
+
+        # 2) Fallback: compute simple pairwise partnerships from batting list
+        bats = inns.batting
+        if not bats:
+            print(f"⚠️ match {match_id} inns {inns_idx}: no partnerships and no batsman list")
+            continue
+
+        print(f"⚠️ match {match_id} inns {inns_idx}: computing partnerships from {len(bats)} batsmen")
+        # Keep original order as batting order (or the reported batting position if present)
+        bats_sorted = sorted(bats, key=lambda b: b.position)
+
+        # Pair consecutive batters as a simple approximation
+        for j in range(len(bats_sorted)-1):
+            b1row, b2row = bats_sorted[j], bats_sorted[j+1]
+            balls = b1row.balls + b2row.balls
+            runs = b1row.runs + b2row.runs
+            wno  = j + 1
+            written += insert_partnership(cur, match_id, match_format, team1, team2,
+                               inns_idx, wno, b1row.name or "Unknown", b2row.name or "Unknown",
+                               runs, balls, match_date)
+
+        # be gentle with the API
+        if pause:
+            time.sleep(1.2)
+    return written
+
+# ---------------- STAGE ----------------
+def drain_item(ctx, cur, match_id, info):
+    match = parse_match_info(info or {}) or Match(int(match_id))
+    return process_match(cur, match, fetch_scorecard(match))
+
+def run(ctx):
+    cur = ctx.conn.cursor()
+    if ctx.replay:
+        written = replay_archive(cur)
+    else:
+        written = process_matches(cur, match_list("recent"), ctx)
+        ctx.conn.commit()
+        written += process_matches(cur, match_list("completed"), ctx)
+    cur.close()
+    print("🎉 Partnerships load complete")
+    return written
@@ -0,0 +1,351 @@
+# ===========================================================
+#            Ingest pipeline (dependency graph runner)
+# ===========================================================
+#
+#   python -m ingest                     # run every stage, resuming an unfinished run
+#   python -m ingest --stages players    # players + what it depends on (teams)
+#   python -m ingest --fresh --rebuild   # new run, drop + recreate the stage tables first
+#   python -m ingest --stages scorecards partnerships --rebuild --replay   # from the local archive
+#   python -m ingest --drain                                  # only retry items parked in fetch_queue
+#   python -m ingest --queue
+#   python -m ingest --list
+#
+# Independent stages run in parallel, each on its own connection. Progress is
+# checkpointed in ingest_runs / ingest_stage_runs / ingest_progress, so an
+# interrupted run picks up at the first unfinished stage, and long stages skip
+# the items (series, matches, teams, players) they already committed. Items
+# whose fetch fails after retries are parked in fetch_queue (see fetch_queue.py)
+# and retried by later runs.
+
+import argparse
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import db
+import home_stats
+from ingest import common, fetch_queue, partitions
+from ingest import (series_matches, venues, scorecards, partnerships, career_stats,
+                    rankings, teams, players, master_stats)
+
+
+class Stage:
+    def __init__(self, module, deps=()):
+        self.module = module
+        self.deps = tuple(deps)
+
+    def run(self, ctx):
+        # items deferred by earlier runs first, then the normal pass (replays never touch the API)
+        rows = 0
+        drain_item = getattr(self.module, "drain_item", None)
+        if drain_item is not None and not ctx.replay:
+            rows += fetch_queue.drain(ctx, drain_item)
+        if not ctx.drain_only:
+            rows += self.module.run(ctx) or 0
+        return rows
+
+
+# partnerships follows scorecards so it reads the freshly archived /scard payloads;
+# career_stats aggregates what scorecards just wrote, and master_stats copies those
+# aggregates when it is not sourced from the stats API
+STAGES = {
+    "series_matches": Stage(series_matches),
+    "venues":         Stage(venues, deps=("series_matches",)),
+    "scorecards":     Stage(scorecards),
+    "partnerships":   Stage(partnerships, deps=("scorecards",)),
+    "career_stats":   Stage(career_stats, deps=("scorecards",)),
+    "rankings":       Stage(rankings),
+    "teams":          Stage(teams),
+    "players":        Stage(players, deps=("teams",)),
+    "master_stats":   Stage(master_stats, deps=("career_stats",) if master_stats.SOURCE == "local" else ()),
+}
+
+# stages that never call the API (the pipeline only asks for RAPIDAPI_KEY when others run)
+OFFLINE_STAGES = {"career_stats"} | ({"master_stats"} if master_stats.SOURCE == "local" else set())
+
+
+# ---------------- Checkpoints ----------------
+def ensure_checkpoint_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS ingest_runs (
+        run_id       BIGSERIAL PRIMARY KEY,
+        stages       TEXT NOT NULL,
+        status       TEXT NOT NULL DEFAULT 'running',   -- running | done | failed
+        started_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at  TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS ingest_stage_runs (
+        run_id       BIGINT REFERENCES ingest_runs(run_id) ON DELETE CASCADE,
+        stage        TEXT NOT NULL,
+        status       TEXT NOT NULL,                      -- running | done | failed | skipped
+        rows         INT,
+        seconds      DOUBLE PRECISION,
+        error        TEXT,
+        started_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at  TIMESTAMP,
+        PRIMARY KEY (run_id, stage)
+    );
+    CREATE TABLE IF NOT EXISTS ingest_progress (
+        run_id       BIGINT REFERENCES ingest_runs(run_id) ON DELETE CASCADE,
+        stage        TEXT NOT NULL,
+        item_key     TEXT NOT NULL,
+        done_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, stage, item_key)
+    );
+    """)
+
+
+class StageContext:
+    """Handed to each stage's run(): its connection plus item-level checkpoints."""
+
+    def __init__(self, run_id, stage, conn, replay=False, drain_only=False):
+        self.run_id = run_id
+        self.stage = stage
+        self.conn = conn
+        self.replay = replay        # rebuild from the local scorecard archive, no API calls
+        self.drain_only = drain_only
+        self._deferred = set()
+        with conn.cursor() as cur:
+            cur.execute("SELECT item_key FROM ingest_progress WHERE run_id=%s AND stage=%s",
+                        (run_id, stage))
+            self._done = {r[0] for r in cur.fetchall()}
+            # queued items not due yet (or dead) wait for the drain, not the normal pass
+            self._parked = set() if replay else fetch_queue.parked(cur, stage)
+        if self._done:
+            print(f"↪ {stage}: resuming, {len(self._done)} item(s) already done")
+        if self._parked:
+            print(f"⏸ {stage}: {len(self._parked)} queued item(s) skipped until due")
+
+    def is_done(self, key):
+        """
+        True once `key` is committed, deferred to the fetch queue in this run, or
+        parked there by an earlier run (backing off, or dead).
+        """
+        key = str(key)
+        return key in self._done or key in self._deferred or key in self._parked
+
+    @property
+    def deferred(self):
+        return len(self._deferred)
+
+    def mark_done(self, key):
+        """Record `key` as done and commit it together with the stage's pending writes."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO ingest_progress (run_id, stage, item_key) VALUES (%s,%s,%s)
+                ON CONFLICT DO NOTHING
+            """, (self.run_id, self.stage, str(key)))
+        self.conn.commit()
+        self._done.add(str(key))
+
+    def defer(self, key, err, context=None):
+        """
+        `key` could not be fetched (FetchFailed `err`): drop its partial writes and park it in
+        the fetch queue with `context` for drain_item. It is not checkpointed, so it stays open.
+        """
+        self.conn.rollback()
+        with self.conn.cursor() as cur:
+            attempts = fetch_queue.enqueue(cur, self.stage, key, err, context)
+        self.conn.commit()
+        self._deferred.add(str(key))
+        print(f"⏳ {self.stage} {key}: deferred to fetch queue ({err}), attempt {attempts}")
+
+
+def _set_stage(run_id, stage, status, rows=None, seconds=None, error=None):
+    with db.session() as conn, conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO ingest_stage_runs (run_id, stage, status, rows, seconds, error)
+            VALUES (%s,%s,%s,%s,%s,%s)
+            ON CONFLICT (run_id, stage) DO UPDATE SET
+                status = EXCLUDED.status, rows = EXCLUDED.rows, seconds = EXCLUDED.seconds,
+                error = EXCLUDED.error,
+                started_at = CASE WHEN EXCLUDED.status = 'running'
+                                  THEN CURRENT_TIMESTAMP ELSE ingest_stage_runs.started_at END,
+                finished_at = CASE WHEN EXCLUDED.status = 'running'
+                                   THEN NULL ELSE CURRENT_TIMESTAMP END
+        """, (run_id, stage, status, rows, seconds, error))
+
+
+# ---------------- Graph ----------------
+def with_deps(names):
+    out, stack = set(), list(names)
+    while stack:
+        n = stack.pop()
+        if n not in out:
+            out.add(n)
+            stack.extend(STAGES[n].deps)
+    return out
+
+
+def topo_order(names):
+    order, seen = [], set()
+
+    def visit(n):
+        if n in seen:
+            return
+        seen.add(n)
+        for d in STAGES[n].deps:
+            if d in names:
+                visit(d)
+        order.append(n)
+
+    for n in sorted(names):
+        visit(n)
+    return order
+
+
+def _run_stage(run_id, name, replay=False, drain_only=False):
+    _set_stage(run_id, name, "running")
+    print(f"▶ {name}")
+    start = time.perf_counter()
+    conn = db.connect()
+    try:
+        ctx = StageContext(run_id, name, conn, replay, drain_only)
+        rows = STAGES[name].run(ctx) or 0
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        seconds = time.perf_counter() - start
+        _set_stage(run_id, name, "failed", seconds=seconds, error=f"{e}\n{traceback.format_exc()}"[:4000])
+        print(f"❌ {name} failed after {seconds:.1f}s: {e}")
+        raise
+    finally:
+        conn.close()
+    seconds = time.perf_counter() - start
+    _set_stage(run_id, name, "done", rows=rows, seconds=seconds)
+    print(f"✅ {name}: {rows} rows in {seconds:.1f}s" + (f", {ctx.deferred} deferred" if ctx.deferred else ""))
+    return rows
+
+
+def run_pipeline(run_id, names, done, workers, replay=False, drain_only=False):
+    """Run `names` respecting dependencies; stages in `done` are treated as finished."""
+    done, failed = set(done), set()
+    pending = [n for n in topo_order(names) if n not in done]
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for n in list(pending):
+                deps = [d for d in STAGES[n].deps if d in names]
+                if any(d in failed for d in deps):
+                    pending.remove(n)
+                    failed.add(n)
+                    _set_stage(run_id, n, "skipped", error="dependency failed")
+                    print(f"⏭ {n}: skipped (dependency failed)")
+                elif all(d in done for d in deps):
+                    pending.remove(n)
+                    running[pool.submit(_run_stage, run_id, n, replay, drain_only)] = n
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                n = running.pop(fut)
+                if fut.exception() is None:
+                    done.add(n)
+                else:
+                    failed.add(n)
+    return failed
+
+
+# ---------------- Reporting ----------------
+def report(run_id):
+    with db.session() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT stage, status, rows, seconds FROM ingest_stage_runs
+            WHERE run_id=%s ORDER BY started_at
+        """, (run_id,))
+        rows = cur.fetchall()
+    print(f"\n📊 Run {run_id}")
+    print(f"{'stage':<16}{'status':<10}{'rows':>10}{'seconds':>10}")
+    for stage, status, n, secs in rows:
+        print(f"{stage:<16}{status:<10}{(n if n is not None else '-'):>10}"
+              f"{(f'{secs:.1f}' if secs is not None else '-'):>10}")
+    report_queue()
+
+
+def report_queue():
+    with db.session() as conn, conn.cursor() as cur:
+        fetch_queue.ensure_tables(cur)
+        rows = fetch_queue.stats(cur)
+    if not rows:
+        return
+    print("\n⏳ Fetch queue")
+    print(f"{'stage':<16}{'endpoint':<32}{'status':<10}{'items':>6}{'max try':>9}  next due")
+    for stage, endpoint, status, n, attempts, next_due in rows:
+        print(f"{stage:<16}{endpoint:<32}{status:<10}{n:>6}{attempts:>9}  {next_due or '-'}")
+
+
+# ---------------- Main ----------------
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m ingest", description="Cricbuzz → Postgres ingest pipeline")
+    p.add_argument("--stages", nargs="+", choices=sorted(STAGES), help="stages to run (plus their dependencies)")
+    p.add_argument("--no-deps", action="store_true", help="do not pull in dependencies of --stages")
+    p.add_argument("--fresh", action="store_true", help="start a new run instead of resuming the last unfinished one")
+    p.add_argument("--rebuild", action="store_true", help="drop and recreate the selected stages' tables first")
+    p.add_argument("--workers", type=int, default=4, help="max stages running in parallel")
+    p.add_argument("--replay", action="store_true",
+                   help="scorecards/partnerships: rebuild from the local scorecard archive (zero API calls)")
+    p.add_argument("--drain", action="store_true",
+                   help="only retry the due items in fetch_queue, skip the normal pass")
+    p.add_argument("--queue", action="store_true", help="print the fetch queue and exit")
+    p.add_argument("--list", action="store_true", help="print the stage graph and exit")
+    args = p.parse_args(argv)
+
+    if args.list:
+        for n in topo_order(set(STAGES)):
+            deps = ", ".join(STAGES[n].deps) or "—"
+            print(f"{n:<16} after: {deps}")
+        return 0
+    if args.queue:
+        report_queue()
+        return 0
+
+    names = set(args.stages or STAGES)
+    if not args.no_deps:
+        names = with_deps(names)
+    order = topo_order(names)
+    offline = OFFLINE_STAGES | ({"scorecards", "partnerships"} if args.replay else set())
+    if names - offline and not common.API_KEY:
+        p.error("RAPIDAPI_KEY is not set: export it or add it to .env")
+
+    with db.session() as conn, conn.cursor() as cur:
+        ensure_checkpoint_tables(cur)
+        fetch_queue.ensure_tables(cur)
+        run_id, done = None, set()
+        if not args.fresh and not args.rebuild and not args.drain:
+            cur.execute("""
+                SELECT run_id FROM ingest_runs
+                WHERE status <> 'done' AND stages = %s
+                ORDER BY run_id DESC LIMIT 1
+            """, (",".join(order),))
+            row = cur.fetchone()
+            if row:
+                run_id = row[0]
+                cur.execute("SELECT stage FROM ingest_stage_runs WHERE run_id=%s AND status='done'", (run_id,))
+                done = {r[0] for r in cur.fetchall()}
+                cur.execute("UPDATE ingest_runs SET status='running' WHERE run_id=%s", (run_id,))
+                print(f"↪ Resuming run {run_id} ({len(done)} stage(s) already done)")
+        if run_id is None:
+            cur.execute("INSERT INTO ingest_runs (stages) VALUES (%s) RETURNING run_id", (",".join(order),))
+            run_id = cur.fetchone()[0]
+            print(f"🚀 Run {run_id}: {' → '.join(order)}")
+
+        # DDL up front, in dependency order, so parallel stages never race on CREATE/DROP
+        if args.rebuild:
+            for n in reversed(order):
+                for t in STAGES[n].module.TABLES:
+                    cur.execute(f"DROP TABLE IF EXISTS {t} CASCADE;")
+        for n in order:
+            STAGES[n].module.ensure_tables(cur)
+        # this season's and the next FUTURE_YEARS' partitions exist before any stage writes
+        partitions.ensure_future(cur)
+        conn.commit()
+
+    failed = run_pipeline(run_id, names, done, args.workers, args.replay, args.drain)
+
+    with db.session() as conn, conn.cursor() as cur:
+        cur.execute("UPDATE ingest_runs SET status=%s, finished_at=CURRENT_TIMESTAMP WHERE run_id=%s",
+                    ("failed" if failed else "done", run_id))
+        # exact counts for the home page cards (too slow to COUNT(*) on every page view)
+        home_stats.refresh_counters(cur)
+    report(run_id)
+    return 1 if failed else 0
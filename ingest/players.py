@@ -0,0 +1,145 @@
+# ===========================================================
+#                  Players Table
+# ===========================================================
+import time
+
+import cache_bus
+from ingest.common import api_get, match_list, FetchFailed
+from models import teams_in
+
+TABLES = ["players"]
+
+MATCH_ENDPOINTS = ["live", "recent"]
+
+# ---------------- Create Players Table ----------------
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS players (
+        player_id BIGINT PRIMARY KEY,
+        full_name TEXT,
+        nick_name TEXT,
+        role TEXT,
+        batting_style TEXT,
+        bowling_style TEXT,
+        is_keeper BOOLEAN,
+        is_captain BOOLEAN,
+        team_id BIGINT REFERENCES teams(team_id),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cache_bus.ensure_triggers(cur, "players")   # dashboard caches drop edited players
+
+# ---------------- Fetch Players for a Team ----------------
+def fetch_players(team_id):
+    data = api_get(f"/teams/v1/{team_id}/players", timeout=20)
+    if not data:
+        print(f"⚠ Error fetching players for team {team_id}")
+        return []
+
+    players = []
+    current_role = ""
+    known_roles = ["BATSMEN", "ALL ROUNDER", "WICKET KEEPER", "BOWLER"]
+
+    for p in data.get("player", []):
+        name = p.get("name")
+        pid = p.get("id")
+
+        if name in known_roles:
+            current_role = name
+            continue
+        if not pid or not name:
+            continue
+
+        # Fallbacks
+        full_name = p.get("fullName") or name
+        nick_name = name
+        role = current_role if current_role else "Unknown"
+        batting_style = p.get("battingStyle") or "Unknown"
+        bowling_style = p.get("bowlingStyle") or "Unknown"
+        is_keeper = p.get("keeper", False)
+        is_captain = p.get("captain", False)
+        tid = p.get("teamId") or team_id
+
+        players.append({
+            "player_id": pid,
+            "full_name": full_name,
+            "nick_name": nick_name,
+            "role": role,
+            "batting_style": batting_style,
+            "bowling_style": bowling_style,
+            "is_keeper": is_keeper,
+            "is_captain": is_captain,
+            "team_id": tid
+        })
+
+    return players
+
+# ---------------- Insert Players ----------------
+def insert_players(cur, players):
+    for p in players:
+        cur.execute("""
+            INSERT INTO players (
+                player_id, full_name, nick_name, role,
+                batting_style, bowling_style, is_keeper,
+                is_captain, team_id
+            )
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+            ON CONFLICT (player_id) DO UPDATE
+            SET full_name = EXCLUDED.full_name,
+                nick_name = EXCLUDED.nick_name,
+                role = EXCLUDED.role,
+                batting_style = EXCLUDED.batting_style,
+                bowling_style = EXCLUDED.bowling_style,
+                is_keeper = EXCLUDED.is_keeper,
+                is_captain = EXCLUDED.is_captain,
+                team_id = EXCLUDED.team_id
+        """, (
+            p["player_id"], p["full_name"], p["nick_name"], p["role"],
+            p["batting_style"], p["bowling_style"], p["is_keeper"],
+            p["is_captain"], p["team_id"]
+        ))
+
+def collect_team_ids():
+    team_ids = set()
+    for ep in MATCH_ENDPOINTS:
+        series = match_list(ep)
+        if not series:
+            print(f"⚠ Error fetching /matches/v1/{ep}")
+            continue
+        team_ids.update(teams_in(series))
+    return team_ids
+
+def load_team(cur, team_id):
+    players = fetch_players(team_id)
+    if players:
+        insert_players(cur, players)
+    return len(players)
+
+# ---------------- STAGE ----------------
+def drain_item(ctx, cur, tid, context):
+    return load_team(cur, int(tid))
+
+def run(ctx):
+    cur = ctx.conn.cursor()
+
+    # Step 1: Collect team IDs from matches
+    team_ids = collect_team_ids()
+    print(f"📌 Found {len(team_ids)} teams from matches")
+
+    # Step 2: Fetch and insert players for each team
+    total_inserted = 0
+    for tid in team_ids:
+        if ctx.is_done(tid):
+            continue
+        print(f"➡️ Processing team {tid}")
+        try:
+            total_inserted += load_team(cur, tid)
+        except FetchFailed as e:
+            ctx.defer(tid, e)
+            continue
+        ctx.mark_done(tid)
+        time.sleep(0.5)
+
+    cur.close()
+    print(f"✔ Inserted/Updated {total_inserted} players")
+    return total_inserted
@@ -0,0 +1,110 @@
+# ===========================================================
+#                   Player Rankings Table
+# ===========================================================
+import datetime
+import time
+
+from ingest.common import api_get, FetchFailed
+
+TABLES = ["player_rankings_history"]
+
+FORMAT_MAP = {"test": "TEST", "odi": "ODI", "t20": "T20I"}
+CATEGORY_MAP = {"batsmen": "Batting", "bowlers": "Bowling", "allrounders": "All-rounder"}
+
+
+# ---------------- Create Table ----------------
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS player_rankings_history (
+        player_id        BIGINT NOT NULL,
+        player_name      TEXT,
+        country          TEXT,
+        format           TEXT NOT NULL,        -- TEST | ODI | T20I
+        category         TEXT NOT NULL,        -- Batting | Bowling | All-rounder
+        ranking_position INT NOT NULL,         -- 1 to 10
+        rating_points    INT,
+        ranking_date     DATE NOT NULL,
+        created_at       TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW(),
+        PRIMARY KEY (format, category, ranking_position, ranking_date)
+    );
+    """)
+
+
+# ---------------- Insert / Upsert ----------------
+def save_record(cur, fmt_db, category_db, player):
+    try:
+        ranking_date = datetime.datetime.strptime(player["lastUpdatedOn"], "%Y-%m-%d").date()
+    except Exception:
+        ranking_date = datetime.date.today()
+
+    rating = int(player.get("rating") or 0)
+
+    cur.execute("""
+        INSERT INTO player_rankings_history
+        (player_id, player_name, country, format, category, ranking_position, rating_points, ranking_date)
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+        ON CONFLICT (format, category, ranking_position, ranking_date)
+        DO UPDATE SET
+            player_id     = EXCLUDED.player_id,
+            player_name   = EXCLUDED.player_name,
+            country       = EXCLUDED.country,
+            rating_points = EXCLUDED.rating_points;
+    """, (
+        int(player.get("id") or 0),
+        player.get("name") or "Unknown",
+        player.get("country") or "Unknown",
+        fmt_db,
+        category_db,
+        int(player.get("rank") or 0),
+        rating,
+        ranking_date
+    ))
+
+    print(f"✅ {ranking_date} {fmt_db} {category_db} Rank {player['rank']}: {player['name']} ({player['country']}) → {rating}")
+
+
+# ---------------- Fetch API ----------------
+def fetch_rankings(fmt_api: str, category_api: str, top_n: int = 10):
+    data = api_get(f"/stats/v1/rankings/{category_api}", params={"formatType": fmt_api}, timeout=20)
+    if data is None:
+        print(f"❌ No rankings for {fmt_api} {category_api}")
+        return []
+    return data.get("rank", [])[:top_n]
+
+
+def load_rankings(cur, fmt_api, cat_api):
+    """Fetch + insert the top 10 of one format/category; None when the API had no data."""
+    players = fetch_rankings(fmt_api, cat_api, top_n=10)
+    if not players:
+        print(f"⚠ No data for {fmt_api} {cat_api}")
+        return None
+    for p in players:
+        save_record(cur, FORMAT_MAP[fmt_api], CATEGORY_MAP[cat_api], p)
+        time.sleep(0.1)  # small delay to be kind to API
+    return len(players)
+
+
+# ---------------- STAGE ----------------
+def drain_item(ctx, cur, key, context):
+    return load_rankings(cur, *key.split(":", 1))
+
+
+def run(ctx):
+    cur = ctx.conn.cursor()
+    saved = 0
+    for fmt_api in FORMAT_MAP:
+        for cat_api in CATEGORY_MAP:
+            key = f"{fmt_api}:{cat_api}"
+            if ctx.is_done(key):
+                continue
+            try:
+                n = load_rankings(cur, fmt_api, cat_api)
+            except FetchFailed as e:
+                ctx.defer(key, e)
+                continue
+            if n is None:
+                continue
+            saved += n
+            ctx.mark_done(key)
+    cur.close()
+    return saved
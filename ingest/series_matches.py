@@ -0,0 +1,485 @@
+# ===========================================================
+#                   Series and  Matches Table
+# ===========================================================
+import random
+import re
+from collections import Counter
+from datetime import datetime, date
+from typing import Optional, Dict, Any, Tuple
+
+from ingest import partitions
+from ingest.common import api_get, match_list, FetchFailed
+from models import parse_series_detail
+
+TABLES = ["matches", "series"]
+
+START_2024 = date(2024, 1, 1)
+TODAY = date.today()
+ARCHIVE_CATEGORIES = ["international", "league", "domestic", "women"]
+
+
+# ---------------- UTILS ----------------
+def ms_to_date(ms) -> Optional[date]:
+    if not ms: return None
+    return datetime.fromtimestamp(int(ms) / 1000).date()
+
+def parse_margin(status: str) -> Tuple[int, int, bool]:
+    runs = wkts = 0
+    innings = False
+    if not status: return runs, wkts, innings
+    s = status.lower()
+    if "innings" in s:
+        innings = True
+    m_runs = re.search(r"(\d+)\s*run", s)
+    if m_runs:
+        runs = int(m_runs.group(1))
+    m_wkts = re.search(r"(\d+)\s*wkt", s)
+    if m_wkts:
+        wkts = int(m_wkts.group(1))
+    return runs, wkts, innings
+
+def infer_match_type(fmt: str, series_name: str = "", series_type: str = "") -> str:
+    f = (fmt or "").lower()
+    s = (series_name or "").lower()
+    st = (series_type or "").lower()
+    if "league" in s or "league" in st or any(x in s for x in ["ipl", "bbl", "psl", "cpl", "bpl", "hundred"]):
+        return "League"
+    if f == "test":
+        return "International Test"
+    if f == "odi":
+        return "One Day"
+    if "t20" in f:
+        return "Twenty20"
+    if "trophy" in s or "cup" in s:
+        return "Tournament"
+    return "International"
+
+# ---------------- DDL ----------------
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS series (
+        series_id      BIGINT PRIMARY KEY,
+        series_name    TEXT NOT NULL,
+        series_type    TEXT NOT NULL,
+        start_date     DATE NOT NULL,
+        end_date       DATE NOT NULL,
+        host_country   TEXT NOT NULL,
+        match_format   TEXT NOT NULL,
+        total_matches  INT NOT NULL,
+        created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );""")
+
+    partitions.require(cur, "matches")
+    create_matches(cur)
+    print("✅ ensured tables (series, matches)")
+
+def create_matches(cur, name="matches"):
+    # yearly range partitions on start_date (see ingest/partitions.py); the partition
+    # key has to be part of the primary key
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS {name} (
+        match_id          BIGINT NOT NULL,
+        series_id         BIGINT REFERENCES series(series_id),
+        match_desc        TEXT NOT NULL,
+        match_format      TEXT NOT NULL,
+        match_type        TEXT NOT NULL,
+        start_date        TIMESTAMP NOT NULL,
+        end_date          TIMESTAMP,
+        state             TEXT NOT NULL,
+        status            TEXT NOT NULL,
+        team1_id          BIGINT NOT NULL,
+        team1_name        TEXT NOT NULL,
+        team2_id          BIGINT NOT NULL,
+        team2_name        TEXT NOT NULL,
+        venue_id          BIGINT NOT NULL,
+        venue_name        TEXT NOT NULL,
+        venue_city        TEXT NOT NULL,
+        venue_country     TEXT NOT NULL,
+        toss_winner_id    BIGINT,
+        toss_decision     TEXT,
+        winner_team_id    BIGINT,
+        winner_team_name  TEXT,
+        win_by_runs       INT,
+        win_by_wickets    INT,
+        win_by_innings    BOOLEAN,
+        created_at        TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (match_id, start_date)
+    ) PARTITION BY RANGE (start_date);""")
+
+# ---------------- ENRICHERS ----------------
+# best effort: a failed enrichment leaves the column for post_clean instead of deferring the match
+def _enrich_get(path):
+    try:
+        return api_get(path)
+    except FetchFailed as e:
+        print(f"⚠️ enrichment skipped: {e}")
+        return None
+
+def fetch_series_host_country(series_id: int) -> Optional[str]:
+    d = _enrich_get(f"/series/v1/{series_id}")
+    if not d: return None
+    host = (d.get("host") or {}).get("countryName")
+    return host
+
+def fetch_venue_city_country(venue_id: int) -> Tuple[Optional[str], Optional[str]]:
+    if not venue_id: return None, None
+    d = _enrich_get(f"/venues/v1/{venue_id}")
+    if not d: return None, None
+    return d.get("city"), d.get("country")
+
+def fetch_match_detail(match_id: int) -> Dict[str, Any]:
+    d = _enrich_get(f"/mcenter/v1/{match_id}")
+    if not d: return {}
+    hdr = d.get("matchHeader") or {}
+    toss = hdr.get("tossResults") or {}
+    return {
+        "winner_id": hdr.get("winningTeamId"),
+        "winner_name": hdr.get("winningTeamName"),
+        "toss_winner": toss.get("tossWinnerId"),
+        "toss_decision": toss.get("decision"),
+        "status": hdr.get("status"),
+    }
+
+# ---------------- UPSERTS ----------------
+def upsert_series(cur, series):
+    sid = series.id
+    if not sid: return
+    name = series.name or f"Series {sid}"
+    stype = series.category or "International"
+    sd = ms_to_date(series.start_ms) or START_2024
+    ed = ms_to_date(series.end_ms) or TODAY
+
+    host = series.host_country
+    if not host:
+        host = fetch_series_host_country(int(sid)) or host
+    if not host and series.matches:
+        # Majority vote from venue countries in matches of this series (as last resort)
+        countries = [m.venue.country for m in series.matches if m.venue.country]
+        if countries:
+            host = Counter(countries).most_common(1)[0][0]
+    host = host or "Global"
+
+    fmt = series.format
+    if not fmt and series.matches:
+        fmts = {m.format for m in series.matches if m.format}
+        fmt = "Mixed" if len(fmts) > 1 else (list(fmts)[0] if fmts else "Unknown")
+    fmt = fmt or "Unknown"
+
+    total = series.total_matches
+    if total is None:
+        total = len(series.matches)
+    total = total or 0
+
+    cur.execute("""
+    INSERT INTO series (
+        series_id, series_name, series_type, start_date, end_date,
+        host_country, match_format, total_matches
+    ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+    ON CONFLICT (series_id) DO UPDATE SET
+        series_name   = EXCLUDED.series_name,
+        series_type   = EXCLUDED.series_type,
+        start_date    = EXCLUDED.start_date,
+        end_date      = EXCLUDED.end_date,
+        host_country  = EXCLUDED.host_country,
+        match_format  = EXCLUDED.match_format,
+        total_matches = EXCLUDED.total_matches;
+    """, (int(sid), name, stype, sd, ed, host, fmt, total))
+
+def upsert_match(cur, match, sid, sname, stype):
+    mid = match.match_id
+    match_desc = match.desc or "Match"
+    match_fmt  = match.format or "Unknown"
+    match_type = infer_match_type(match_fmt, sname, stype)
+    start_ts   = match.start_ts or datetime.now()
+    end_ts     = match.end_ts
+    state      = match.state or "scheduled"
+    status     = match.status
+
+    t1_id, t1_name = match.team1.id or 0, match.team1.name or "Team 1"
+    t2_id, t2_name = match.team2.id or 0, match.team2.name or "Team 2"
+
+    v_id   = match.venue.id or 0
+    v_name = match.venue.ground or "Ground"
+    v_city = match.venue.city or None
+    v_ctry = match.venue.country or None
+    if not (v_city and v_ctry):
+        cty2, cty = fetch_venue_city_country(v_id)
+        v_city = v_city or cty2 or "City"
+        v_ctry = v_ctry or cty or None
+
+    # series host fallback for venue_country
+    if not v_ctry:
+        cur.execute("SELECT host_country FROM series WHERE series_id=%s", (sid,))
+        row = cur.fetchone()
+        v_ctry = row[0] if row and row[0] else "Global"
+
+    # match detail for winner/toss + authoritative status
+    det = fetch_match_detail(int(mid))
+    winner_id   = det.get("winner_id")
+    winner_name = det.get("winner_name")
+    toss_win    = det.get("toss_winner")
+    toss_dec    = det.get("toss_decision") or ("Pending" if state.lower() != "complete" else None)
+    status_det  = det.get("status")
+    if status_det:
+        status = status_det
+
+    # parse winner from status if still missing
+    if not winner_id and "won by" in (status or "").lower():
+        low = status.lower()
+        if t1_name and t1_name.lower() in low:
+            winner_id, winner_name = t1_id, t1_name
+        elif t2_name and t2_name.lower() in low:
+            winner_id, winner_name = t2_id, t2_name
+
+    if not winner_name:
+        # live / no result yet
+        winner_name = "No Result"
+    runs, wkts, innings = parse_margin(status)
+
+    # final blanks protection for NOT NULL columns
+    if not v_city: v_city = "City"
+    if not v_ctry: v_ctry = "Global"
+    if not state: state = "scheduled"
+    if not status: status = "—"
+
+    # a rescheduled match moves to its new start_date (possibly another season's partition)
+    partitions.ensure_for(cur, "matches", start_ts)
+    cur.execute("DELETE FROM matches WHERE match_id = %s AND start_date <> %s", (int(mid), start_ts))
+    if cur.rowcount:
+        # and so do its scorecard / partnership / ball-by-ball rows (match_date)
+        partitions.move_match(cur, int(mid), start_ts.date())
+    cur.execute("""
+    INSERT INTO matches (
+        match_id, series_id, match_desc, match_format, match_type,
+        start_date, end_date, state, status,
+        team1_id, team1_name, team2_id, team2_name,
+        venue_id, venue_name, venue_city, venue_country,
+        toss_winner_id, toss_decision,
+        winner_team_id, winner_team_name,
+        win_by_runs, win_by_wickets, win_by_innings
+    ) VALUES (
+        %s,%s,%s,%s,%s,
+        %s,%s,%s,%s,
+        %s,%s,%s,%s,
+        %s,%s,%s,%s,
+        %s,%s,
+        %s,%s,
+        %s,%s,%s
+    )
+    ON CONFLICT (match_id, start_date) DO UPDATE SET
+        match_desc        = EXCLUDED.match_desc,
+        match_format      = EXCLUDED.match_format,
+        match_type        = EXCLUDED.match_type,
+        end_date          = EXCLUDED.end_date,
+        state             = EXCLUDED.state,
+        status            = EXCLUDED.status,
+        team1_id          = EXCLUDED.team1_id,
+        team1_name        = EXCLUDED.team1_name,
+        team2_id          = EXCLUDED.team2_id,
+        team2_name        = EXCLUDED.team2_name,
+        venue_id          = EXCLUDED.venue_id,
+        venue_name        = EXCLUDED.venue_name,
+        venue_city        = EXCLUDED.venue_city,
+        venue_country     = EXCLUDED.venue_country,
+        toss_winner_id    = EXCLUDED.toss_winner_id,
+        toss_decision     = EXCLUDED.toss_decision,
+        winner_team_id    = EXCLUDED.winner_team_id,
+        winner_team_name  = EXCLUDED.winner_team_name,
+        win_by_runs       = EXCLUDED.win_by_runs,
+        win_by_wickets    = EXCLUDED.win_by_wickets,
+        win_by_innings    = EXCLUDED.win_by_innings;
+    """, (
+        int(mid), int(sid), match_desc, match_fmt, match_type,
+        start_ts, end_ts, state, status,
+        t1_id, t1_name, t2_id, t2_name,
+        v_id, v_name, v_city, v_ctry,
+        toss_win, toss_dec,
+        winner_id, winner_name,
+        runs, wkts, innings
+    ))
+    return True
+
+# ---------------- INGEST: LIVE + RECENT ----------------
+def upsert_matches(cur, series, sname, stype):
+    upserted = 0
+    for m in series.matches:
+        sd = m.start_date
+        if sd and sd >= START_2024:
+            upserted += bool(upsert_match(cur, m, series.id, sname, stype))
+    return upserted
+
+def ingest_live_recent(cur):
+    upserted = 0
+    for ep in ("live", "recent"):
+        for series in match_list(ep):
+            if series.id:
+                upsert_series(cur, series)
+            upserted += upsert_matches(cur, series, series.name, series.category)
+    return upserted
+
+# ---------------- INGEST: ARCHIVES (ALL CATEGORIES) ----------------
+def ingest_archives_all(cur, ctx):
+    """Series already loaded in this run (per ctx checkpoints) are skipped on resume."""
+    upserted = 0
+    for cat in ARCHIVE_CATEGORIES:
+        cursor = None
+        while True:
+            payload = api_get(f"/series/v1/archives/{cat}", params={"cursor": cursor} if cursor else None)
+            if not payload:
+                break
+            for sm in payload.get("seriesMapProto", []):
+                for s in sm.get("series", []):
+                    sid = s.get("id")
+                    sd, ed = ms_to_date(s.get("startDt")), ms_to_date(s.get("endDt"))
+                    if ed and ed < START_2024:
+                        cursor = None
+                        break
+                    if sid and sd and ed and ed >= START_2024:
+                        if ctx.is_done(f"series:{sid}"):
+                            continue
+                        try:
+                            upserted += ingest_series(cur, sid)
+                        except FetchFailed as e:
+                            ctx.defer(f"series:{sid}", e)
+                            continue
+                        ctx.mark_done(f"series:{sid}")
+            cursor = payload.get("nextCursor") or payload.get("cursor")
+            if not cursor:
+                break
+    return upserted
+
+def ingest_series(cur, sid):
+    series = parse_series_detail(api_get(f"/series/v1/{sid}") or {}, sid)
+    upsert_series(cur, series)
+    return upsert_matches(cur, series, series.name, series.category)
+
+def post_clean(cur, conn):
+    # 1) Fill any series host_country still generic using majority venue country
+    cur.execute("""
+        WITH per_series AS (
+          SELECT s.series_id, m.venue_country, COUNT(*) AS cnt
+          FROM series s
+          JOIN matches m ON m.series_id = s.series_id
+          WHERE m.venue_country IS NOT NULL AND m.venue_country <> ''
+          GROUP BY s.series_id, m.venue_country
+        ),
+        best AS (
+          SELECT DISTINCT ON (series_id) series_id, venue_country
+          FROM per_series
+          ORDER BY series_id, cnt DESC
+        )
+        UPDATE series s
+        SET host_country = b.venue_country
+        FROM best b
+        WHERE s.series_id = b.series_id
+          AND (s.host_country IS NULL OR s.host_country = '' OR s.host_country IN ('Unknown Country','Global'));
+    """)
+    conn.commit()
+
+    # 2) For any match with unknown venue country, borrow series host
+    cur.execute("""
+        UPDATE matches m
+        SET venue_country = s.host_country
+        FROM series s
+        WHERE m.series_id = s.series_id
+          AND (m.venue_country IS NULL OR m.venue_country='' OR m.venue_country IN ('Unknown Country','Global'));
+    """)
+    conn.commit()
+
+    # 3) Toss randomizer only for completed matches
+    cur.execute("""
+        SELECT match_id, team1_id, team2_id, winner_team_id, toss_winner_id, toss_decision
+        FROM matches
+        WHERE LOWER(state) = 'complete';
+    """)
+    rows = cur.fetchall()
+    for mid, t1, t2, winner, toss_id, toss_dec in rows:
+        new_toss_id, new_toss_dec = toss_id, toss_dec
+        if not new_toss_id and winner:
+            new_toss_id = random.choice([t1, t2])  # pick from teams
+        if not new_toss_dec:
+            new_toss_dec = random.choice(["bat", "bowl"])
+        if new_toss_id != toss_id or new_toss_dec != toss_dec:
+            cur.execute("""
+                UPDATE matches
+                SET toss_winner_id = %s, toss_decision = %s
+                WHERE match_id = %s
+            """, (new_toss_id, new_toss_dec, mid))
+    conn.commit()
+
+    # 4) Fill toss 'Pending' where still null & match not complete
+    cur.execute("""
+        UPDATE matches
+        SET toss_decision = 'Pending'
+        WHERE toss_decision IS NULL AND LOWER(state) <> 'complete';
+    """)
+    conn.commit()
+
+    # 5) winner_team_name final safety (never NULL)
+    cur.execute("""
+        UPDATE matches
+        SET winner_team_name = 'No Result'
+        WHERE winner_team_name IS NULL OR winner_team_name = '';
+    """)
+    conn.commit()
+
+
+# ---------------- AUDIT ----------------
+def audit(cur):
+    print("\n📊 Coverage")
+    cur.execute("""
+        SELECT COUNT(*) FILTER (WHERE start_date::date >= %s AND start_date::date <= %s) AS cnt_2024,
+               COUNT(*) AS cnt_all,
+               MIN(start_date)::date AS min_date,
+               MAX(start_date)::date AS max_date
+        FROM matches;
+    """, (START_2024, TODAY))
+    cnt_2024, cnt_all, min_dt, max_dt = cur.fetchone()
+    print(f"- matches in 2024 range: {cnt_2024}")
+    print(f"- matches total:         {cnt_all}")
+    print(f"- min(start_date):       {min_dt}")
+    print(f"- max(start_date):       {max_dt}")
+
+    print("\n🔎 Null/Empty Audit — series")
+    cur.execute("""
+        SELECT
+          COUNT(*) FILTER (WHERE host_country IS NULL OR host_country = '' OR host_country IN ('Unknown Country','Global')) AS host_country_needs_work
+        FROM series;
+    """)
+    print(dict(zip([d[0] for d in cur.description], cur.fetchone())))
+
+    print("\n🔎 Null/Empty Audit — matches")
+    cur.execute("""
+        SELECT
+          COUNT(*) FILTER (WHERE venue_country IS NULL OR venue_country = '' OR venue_country IN ('Unknown Country','Global')) AS venue_country_needs_work,
+          COUNT(*) FILTER (WHERE toss_winner_id IS NULL) AS toss_winner_missing,
+          COUNT(*) FILTER (WHERE winner_team_id IS NULL) AS winner_team_missing,
+          COUNT(*) FILTER (WHERE winner_team_name IS NULL OR winner_team_name='') AS winner_name_missing
+        FROM matches;
+    """)
+    print(dict(zip([d[0] for d in cur.description], cur.fetchone())))
+
+
+# ---------------- STAGE ----------------
+def drain_item(ctx, cur, key, context):
+    return ingest_series(cur, int(key.split(":", 1)[1]))
+
+def run(ctx):
+    conn = ctx.conn
+    cur = conn.cursor()
+
+    # 1) Live + Recent
+    upserted = ingest_live_recent(cur)
+    conn.commit()
+
+    # 2) Archives across all categories (checkpointed per series)
+    upserted += ingest_archives_all(cur, ctx)
+    conn.commit()
+
+    # 3) Post-clean pass to eliminate any remaining generic/empty values
+    post_clean(cur, conn)
+
+    # 4) Final audit printout
+    audit(cur)
+    cur.close()
+    return upserted
@@ -0,0 +1,70 @@
+# ===========================================================
+#                   Team Tables
+# ===========================================================
+import cache_bus
+from ingest.common import match_list
+from models import teams_in
+
+TABLES = ["teams"]
+
+ENDPOINTS = ["live", "recent"]
+
+# ---------------- Create Teams Table ----------------
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS teams (
+        team_id BIGINT PRIMARY KEY,
+        team_name TEXT UNIQUE NOT NULL,
+        team_sname TEXT,
+        country TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cache_bus.ensure_triggers(cur, "teams")     # dashboard caches drop edited teams
+
+# ---------------- Fetch Teams ----------------
+def fetch_teams():
+    teams_data = {}
+
+    for ep in ENDPOINTS:
+        series = match_list(ep)
+        if not series:
+            print(f"⚠ Error fetching teams from /matches/v1/{ep}")
+            continue
+
+        for team_id, team in teams_in(series).items():
+            teams_data[team_id] = {
+                "team_name": team.name,
+                "team_sname": team.short_name or None,
+                "country": team.name
+            }
+
+    return teams_data
+
+# ---------------- Insert Teams ----------------
+def insert_teams(cur, teams_data):
+    inserted, errors = 0, 0
+    for tid, info in teams_data.items():
+        try:
+            cur.execute("SAVEPOINT team_row")
+            cur.execute("""
+                INSERT INTO teams (team_id, team_name, team_sname, country)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (team_id) DO UPDATE
+                SET team_name = EXCLUDED.team_name,
+                    team_sname = EXCLUDED.team_sname,
+                    country = EXCLUDED.country
+            """, (tid, info["team_name"], info["team_sname"], info["country"]))
+            cur.execute("RELEASE SAVEPOINT team_row")
+            inserted += 1
+        except Exception as e:
+            cur.execute("ROLLBACK TO SAVEPOINT team_row")
+            print(f"⚠ Error inserting team {tid}: {e}")
+            errors += 1
+    print(f"✔ Inserted/Updated {inserted} teams, ⚠ {errors} errors.")
+    return inserted
+
+# ---------------- STAGE ----------------
+def run(ctx):
+    with ctx.conn.cursor() as cur:
+        return insert_teams(cur, fetch_teams())
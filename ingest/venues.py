@@ -0,0 +1,90 @@
+# ===========================================================
+#                 Venues Table
+# ===========================================================
+import random
+import time
+
+from ingest.common import api_get, FetchFailed
+
+TABLES = ["venues"]
+
+
+def ensure_tables(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS venues (
+        venue_id BIGINT PRIMARY KEY,
+        ground VARCHAR(200),
+        city VARCHAR(100),
+        country VARCHAR(100),
+        capacity INT,
+        established INT,
+        image_id VARCHAR(50),
+        series_id BIGINT REFERENCES series(series_id) ON DELETE CASCADE
+    );
+    """)
+
+def insert_venues(cur, series_id):
+    data = api_get(f"/series/v1/{series_id}/venues", timeout=20)
+    if not data:
+        print(f"⚠️ No venues found for series {series_id}")
+        return 0
+
+    venues = data.get("seriesVenue", [])
+    if not venues:
+        print(f"⚠️ No venue data for series {series_id}")
+        return 0
+
+    for v in venues:
+        vid = v.get("id")
+        ground = v.get("ground")
+        city = v.get("city")
+        country = v.get("country")
+        image_id = v.get("imageId")
+
+        # Assign random values ONLY if missing
+        capacity = v.get("capacity") or random.randint(10000, 60000)
+        established = v.get("established") or random.randint(1800, 2020)
+
+        print(f"➡️ Inserting Venue {vid}: {ground}, {city}, {country}, capacity={capacity}, est={established}")
+
+        cur.execute("""
+            INSERT INTO venues (venue_id, ground, city, country, capacity, established, image_id, series_id)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+            ON CONFLICT (venue_id) DO UPDATE
+              SET ground = EXCLUDED.ground,
+                  city = EXCLUDED.city,
+                  country = EXCLUDED.country,
+                  capacity = EXCLUDED.capacity,
+                  established = EXCLUDED.established,
+                  image_id = EXCLUDED.image_id,
+                  series_id = EXCLUDED.series_id;
+        """, (vid, ground, city, country, capacity, established, image_id, series_id))
+    return len(venues)
+
+# ---------------- STAGE ----------------
+def drain_item(ctx, cur, sid, context):
+    return insert_venues(cur, int(sid))
+
+def run(ctx):
+    cur = ctx.conn.cursor()
+
+    # Get all series IDs from DB
+    cur.execute("SELECT series_id FROM series;")
+    series_ids = [r[0] for r in cur.fetchall()]
+    print(f"Found {len(series_ids)} series in DB")
+
+    total = 0
+    for sid in series_ids:
+        if ctx.is_done(sid):
+            continue
+        print(f"\n📌 Processing series_id={sid}")
+        try:
+            total += insert_venues(cur, sid)
+        except FetchFailed as e:
+            ctx.defer(sid, e)
+            continue
+        ctx.mark_done(sid)   # commits the venues for this series with the checkpoint
+        time.sleep(0.5)  # rate limit
+
+    cur.close()
+    return total
@@ -1,45 +1,47 @@
 import streamlit as st
-import requests
-import pandas as pd
 from datetime import datetime
 
-# ---------------- Setup ----------------
-st.set_page_config(page_title="🏏 Cricbuzz LiveStats", layout="wide")
+import api_client
+import app_shell
+import models
+import profiler
+import scorecard_archive
 
-# 🔑 Direct API Key (hardcoded, no .env needed)
-CRICBUZZ_API_KEY = "08efb2192fmsh6c8b42b60b9495fp142a78jsn3a4095e1f60e"
-CRICBUZZ_HOST = "cricbuzz-cricket.p.rapidapi.com"
+# ---------------- Setup ----------------
+app_shell.page("live_matches")
 
 class CricbuzzAPI:
+    """Thin wrapper over api_client (shared in-flight calls + quota budget) for this page."""
+
     def __init__(self):
-        self.headers = {
-            "x-rapidapi-key": CRICBUZZ_API_KEY,
-            "x-rapidapi-host": CRICBUZZ_HOST
-        }
-        self.base_url = "https://cricbuzz-cricket.p.rapidapi.com"
+        self.key = app_shell.api_key()
+
+    def _get(self, path):
+        response = api_client.get(path, key=self.key, timeout=10)
+        response.raise_for_status()
+        app_shell.stale_caption(response)
+        return response.json()
 
     def get_live_matches(self):
         """Fetch all live matches"""
         try:
-            url = f"{self.base_url}/matches/v1/live"
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self._get("/matches/v1/live")
         except Exception as e:
             st.error(f"⚠ Error fetching live matches: {e}")
             return None
 
-    def get_scorecard(self, match_id: str):
-        """Fetch detailed scorecard by matchId"""
+    def get_scorecard(self, match_id: str, complete: bool = False):
+        """Fetch detailed scorecard by matchId (finished matches come from the local archive)"""
         try:
-            url = f"{self.base_url}/mcenter/v1/{match_id}/scard"
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return scorecard_archive.get_archive().get_or_fetch(
+                match_id, lambda: self._fetch_scorecard(match_id), complete=complete)
         except Exception as e:
             st.error(f"⚠ Error fetching scorecard: {e}")
             return None
 
+    def _fetch_scorecard(self, match_id: str):
+        return self._get(f"/mcenter/v1/{match_id}/scard")
+
 def format_time(epoch_ms):
     """Convert epoch ms to human-readable format"""
     try:
@@ -47,28 +49,31 @@ def format_time(epoch_ms):
     except:
         return "N/A"
 
-def show_innings_scorecard(api: CricbuzzAPI, match_id: str):
+def show_innings_scorecard(api: CricbuzzAPI, match: models.Match):
     """Display batting & bowling scorecard for selected match"""
-    data = api.get_scorecard(match_id)
-    if not data or "scorecard" not in data:
+    import pandas as pd
+    with profiler.span("show_innings_scorecard: fetch"):
+        data = api.get_scorecard(str(match.match_id), complete=match.complete)
+    innings_list = models.parse_scorecard(data, match) if data else []
+    if not innings_list:
         st.warning("⚠ No scorecard data available.")
         return
 
-    for i, innings in enumerate(data["scorecard"], start=1):
-        st.subheader(f"📊 Inning {i} - {innings.get('batteamname', '')}")
+    for innings in innings_list:
+        st.subheader(f"📊 Inning {innings.number} - {innings.bat_team or ''}")
 
         # 🏏 Batting Table
         batsmen_list = [
             {
-                "Batsman": b.get("name", ""),
-                "Runs": b.get("runs", 0),
-                "Balls": b.get("balls", 0),
-                "4s": b.get("fours", 0),
-                "6s": b.get("sixes", 0),
-                "SR": b.get("strkrate", 0),
-                "Out": b.get("outdec", "")
+                "Batsman": b.name,
+                "Runs": b.runs,
+                "Balls": b.balls,
+                "4s": b.fours,
+                "6s": b.sixes,
+                "SR": b.strike_rate,
+                "Out": b.dismissal or ""
             }
-            for b in innings.get("batsman", [])
+            for b in innings.batting
         ]
         batsmen_df = pd.DataFrame(batsmen_list)
         if not batsmen_df.empty:
@@ -78,14 +83,14 @@ def show_innings_scorecard(api: CricbuzzAPI, match_id: str):
         # 🎯 Bowling Table
         bowlers_list = [
             {
-                "Bowler": bl.get("name", ""),
-                "Overs": bl.get("overs", 0),
-                "Maidens": bl.get("maidens", 0),
-                "Runs": bl.get("runs", 0),
-                "Wickets": bl.get("wickets", 0),
-                "Economy": bl.get("economy", 0)
+                "Bowler": bl.name,
+                "Overs": bl.overs,
+                "Maidens": bl.maidens,
+                "Runs": bl.runs,
+                "Wickets": bl.wickets,
+                "Economy": bl.economy
             }
-            for bl in innings.get("bowler", [])
+            for bl in innings.bowling
         ]
         bowlers_df = pd.DataFrame(bowlers_list)
         if not bowlers_df.empty:
@@ -100,21 +105,18 @@ def show_live_matches():
     st.caption("📡 Real-time cricket updates with stats & scorecards")
 
     api = CricbuzzAPI()
-    data = api.get_live_matches()
+    with profiler.span("fetch live matches"):
+        data = api.get_live_matches()
 
     if not data:
         st.warning("⚠ No live matches available right now.")
         return
 
     series_options = {}
-    for type_match in data.get("typeMatches", []):
-        match_type = type_match.get("matchType", "Unknown")
-        for series in type_match.get("seriesMatches", []):
-            series_info = series.get("seriesAdWrapper", {})
-            if "matches" in series_info:
-                series_name = series_info.get("seriesName", "Unknown Series")
-                key = f"{series_name} ({match_type})"
-                series_options[key] = series_info["matches"]
+    for series in models.parse_match_list(data):
+        if series.matches:
+            key = f"{series.name or 'Unknown Series'} ({series.match_type or 'Unknown'})"
+            series_options[key] = series.matches
 
     if not series_options:
         st.warning("⚠ No active series at the moment.")
@@ -124,39 +126,28 @@ def show_live_matches():
     matches = series_options[selected_series]
 
     for match in matches:
-        match_info = match.get("matchInfo", {})
-        match_score = match.get("matchScore", {})
-
-        team1 = match_info.get("team1", {}).get("teamName", "Team 1")
-        team2 = match_info.get("team2", {}).get("teamName", "Team 2")
-        match_id = match_info.get("matchId", "")
+        team1 = match.team1.name or "Team 1"
+        team2 = match.team2.name or "Team 2"
 
         st.subheader(f"🆚 {team1} vs {team2}")
-        st.write(f"*Match:* {match_info.get('matchDesc', '')} ({match_info.get('matchFormat', '')})")
-        st.write(f"*Status:* {match_info.get('status', '')}")
-        st.write(f"*State:* {match_info.get('stateTitle', '')}")
+        st.write(f"*Match:* {match.desc} ({match.format})")
+        st.write(f"*Status:* {match.status}")
+        st.write(f"*State:* {match.state_title}")
 
-        venue = match_info.get("venueInfo", {})
-        st.write(f"*Venue:* {venue.get('ground', '')}, {venue.get('city', '')}")
-        st.write(f"*Start Time:* {format_time(match_info.get('startDate'))}")
-        st.write(f"*End Time:* {format_time(match_info.get('endDate'))}")
+        st.write(f"*Venue:* {match.venue.ground}, {match.venue.city}")
+        st.write(f"*Start Time:* {format_time(match.start_ms)}")
+        st.write(f"*End Time:* {format_time(match.end_ms)}")
 
         # Show Team Scores
-        if "team1Score" in match_score:
-            t1 = match_info.get("team1", {}).get("teamSName", "Team 1")
-            t1_inn = match_score.get("team1Score", {}).get("inngs1", {})
-            st.success(f"{t1}: {t1_inn.get('runs', 0)}/{t1_inn.get('wickets', 0)} "
-                      f"in {t1_inn.get('overs', 0)} overs")
-
-        if "team2Score" in match_score:
-            t2 = match_info.get("team2", {}).get("teamSName", "Team 2")
-            t2_inn = match_score.get("team2Score", {}).get("inngs1", {})
-            st.success(f"{t2}: {t2_inn.get('runs', 0)}/{t2_inn.get('wickets', 0)} "
-                      f"in {t2_inn.get('overs', 0)} overs")
+        for team, score in ((match.team1, match.team1_score), (match.team2, match.team2_score)):
+            if score is not None:
+                st.success(f"{team.short_name or team.name}: {score.runs}/{score.wickets} "
+                           f"in {score.overs:g} overs")
 
         # Button to show detailed scorecard
-        if st.button(f"📑 View Scorecard - {team1} vs {team2}", key=f"btn_{match_id}"):
-            show_innings_scorecard(api, match_id)
+        if st.button(f"📑 View Scorecard - {team1} vs {team2}", key=f"btn_{match.match_id}"):
+            with profiler.span("show_innings_scorecard"):
+                show_innings_scorecard(api, match)
 
         st.markdown("---")
 
@@ -0,0 +1,315 @@
+# ===========================================================
+#          Metrics — API calls, DB queries, page reruns
+# ===========================================================
+#
+# In-process counters and latency histograms shared by every page that runs
+# in the same Streamlit server process. Exposed in Prometheus text format on
+# METRICS_PORT (disabled when unset) and, optionally, as an admin panel in the
+# sidebar (CRICBUZZ_ADMIN=1).
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# ---------------- Config ----------------
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))          # 0 = no HTTP endpoint
+ADMIN_PANEL = os.getenv("CRICBUZZ_ADMIN", "0") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_counters = {}      # (name, labels) -> float
+_histograms = {}    # (name, labels) -> Histogram
+_server = None
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)   # last slot = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate quantile: upper bound of the bucket holding the q-th sample."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# ---------------- Recording ----------------
+def inc(name, value=1, **labels):
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def observe(name, value, **labels):
+    k = _key(name, labels)
+    with _lock:
+        h = _histograms.get(k)
+        if h is None:
+            h = _histograms[k] = Histogram()
+        h.observe(value)
+
+
+def histogram(name, **labels):
+    """Snapshot lookup of a single histogram (None if never observed)."""
+    with _lock:
+        return _histograms.get(_key(name, labels))
+
+
+_ID_SEGMENT = re.compile(r"^\d+$")
+
+def endpoint_label(url):
+    """'/mcenter/v1/12345/scard?x=1' -> '/mcenter/v1/{id}/scard' (bounded label cardinality)."""
+    path = urlsplit(url).path or url
+    return "/".join("{id}" if _ID_SEGMENT.match(p) else p for p in path.split("/"))
+
+
+# ---------------- HTTP client ----------------
+def http_get(url, **kwargs):
+    """Drop-in for requests.get that records latency, status, 429s and bytes per endpoint."""
+    import requests                 # deferred: pages that never call the API skip the import
+
+    endpoint = endpoint_label(url)
+    start = time.perf_counter()
+    try:
+        r = requests.get(url, **kwargs)
+    except Exception:
+        observe("cricbuzz_api_latency_seconds", time.perf_counter() - start, endpoint=endpoint)
+        inc("cricbuzz_api_requests_total", endpoint=endpoint, status="error")
+        inc("cricbuzz_api_errors_total", endpoint=endpoint)
+        raise
+    observe("cricbuzz_api_latency_seconds", time.perf_counter() - start, endpoint=endpoint)
+    inc("cricbuzz_api_requests_total", endpoint=endpoint, status=str(r.status_code))
+    inc("cricbuzz_api_response_bytes_total", len(r.content or b""), endpoint=endpoint)
+    if r.status_code == 429:
+        inc("cricbuzz_api_rate_limited_total", endpoint=endpoint)
+    if r.status_code >= 400:
+        inc("cricbuzz_api_errors_total", endpoint=endpoint)
+    return r
+
+
+# ---------------- DB queries ----------------
+class _QueryRun:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = 0
+
+
+@contextmanager
+def track_query(name):
+    """
+    Time a DB round-trip under a stable name (the QUERIES key, or the helper name).
+    Set `.rows` on the yielded object to record rows transferred.
+    """
+    run = _QueryRun()
+    start = time.perf_counter()
+    try:
+        yield run
+    except Exception:
+        inc("cricbuzz_db_query_errors_total", query=name)
+        raise
+    finally:
+        observe("cricbuzz_db_query_seconds", time.perf_counter() - start, query=name)
+        inc("cricbuzz_db_queries_total", query=name)
+        inc("cricbuzz_db_rows_total", run.rows, query=name)
+
+
+# ---------------- Caches ----------------
+def cache_lookup(cache):
+    """Call at the call site of a cached function."""
+    inc("cricbuzz_cache_lookups_total", cache=cache)
+
+
+def cache_miss(cache):
+    """Call inside the cached function body (only runs on a miss)."""
+    inc("cricbuzz_cache_misses_total", cache=cache)
+
+
+# ---------------- Page reruns ----------------
+def script_control_exceptions():
+    """Streamlit's control-flow exceptions (RerunException, StopException)."""
+    try:
+        from streamlit.runtime.scriptrunner_utils.exceptions import ScriptControlException
+    except ImportError:
+        try:
+            from streamlit.runtime.scriptrunner.exceptions import ScriptControlException
+        except ImportError:
+            return ()
+    return ScriptControlException
+
+
+@contextmanager
+def track_page(page):
+    """Wrap one top-to-bottom Streamlit script run (st.rerun() / st.stop() are not errors)."""
+    start_http_server()
+    start = time.perf_counter()
+    try:
+        yield
+    except script_control_exceptions():
+        raise
+    except Exception:
+        inc("cricbuzz_page_errors_total", page=page)
+        raise
+    finally:
+        observe("cricbuzz_page_run_seconds", time.perf_counter() - start, page=page)
+        inc("cricbuzz_page_runs_total", page=page)
+    if ADMIN_PANEL:
+        render_admin_panel()
+
+
+# ---------------- Prometheus exposition ----------------
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    with _lock:
+        counters = sorted(_counters.items())
+        hists = sorted((k, (list(h.counts), h.total, h.count)) for k, h in _histograms.items())
+
+    lines, typed = [], set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+
+    for (name, labels), (counts, total, count) in hists:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for upper, c in zip(LATENCY_BUCKETS + ("+Inf",), counts):
+            cumulative += c
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', upper)])} {cumulative}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(port=None):
+    """Start the /metrics endpoint once per process (no-op when METRICS_PORT is unset)."""
+    global _server
+    port = METRICS_PORT if port is None else port
+    if not port or _server is not None:
+        return
+    with _lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        except OSError:
+            # another worker in this host already serves the port
+            _server = False
+            return
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+
+
+# ---------------- Admin panel ----------------
+def summary_rows(prefix, label):
+    """Per-label summary (count, error %, 429 %, p50/p95, cache hit %, rows) for the admin panel."""
+    with _lock:
+        counters = dict(_counters)
+        hists = dict(_histograms)
+
+    def total(name, value, **extra):
+        return sum(v for (n, lbl), v in counters.items()
+                   if n == name and dict(lbl).get(label) == value
+                   and all(dict(lbl).get(k) == x for k, x in extra.items()))
+
+    rows = []
+    for (name, labels), h in sorted(hists.items()):
+        if not name.startswith(prefix):
+            continue
+        value = dict(labels).get(label)
+        row = {label: value, "count": h.count,
+               "p50 ms": round((h.quantile(0.5) or 0) * 1000, 1),
+               "p95 ms": round((h.quantile(0.95) or 0) * 1000, 1),
+               "avg ms": round(h.total / h.count * 1000, 1) if h.count else 0}
+        if prefix == "cricbuzz_api":
+            row["error %"] = round(100 * total("cricbuzz_api_errors_total", value) / h.count, 1)
+            row["429 %"] = round(100 * total("cricbuzz_api_rate_limited_total", value) / h.count, 1)
+            row["KB"] = round(total("cricbuzz_api_response_bytes_total", value) / 1024, 1)
+        elif prefix == "cricbuzz_db":
+            row["errors"] = int(total("cricbuzz_db_query_errors_total", value))
+            row["rows"] = int(total("cricbuzz_db_rows_total", value))
+        rows.append(row)
+    return rows
+
+
+def cache_rows():
+    with _lock:
+        counters = dict(_counters)
+    lookups = {dict(l)["cache"]: v for (n, l), v in counters.items() if n == "cricbuzz_cache_lookups_total"}
+    misses = {dict(l)["cache"]: v for (n, l), v in counters.items() if n == "cricbuzz_cache_misses_total"}
+    return [{"cache": c, "lookups": int(n), "misses": int(misses.get(c, 0)),
+             "hit %": round(100 * (1 - misses.get(c, 0) / n), 1) if n else 0.0}
+            for c, n in sorted(lookups.items())]
+
+
+def render_admin_panel():
+    import streamlit as st
+
+    with st.sidebar.expander("📈 Metrics (admin)"):
+        for title, prefix, label in (("API", "cricbuzz_api", "endpoint"),
+                                     ("DB", "cricbuzz_db", "query"),
+                                     ("Pages", "cricbuzz_page", "page")):
+            rows = summary_rows(prefix, label)
+            if rows:
+                st.caption(title)
+                st.dataframe(rows, use_container_width=True)
+        rows = cache_rows()
+        if rows:
+            st.caption("Caches")
+            st.dataframe(rows, use_container_width=True)
+        if METRICS_PORT:
+            st.caption(f"Prometheus: http://127.0.0.1:{METRICS_PORT}/metrics")
@@ -0,0 +1,566 @@
+# ===========================================================
+#        Cricbuzz payload model (slotted dataclasses)
+# ===========================================================
+#
+# One parser per endpoint, shared by the live page and every loader:
+#
+#   parse_match_list(payload)       /matches/v1/{live,recent,completed}  -> [Series]
+#   parse_series_detail(payload)    /series/v1/{id}                      -> Series
+#   parse_match_info(info)          a matchInfo dict (listing, archive, fetch queue) -> Match
+#   parse_scorecard(payload, match) /mcenter/v1/{id}/scard               -> [Innings]
+#   parse_commentary(payload, match) /mcenter/v1/{id}/comm, hcomm        -> ([Delivery], LiveState)
+#
+# Each parser walks the raw JSON once and keeps only the fields we use, instead of
+# every consumer lower-casing a full copy (norm) and re-walking it with .get()
+# chains. Keys are looked up as the API spells them (camelCase) and lower-cased,
+# since older archive records and fetch queue contexts were stored normalised.
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+_SCORE_RX = re.compile(r"(\d+)(?:/(\d+))?")
+
+
+# ---------------- Helpers ----------------
+def _get(d, *names):
+    """First non-empty value among `names` (each tried as spelled and lower-cased)."""
+    if not isinstance(d, dict):
+        return None
+    for n in names:
+        v = d.get(n)
+        if v is None:
+            v = d.get(n.lower())
+        if v is not None and v != "":
+            return v
+    return None
+
+
+def _int(x):
+    try:
+        return int(x)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return None
+
+
+def _name(s):
+    return (s or "").replace("†", "").strip()
+
+
+def _items(v):
+    """List payloads as-is; dict-keyed ones ({"bat_1": {...}, ...}) in key order."""
+    if isinstance(v, list):
+        return v
+    if isinstance(v, dict):
+        return [v[k] for k in sorted(v, key=lambda k: (len(str(k)), str(k)))]
+    return []
+
+
+def _ms_to_ts(ms):
+    ms = _int(ms)
+    return datetime.fromtimestamp(ms / 1000) if ms else None
+
+
+# ---------------- Model ----------------
+@dataclass(slots=True)
+class Team:
+    id: Optional[int] = None
+    name: str = ""
+    short_name: str = ""
+
+
+@dataclass(slots=True)
+class Venue:
+    id: Optional[int] = None
+    ground: str = ""
+    city: str = ""
+    country: str = ""
+
+
+@dataclass(slots=True)
+class InningsScore:
+    runs: int = 0
+    wickets: int = 0
+    overs: float = 0.0
+
+
+@dataclass(slots=True)
+class Match:
+    match_id: int
+    series_id: Optional[int] = None
+    series_name: str = ""
+    desc: str = ""
+    format: str = ""
+    start_ms: Optional[int] = None
+    end_ms: Optional[int] = None
+    state: str = ""
+    status: str = ""
+    state_title: str = ""
+    team1: Team = field(default_factory=Team)
+    team2: Team = field(default_factory=Team)
+    venue: Venue = field(default_factory=Venue)
+    team1_score: Optional[InningsScore] = None      # first innings from matchScore (listings only)
+    team2_score: Optional[InningsScore] = None
+
+    @property
+    def start_ts(self):
+        return _ms_to_ts(self.start_ms)
+
+    @property
+    def end_ts(self):
+        return _ms_to_ts(self.end_ms)
+
+    @property
+    def start_date(self):
+        ts = self.start_ts
+        return ts.date() if ts else None
+
+    @property
+    def complete(self):
+        return self.state.lower() == "complete"
+
+    def other_team(self, name):
+        """The opponent of team `name` in this match, or None."""
+        if name and self.team1.name and self.team2.name:
+            if name == self.team1.name:
+                return self.team2
+            if name == self.team2.name:
+                return self.team1
+        return None
+
+    def team_id(self, name):
+        if name:
+            for t in (self.team1, self.team2):
+                if t.id and t.name and t.name.lower() == name.lower():
+                    return t.id
+        return None
+
+    def to_info(self):
+        """camelCase matchInfo for the archive / fetch queue; parse_match_info() reads it back."""
+        def team(t):
+            return {"teamId": t.id, "teamName": t.name, "teamSName": t.short_name}
+        return {
+            "matchId": self.match_id, "seriesId": self.series_id, "seriesName": self.series_name,
+            "matchDesc": self.desc, "matchFormat": self.format,
+            "startDate": self.start_ms, "endDate": self.end_ms,
+            "state": self.state, "status": self.status, "stateTitle": self.state_title,
+            "team1": team(self.team1), "team2": team(self.team2),
+            "venueInfo": {"id": self.venue.id, "ground": self.venue.ground,
+                          "city": self.venue.city, "country": self.venue.country},
+        }
+
+
+@dataclass(slots=True)
+class Series:
+    id: Optional[int] = None
+    name: str = ""
+    category: str = ""
+    match_type: str = ""            # listing group: International / League / Domestic / Women
+    start_ms: Optional[int] = None
+    end_ms: Optional[int] = None
+    host_country: str = ""
+    format: str = ""
+    total_matches: Optional[int] = None
+    matches: List[Match] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class BattingEntry:
+    player_id: Optional[int]
+    name: str
+    runs: int = 0
+    balls: int = 0
+    fours: int = 0
+    sixes: int = 0
+    strike_rate: float = 0.0
+    dismissal: Optional[str] = None     # None while not out
+    position: int = 0
+
+    @property
+    def is_out(self):
+        return bool(self.dismissal)
+
+
+@dataclass(slots=True)
+class BowlingEntry:
+    player_id: Optional[int]
+    name: str
+    overs: float = 0.0
+    maidens: int = 0
+    runs: int = 0
+    wickets: int = 0
+    economy: float = 0.0
+
+
+@dataclass(slots=True)
+class Partnership:
+    wicket_number: int
+    batsman1: str
+    batsman2: str
+    runs: int = 0
+    balls: int = 0
+
+
+@dataclass(slots=True)
+class Innings:
+    innings_id: int
+    number: int
+    bat_team: Optional[str] = None
+    bat_team_id: Optional[int] = None
+    bowl_team: Optional[str] = None
+    bowl_team_id: Optional[int] = None
+    runs: int = 0
+    wickets: int = 0
+    overs: float = 0.0
+    batting: List[BattingEntry] = field(default_factory=list)
+    bowling: List[BowlingEntry] = field(default_factory=list)
+    partnerships: List[Partnership] = field(default_factory=list)    # as reported by the API
+
+
+@dataclass(slots=True)
+class Delivery:
+    innings_id: int
+    ball_nbr: int                       # delivery sequence within the innings, extras included
+    over: float                         # 19.4 = fourth ball of the 20th over
+    timestamp_ms: Optional[int] = None
+    bowler: str = ""                    # short names as written in the commentary
+    batter: str = ""
+    runs: int = 0                       # off the bat
+    extras: int = 0
+    extra_type: str = ""                # wd | nb | b | lb
+    wicket: bool = False
+    batting: Optional[BattingEntry] = None     # striker's / bowler's figures after the ball,
+    bowling: Optional[BowlingEntry] = None     # when the item carries them
+
+
+@dataclass(slots=True)
+class LiveState:
+    """The miniscore of a commentary payload: where the match stands right now."""
+    innings_id: Optional[int] = None
+    state: str = ""
+    innings: List[Innings] = field(default_factory=list)           # totals only
+    batting: List[BattingEntry] = field(default_factory=list)      # striker, non-striker
+    bowling: List[BowlingEntry] = field(default_factory=list)      # current bowler, the other end
+    last_wicket: Optional[BattingEntry] = None                     # name + final runs/balls + dismissal
+
+    @property
+    def complete(self):
+        return self.state.lower() == "complete"
+
+
+# ---------------- Matches ----------------
+def _team(d):
+    return Team(_int(_get(d, "teamId", "id")), _name(_get(d, "teamName", "name")),
+                _get(d, "teamSName", "shortName") or "")
+
+
+def _score(d):
+    inn = _get(d, "inngs1")
+    if not inn:
+        return None
+    return InningsScore(_int(_get(inn, "runs")) or 0, _int(_get(inn, "wickets")) or 0,
+                        _float(_get(inn, "overs")) or 0.0)
+
+
+def parse_match_info(info, score=None):
+    """matchInfo dict (as listed, or as stored by to_info / older normalised copies) -> Match, None without an id."""
+    mid = _int(_get(info, "matchId"))
+    if not mid:
+        return None
+    venue = _get(info, "venueInfo") or {}
+    return Match(
+        match_id=mid,
+        series_id=_int(_get(info, "seriesId")),
+        series_name=_get(info, "seriesName") or "",
+        desc=_get(info, "matchDesc") or "",
+        format=_get(info, "matchFormat") or "",
+        start_ms=_int(_get(info, "startDate")),
+        end_ms=_int(_get(info, "endDate")),
+        state=_get(info, "state") or "",
+        status=_get(info, "status") or "",
+        state_title=_get(info, "stateTitle") or "",
+        team1=_team(_get(info, "team1")),
+        team2=_team(_get(info, "team2")),
+        venue=Venue(_int(_get(venue, "id")), _get(venue, "ground") or "",
+                    _get(venue, "city") or "", _get(venue, "country") or ""),
+        team1_score=_score(_get(score, "team1Score")),
+        team2_score=_score(_get(score, "team2Score")),
+    )
+
+
+def _matches(entries):
+    out = []
+    for m in entries or []:
+        info = _get(m, "matchInfo") or m        # series detail may list matchInfo fields directly
+        match = parse_match_info(info, _get(m, "matchScore"))
+        if match is not None:
+            out.append(match)
+    return out
+
+
+def _series(d, match_type="", matches=()):
+    host = _get(d, "host")
+    return Series(
+        id=_int(_get(d, "seriesId", "id")),
+        name=_get(d, "seriesName", "name") or "",
+        category=_get(d, "seriesCategory", "type") or "",
+        match_type=match_type,
+        start_ms=_int(_get(d, "startDt")),
+        end_ms=_int(_get(d, "endDt")),
+        host_country=(_get(host, "countryName") or "") if isinstance(host, dict) else "",
+        format=_get(d, "seriesFormat") or "",
+        total_matches=_int(_get(d, "totalMatches")),
+        matches=list(matches),
+    )
+
+
+def parse_match_list(payload):
+    """typeMatches -> seriesMatches -> seriesAdWrapper -> matches, flattened to one Series per wrapper (ads skipped)."""
+    out = []
+    for tm in _get(payload, "typeMatches") or []:
+        match_type = _get(tm, "matchType") or ""
+        for sm in _get(tm, "seriesMatches") or []:
+            wrap = _get(sm, "seriesAdWrapper") or sm
+            matches = _matches(_get(wrap, "matches"))
+            series = _series(wrap, match_type, matches)
+            if series.id or matches:
+                for m in matches:
+                    m.series_id = m.series_id or series.id
+                    m.series_name = m.series_name or series.name
+                out.append(series)
+    return out
+
+
+def parse_series_detail(payload, series_id=None):
+    """Series detail with matches from any of its shapes: matches, matchDetailsMap[].match, seriesMatches[].seriesAdWrapper.matches."""
+    entries = list(_get(payload, "matches") or [])
+    for grp in _get(payload, "matchDetailsMap") or []:
+        entries.extend(_get(grp, "match") or [])
+    for sm in _get(payload, "seriesMatches") or []:
+        entries.extend(_get(_get(sm, "seriesAdWrapper"), "matches") or [])
+    series = _series(payload or {}, matches=_matches(entries))
+    series.id = series.id or _int(series_id)
+    return series
+
+
+def teams_in(series_list):
+    """{team_id: Team} across all matches of parsed listings."""
+    teams = {}
+    for s in series_list:
+        for m in s.matches:
+            for t in (m.team1, m.team2):
+                if t.id and t.name:
+                    teams[t.id] = t
+    return teams
+
+
+# ---------------- Scorecard ----------------
+def _batting(rows):
+    out = []
+    for pos, b in enumerate(_items(rows), start=1):
+        out.append(BattingEntry(
+            player_id=_int(_get(b, "id", "playerId", "player_id", "batId")) or None,
+            name=_name(_get(b, "name", "batName")),
+            runs=_int(_get(b, "runs", "batRuns")) or 0,
+            balls=_int(_get(b, "balls", "batBalls")) or 0,
+            fours=_int(_get(b, "fours", "batFours")) or 0,
+            sixes=_int(_get(b, "sixes", "batSixes")) or 0,
+            strike_rate=_float(_get(b, "strkRate", "strikeRate", "batStrikeRate")) or 0.0,
+            dismissal=_get(b, "outDec", "outDesc", "outText"),
+            position=_int(_get(b, "batting_position", "position", "pos")) or pos,
+        ))
+    return out
+
+
+def _bowling(rows):
+    return [BowlingEntry(
+        player_id=_int(_get(b, "id", "playerId", "player_id", "bowlId")) or None,
+        name=_name(_get(b, "name", "bowlName")),
+        overs=_float(_get(b, "overs", "bowlOvs")) or 0.0,
+        maidens=_int(_get(b, "maidens", "bowlMaidens")) or 0,
+        runs=_int(_get(b, "runs", "bowlRuns")) or 0,
+        wickets=_int(_get(b, "wickets", "bowlWkts")) or 0,
+        economy=_float(_get(b, "economy", "bowlEcon")) or 0.0,
+    ) for b in _items(rows)]
+
+
+def _partnerships(rows):
+    return [Partnership(
+        wicket_number=_int(_get(p, "wicketNo", "wktNo")) or i,
+        batsman1=_name(_get(p, "batsman1Name", "bat1Name")) or "Unknown",
+        batsman2=_name(_get(p, "batsman2Name", "bat2Name")) or "Unknown",
+        runs=_int(_get(p, "runs", "totalRuns")) or 0,
+        balls=_int(_get(p, "balls", "totalBalls")) or 0,
+    ) for i, p in enumerate(_items(rows), start=1)]
+
+
+def _side(inns, side):
+    """(id, name) of the batting ('bat') or bowling ('bowl') team from any of the known shapes."""
+    details = _get(inns, f"{side}TeamDetails") or {}
+    team = _get(inns, f"{side}Team")
+    team = team if isinstance(team, dict) else {}
+    name = (_get(details, f"{side}TeamName") or _get(inns, f"{side}TeamName")
+            or _get(team, "name") or _get(inns, f"{side}TeamShortName"))
+    tid = (_int(_get(details, f"{side}TeamId")) or _int(_get(inns, f"{side}TeamId"))
+           or _int(_get(team, "id")))
+    return tid, _name(name) or None
+
+
+def _totals(inns):
+    src = _get(inns, "scoreDetails") or inns
+    runs, wkts, overs = _int(_get(src, "runs")), _int(_get(src, "wickets")), _float(_get(src, "overs"))
+    score = _get(inns, "score")
+    if (runs is None or wkts is None) and score:
+        m = _SCORE_RX.search(str(score))
+        if m:
+            runs = int(m.group(1)) if runs is None else runs
+            wkts = int(m.group(2) or 0) if wkts is None else wkts
+    return runs or 0, wkts or 0, overs or 0.0
+
+
+def parse_scorecard(payload, match=None):
+    """
+    scard payload -> [Innings]. Team names / ids missing from an innings are
+    filled from `match` (the other side of the known one, ids by name).
+    """
+    out = []
+    for i, inns in enumerate(_get(payload, "scorecard", "scoreCard", "scorecards") or [], start=1):
+        bat_id, bat = _side(inns, "bat")
+        bowl_id, bowl = _side(inns, "bowl")
+        if match is not None:
+            if bat and not bowl:
+                bowl = (match.other_team(bat) or Team()).name or None
+            elif bowl and not bat:
+                bat = (match.other_team(bowl) or Team()).name or None
+            bat_id = bat_id or match.team_id(bat)
+            bowl_id = bowl_id or match.team_id(bowl)
+        runs, wkts, overs = _totals(inns)
+        out.append(Innings(
+            innings_id=_int(_get(inns, "inningsId")) or i,
+            number=i,
+            bat_team=bat, bat_team_id=bat_id,
+            bowl_team=bowl, bowl_team_id=bowl_id,
+            runs=runs, wickets=wkts, overs=overs,
+            batting=_batting(_get(inns, "batsman", "batsmenData")
+                             or _get(_get(inns, "batTeamDetails"), "batsmenData")),
+            bowling=_bowling(_get(inns, "bowler", "bowlersData")
+                             or _get(_get(inns, "bowlTeamDetails"), "bowlersData")),
+            partnerships=_partnerships(_get(inns, "partnershipsData", "partnerships")),
+        ))
+    return out
+
+
+# ---------------- Commentary ----------------
+_BALL_RX = re.compile(r"^\s*(.+?) to ([^,]+),\s*(.*)$", re.S)
+_RUNS_RX = re.compile(r"^(\d+) (?:runs?|wides?)")
+_LAST_WICKET_RX = re.compile(
+    r"^(.+?)\s+((?:c |st |b |lbw|run out|hit wicket|retired|obstruct|handled|timed out).*?)"
+    r"\s+(\d+)\((\d+)\)")
+
+
+def _comm_text(c):
+    """commText with its formatting placeholders ("B0$") replaced by their values."""
+    text = _get(c, "commText") or ""
+    formats = _get(c, "commentaryFormats")
+    for fmt in (formats.values() if isinstance(formats, dict) else formats or []):
+        if isinstance(fmt, dict):
+            for k, v in zip(_get(fmt, "formatId") or [], _get(fmt, "formatValue") or []):
+                text = text.replace(str(k), str(v))
+    return text
+
+
+def _runs(s):
+    s = s.strip(" ,")
+    if s.startswith("four"):
+        return 4
+    if s.startswith("six"):
+        return 6
+    m = _RUNS_RX.match(s)
+    return int(m.group(1)) if m else 0
+
+
+def _ball_result(result, event):
+    """(bat runs, extras, extra type, wicket) from the "<result>, ..." part of a ball's text."""
+    r = result.lower().strip()
+    wicket = "wicket" in (event or "").lower() or r.startswith("out")
+    if r.startswith("wide") or re.match(r"\d+ wides", r):
+        return 0, _runs(r) or 1, "wd", wicket
+    if r.startswith("no ball"):
+        return _runs(r[len("no ball"):]), 1, "nb", wicket
+    for prefix, kind in (("leg byes", "lb"), ("byes", "b")):
+        if r.startswith(prefix):
+            return 0, _runs(r[len(prefix):]), kind, wicket
+    return (0 if wicket else _runs(r)), 0, "", wicket
+
+
+def _delivery(c):
+    ball, over, inn = _int(_get(c, "ballNbr")), _float(_get(c, "overNumber")), _int(_get(c, "inningsId"))
+    if not ball or over is None or not inn:
+        return None                     # over summaries, pre-match and break text
+    m = _BALL_RX.match(_comm_text(c))
+    bowler, batter, result = m.groups() if m else ("", "", "")
+    runs, extras, kind, wicket = _ball_result(result, _get(c, "event"))
+    striker, current = _get(c, "batsmanStriker"), _get(c, "bowlerStriker")
+    return Delivery(
+        innings_id=inn, ball_nbr=ball, over=over, timestamp_ms=_int(_get(c, "timestamp")),
+        bowler=_name(bowler), batter=_name(batter),
+        runs=runs, extras=extras, extra_type=kind, wicket=wicket,
+        batting=_batting([striker])[0] if _get(striker, "batId") else None,
+        bowling=_bowling([current])[0] if _get(current, "bowlId") else None,
+    )
+
+
+def _last_wicket(text):
+    """"Santner c Rohit b Pandya 9(7) - 160/8 in 18.3 ov." -> BattingEntry (no id)."""
+    m = _LAST_WICKET_RX.match(text or "")
+    if not m:
+        return None
+    return BattingEntry(None, _name(m.group(1)), runs=int(m.group(3)), balls=int(m.group(4)),
+                        dismissal=m.group(2).strip())
+
+
+def parse_commentary(payload, match=None):
+    """
+    comm / hcomm payload -> ([Delivery] in (innings, ball) order, LiveState). Team
+    names in the innings totals are short names; `match` maps them to its teams.
+    """
+    deliveries = [d for d in map(_delivery, _get(payload, "commentaryList") or []) if d is not None]
+    deliveries.sort(key=lambda d: (d.innings_id, d.ball_nbr))
+
+    mini = _get(payload, "miniscore") or {}
+    details = _get(mini, "matchScoreDetails") or {}
+    innings = []
+    scores = sorted(_get(details, "inningsScoreList") or [], key=lambda s: _int(_get(s, "inningsId")) or 0)
+    for i, s in enumerate(scores, start=1):
+        bat_id, bat = _int(_get(s, "batTeamId")), _name(_get(s, "batTeamName")) or None
+        bowl_id, bowl = None, None
+        if match is not None:
+            for t, other in ((match.team1, match.team2), (match.team2, match.team1)):
+                if (bat_id and bat_id == t.id) or (bat and bat in (t.name, t.short_name)):
+                    bat_id, bat, bowl_id, bowl = t.id or bat_id, t.name or bat, other.id, other.name or None
+                    break
+        innings.append(Innings(
+            innings_id=_int(_get(s, "inningsId")) or i, number=i,
+            bat_team=bat, bat_team_id=bat_id, bowl_team=bowl, bowl_team_id=bowl_id,
+            runs=_int(_get(s, "score")) or 0, wickets=_int(_get(s, "wickets")) or 0,
+            overs=_float(_get(s, "overs")) or 0.0,
+        ))
+    live = LiveState(
+        innings_id=_int(_get(mini, "inningsId")),
+        state=_get(details, "state") or "",
+        innings=innings,
+        batting=[b for b in _batting([_get(mini, "batsmanStriker"), _get(mini, "batsmanNonStriker")])
+                 if b.player_id],
+        bowling=[b for b in _bowling([_get(mini, "bowlerStriker"), _get(mini, "bowlerNonStriker")])
+                 if b.player_id],
+        last_wicket=_last_wicket(_get(mini, "lastWicket")),
+    )
+    return deliveries, live
@@ -0,0 +1,108 @@
+# ===========================================================
+#              Per-rerun profiler (opt-in)
+# ===========================================================
+#
+# Enable with CRICBUZZ_PROFILE=1 (every rerun) or ?profile=1 in the page URL
+# (that session only). Each rerun writes a cProfile dump plus a span
+# breakdown to PROFILE_DIR and shows the breakdown at the bottom of the page.
+# When disabled, span() costs one attribute lookup.
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_ENV = os.getenv("CRICBUZZ_PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv("CRICBUZZ_PROFILE_DIR", "profiles")
+
+# Streamlit runs each session's script in its own thread
+_local = threading.local()
+
+
+def _requested():
+    if PROFILE_ENV:
+        return True
+    try:
+        import streamlit as st
+        return st.query_params.get("profile") == "1"
+    except Exception:
+        return False
+
+
+@contextmanager
+def span(label):
+    """Time a labelled section of the current rerun (no-op unless profiling)."""
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        yield
+        return
+    depth = _local.depth
+    _local.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        spans.append((label, depth, start, time.perf_counter() - start))
+
+
+@contextmanager
+def profile_rerun(page):
+    """Profile one script run of `page` when profiling is enabled."""
+    if not _requested():
+        yield
+        return
+
+    _local.spans, _local.depth = [], 0
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError:
+        # another session's rerun holds the interpreter-wide profiler; keep spans only
+        prof = None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if prof is not None:
+            prof.disable()
+        total = time.perf_counter() - start
+        spans = _local.spans
+        _local.spans = None
+        path = _write(page, prof, spans, total)
+        _render(page, spans, total, path)
+
+
+def _ordered(spans):
+    # spans are recorded on exit, so children precede parents; report them in start order
+    return sorted(spans, key=lambda s: s[2])
+
+
+def _write(page, prof, spans, total):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    base = os.path.join(PROFILE_DIR, f"{page}-{stamp}")
+    if prof is not None:
+        prof.dump_stats(base + ".prof")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({"page": page, "total_s": round(total, 6),
+                   "spans": [{"label": l, "depth": d, "seconds": round(s, 6)} for l, d, _, s in _ordered(spans)]},
+                  f, indent=2)
+    return base
+
+
+def _render(page, spans, total, path):
+    try:
+        import streamlit as st
+    except Exception:
+        return
+    with st.expander(f"⏱ Rerun profile — {page}: {total * 1000:.1f} ms"):
+        st.dataframe(
+            [{"section": "  " * d + l, "ms": round(s * 1000, 1), "% of run": round(100 * s / total, 1) if total else 0}
+             for l, d, _, s in _ordered(spans)],
+            use_container_width=True,
+        )
+        st.caption(f"Saved to {path}.prof / .json  (inspect with `python -m pstats` or snakeviz)")
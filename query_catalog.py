@@ -0,0 +1,339 @@
+# ===========================================================
+#        Analytics query catalogue (typed, parameterized)
+# ===========================================================
+#
+# Each query is plain SQL with $1..$n placeholders plus the typed parameters
+# that fill them. sql_queries.py renders the parameters as widgets and runs
+# the SQL as a server-side prepared statement (db.execute_prepared), so a
+# different country / format / threshold reuses the same plan instead of
+# being a new query string, and variants need no code edits.
+#
+# matches and the scorecard tables are partitioned by year (ingest/partitions.py):
+# date bounds go on matches.start_date and on the scorecard's own match_date, so
+# both sides of a join are pruned to the seasons asked for.
+
+from datetime import date
+
+FORMATS = ["Test", "ODI", "T20I", "IPL"]
+
+
+class Param:
+    # kind -> Postgres type of the placeholder
+    PG_TYPES = {"text": "text", "choice": "text", "multi": "text[]",
+                "int": "int", "float": "numeric", "date": "date"}
+
+    def __init__(self, name, kind, default, label=None, options=None, min_value=None, max_value=None):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.label = label or name.replace("_", " ").capitalize()
+        self.options = options
+        self.min_value = min_value
+        self.max_value = max_value
+
+    @property
+    def pg_type(self):
+        return self.PG_TYPES[self.kind]
+
+    def coerce(self, value):
+        """Widget value -> the Python value bound to the placeholder."""
+        if self.kind == "int":
+            return int(value)
+        if self.kind == "float":
+            return float(value)
+        if self.kind == "multi":
+            return list(value)
+        return value
+
+
+class Query:
+    def __init__(self, sql, *params, timeout=None):
+        self.sql = sql.strip().rstrip(";")
+        self.params = params
+        self.timeout = timeout          # seconds; None = query_executor's analytics default
+
+    @property
+    def types(self):
+        return tuple(p.pg_type for p in self.params)
+
+    def defaults(self):
+        return {p.name: p.default for p in self.params}
+
+    def bind(self, values):
+        """{name: value} -> positional args for $1..$n (defaults fill the gaps)."""
+        return tuple(p.coerce(values.get(p.name, p.default)) for p in self.params)
+
+
+# ---------- ALL 25 QUERIES ----------
+QUERIES = {
+    "Q1. Players from a country": Query("""
+    SELECT full_name, role, batting_style, bowling_style
+    FROM players
+    JOIN teams ON players.team_id = teams.team_id
+    WHERE teams.country = $1
+    """, Param("country", "text", "India")),
+
+    "Q2. Matches played in last few days": Query("""
+    SELECT match_desc, team1_name, team2_name, venue_name, venue_city, start_date
+    FROM matches
+    WHERE start_date >= CURRENT_DATE - make_interval(days => $1)
+    ORDER BY start_date DESC
+    """, Param("days", "int", 7, "Last N days", min_value=1, max_value=3650)),
+
+    "Q3. Top run scorers by format": Query("""
+    SELECT player_name, runs, batting_average, hundreds
+    FROM player_master_stats
+    WHERE format = $1
+    ORDER BY runs DESC
+    LIMIT $2
+    """, Param("format", "choice", "ODI", options=FORMATS),
+         Param("top_n", "int", 10, "Top N", min_value=1, max_value=500)),
+
+    "Q4. Venues above a capacity": Query("""
+    SELECT ground, city, country, capacity
+    FROM venues
+    WHERE capacity > $1
+    ORDER BY capacity DESC
+    """, Param("min_capacity", "int", 30000, "Capacity above", min_value=0, max_value=200000)),
+
+    "Q5. Matches won by each team": Query("""
+    SELECT winner_team_name, COUNT(*) AS total_wins
+    FROM matches
+    WHERE winner_team_name != 'No Result'
+    GROUP BY winner_team_name
+    ORDER BY total_wins DESC
+    """),
+
+    "Q6. Count players by role": Query("""
+    SELECT role, COUNT(*) AS total_players
+    FROM players
+    GROUP BY role
+    """),
+
+    "Q7. Highest individual score by format": Query("""
+    SELECT format, MAX(highest_score) AS highest_score
+    FROM player_master_stats
+    GROUP BY format
+    """),
+
+    "Q8. Series started in a year": Query("""
+    SELECT series_name, host_country, series_type, start_date, total_matches
+    FROM series
+    WHERE start_date >= make_date($1, 1, 1) AND start_date < make_date($1 + 1, 1, 1)
+    """, Param("year", "int", 2024, min_value=1877, max_value=2100)),
+
+    "Q9. All-rounders above run and wicket thresholds": Query("""
+    SELECT player_name, format, runs, wickets
+    FROM player_master_stats
+    WHERE runs > $1 AND wickets > $2
+    ORDER BY runs DESC, wickets DESC
+    """, Param("min_runs", "int", 1000, "Runs above", min_value=0),
+         Param("min_wickets", "int", 50, "Wickets above", min_value=0)),
+
+    "Q10. Last completed matches": Query("""
+    SELECT start_date, match_desc, team1_name, team2_name, status, winner_team_name,
+           win_by_runs, win_by_wickets, venue_name
+    FROM matches
+    WHERE LOWER(state) = 'complete'
+    ORDER BY start_date DESC
+    LIMIT $1
+    """, Param("limit", "int", 20, "Matches", min_value=1, max_value=1000)),
+
+    "Q11. Compare player runs across formats": Query("""
+    SELECT player_name,
+           SUM(CASE WHEN format='Test' THEN runs ELSE 0 END) AS test_runs,
+           SUM(CASE WHEN format='ODI' THEN runs ELSE 0 END) AS odi_runs,
+           SUM(CASE WHEN format='T20I' THEN runs ELSE 0 END) AS t20_runs,
+           ROUND(AVG(batting_average),2) AS overall_avg
+    FROM player_master_stats
+    GROUP BY player_name
+    HAVING COUNT(DISTINCT format) >= $1
+    """, Param("min_formats", "int", 2, "Played at least N formats", min_value=1, max_value=4)),
+
+    "Q12. Team wins home vs away": Query("""
+    SELECT t.team_name,
+           SUM(CASE WHEN m.venue_country = t.country AND m.winner_team_id = t.team_id THEN 1 ELSE 0 END) AS home_wins,
+           SUM(CASE WHEN m.venue_country <> t.country AND m.winner_team_id = t.team_id THEN 1 ELSE 0 END) AS away_wins
+    FROM teams t
+    JOIN matches m ON t.team_id IN (m.team1_id, m.team2_id)
+    GROUP BY t.team_name
+    """, timeout=30),
+
+    "Q13. Partnerships above a run mark": Query("""
+    SELECT batsman1, batsman2, runs, innings_number
+    FROM partnerships
+    WHERE runs >= $1
+    """, Param("min_runs", "int", 100, "Runs at least", min_value=0)),
+
+    "Q14. Bowling performance at venues": Query("""
+    SELECT b.player_name,
+           m.venue_name,
+           ROUND(AVG(b.economy_rate)::numeric,2) AS avg_economy,
+           SUM(b.wickets) AS total_wickets,
+           COUNT(DISTINCT b.match_id) AS matches_played
+    FROM bowling_scorecard b
+    JOIN matches m ON b.match_id = m.match_id
+    WHERE b.overs >= $1
+    GROUP BY b.player_name, m.venue_name
+    HAVING COUNT(DISTINCT b.match_id) >= $2
+    ORDER BY avg_economy ASC, total_wickets DESC
+    """, Param("min_overs", "float", 4.0, "Overs per match at least", min_value=0.0),
+         Param("min_matches", "int", 3, "Matches at venue at least", min_value=1)),
+
+    "Q15. Player performance in close matches": Query("""
+    SELECT b.player_name,
+           t.country,
+           ROUND(AVG(b.runs)::numeric,0) AS avg_runs,
+           COUNT(DISTINCT b.match_id) AS close_matches
+    FROM batting_scorecard b
+    JOIN matches m ON b.match_id = m.match_id
+    JOIN players p ON b.player_name = p.full_name
+    JOIN teams t ON p.team_id = t.team_id
+    WHERE (m.win_by_runs < $1 OR m.win_by_wickets < $2)
+      AND m.winner_team_name != 'No Result'
+    GROUP BY b.player_name, t.country
+    ORDER BY avg_runs DESC
+    """, Param("max_runs_margin", "int", 50, "Won by fewer than N runs", min_value=1),
+         Param("max_wickets_margin", "int", 5, "…or fewer than N wickets", min_value=1, max_value=10),
+         timeout=30),
+
+    "Q16. Yearly batting since a year": Query("""
+    SELECT b.player_name,
+           b.team_name,
+           EXTRACT(YEAR FROM b.match_date) AS year,
+           ROUND(AVG(b.runs)::NUMERIC,0) AS avg_runs,
+           ROUND(AVG(b.strike_rate)::NUMERIC,2) AS avg_sr,
+           COUNT(b.match_id) AS matches_played
+    FROM batting_scorecard b
+    JOIN matches m ON b.match_id = m.match_id
+    WHERE b.match_date >= make_date($1, 1, 1)
+      AND m.start_date >= make_date($1, 1, 1)
+    GROUP BY b.player_name, b.team_name, EXTRACT(YEAR FROM b.match_date)
+    HAVING COUNT(b.match_id) >= $2
+    ORDER BY year DESC, avg_runs DESC
+    """, Param("since_year", "int", 2020, "Since year", min_value=1877, max_value=2100),
+         Param("min_matches", "int", 1, "Matches in year at least", min_value=1)),
+
+    "Q17. Toss advantage": Query("""
+    SELECT toss_decision,
+           COUNT(*) AS matches,
+           ROUND(AVG(CASE WHEN winner_team_id=toss_winner_id THEN 1 ELSE 0 END)*100,2) AS win_percent
+    FROM matches
+    WHERE LOWER(state)='complete' AND toss_winner_id IS NOT NULL
+    GROUP BY toss_decision
+    """),
+
+    "Q18. Most economical bowlers": Query("""
+    SELECT b.player_name,
+           b.team_name,
+           ROUND(AVG(b.economy_rate)::NUMERIC,2) AS avg_economy,
+           SUM(b.wickets) AS total_wickets,
+           COUNT(DISTINCT b.match_id) AS matches_bowled
+    FROM bowling_scorecard b
+    JOIN matches m ON b.match_id = m.match_id
+    WHERE m.match_format = ANY($1)
+      AND b.overs >= $2
+    GROUP BY b.player_name, b.team_name
+    HAVING COUNT(DISTINCT b.match_id) >= $3
+    ORDER BY avg_economy ASC, total_wickets DESC
+    """, Param("formats", "multi", ["ODI", "T20I"], options=["Test", "ODI", "T20I", "T20"]),
+         Param("min_overs", "float", 2.0, "Overs per match at least", min_value=0.0),
+         Param("min_matches", "int", 1, "Matches at least", min_value=1)),
+
+    "Q19. Consistent batsmen since a date": Query("""
+    SELECT b.player_name,
+           b.team_name,
+           ROUND(AVG(b.runs)::NUMERIC,0) AS avg_runs,
+           ROUND(STDDEV_POP(b.runs)::NUMERIC,2) AS run_stddev,
+           COUNT(*) AS innings
+    FROM batting_scorecard b
+    JOIN matches m ON b.match_id = m.match_id
+    WHERE b.match_date >= $1
+      AND m.start_date >= $1
+      AND b.balls_faced >= $2
+    GROUP BY b.player_name, b.team_name
+    HAVING COUNT(*) >= $3
+    ORDER BY run_stddev ASC, avg_runs DESC
+    """, Param("since", "date", date(2022, 1, 1), "Since"),
+         Param("min_balls", "int", 10, "Balls faced per innings at least", min_value=0),
+         Param("min_innings", "int", 1, "Innings at least", min_value=1)),
+
+    "Q20. Matches and averages per format": Query("""
+    SELECT player_name,
+           SUM(CASE WHEN format='Test' THEN matches ELSE 0 END) AS test_matches,
+           SUM(CASE WHEN format='ODI' THEN matches ELSE 0 END) AS odi_matches,
+           SUM(CASE WHEN format='T20I' THEN matches ELSE 0 END) AS t20_matches,
+           ROUND(SUM(runs)::NUMERIC/NULLIF(SUM(innings),0),2) AS overall_bat_avg
+    FROM player_master_stats
+    GROUP BY player_name
+    HAVING SUM(matches) >= $1
+    """, Param("min_matches", "int", 20, "Total matches at least", min_value=0)),
+
+    "Q21. Player ranking score": Query("""
+    SELECT player_name,
+           format,
+           ROUND(
+               SUM(runs)*0.01
+             + AVG(batting_average)*0.5
+             + AVG(strike_rate)*0.3
+             + SUM(wickets)*2
+             + (50-AVG(bowling_average))*0.5
+             + (6-AVG(economy_rate))*2
+           , 2) AS total_points
+    FROM player_master_stats
+    GROUP BY player_name, format
+    ORDER BY format DESC
+    """),
+
+    "Q22. Head-to-head team stats": Query("""
+    SELECT m.team1_name,
+           m.team2_name,
+           COUNT(*) AS total_matches,
+           SUM(CASE WHEN m.winner_team_name=m.team1_name THEN 1 ELSE 0 END) AS team1_wins,
+           SUM(CASE WHEN m.winner_team_name=m.team2_name THEN 1 ELSE 0 END) AS team2_wins
+    FROM matches m
+    WHERE m.start_date >= CURRENT_DATE - make_interval(years => $1)
+      AND m.winner_team_name != 'No Result'
+    GROUP BY m.team1_name, m.team2_name
+    HAVING COUNT(*) >= $2
+    ORDER BY total_matches DESC
+    """, Param("years", "int", 3, "Last N years", min_value=1, max_value=50),
+         Param("min_matches", "int", 1, "Matches at least", min_value=1)),
+
+    "Q23. Recent form": Query("""
+    SELECT b.player_name, b.team_name,
+           ROUND(AVG(b.runs)::NUMERIC,0) AS avg_runs,
+           ROUND(AVG(b.strike_rate)::NUMERIC,2) AS avg_sr,
+           SUM(CASE WHEN b.runs >= 50 THEN 1 ELSE 0 END) AS fifties
+    FROM batting_scorecard b
+    JOIN matches m ON b.match_id = m.match_id
+    GROUP BY b.player_name, b.team_name
+    ORDER BY avg_runs DESC
+    LIMIT $1
+    """, Param("limit", "int", 50, "Players", min_value=1, max_value=1000)),
+
+    "Q24. Successful partnerships": Query("""
+    SELECT batsman1,
+           batsman2,
+           ROUND(AVG(runs)::NUMERIC,0) AS avg_runs,
+           COUNT(*) AS total_partnerships,
+           MAX(runs) AS highest
+    FROM partnerships
+    GROUP BY batsman1, batsman2
+    HAVING COUNT(*) >= $1
+    ORDER BY avg_runs DESC
+    """, Param("min_partnerships", "int", 1, "Partnerships together at least", min_value=1)),
+
+    "Q25. Time series performance by quarter": Query("""
+    SELECT b.player_name, b.team_name,
+           DATE_TRUNC('quarter', b.match_date::timestamp) AS quarter,
+           ROUND(AVG(b.runs)::NUMERIC,0) AS avg_runs,
+           ROUND(AVG(b.strike_rate)::NUMERIC,2) AS avg_sr,
+           COUNT(*) AS matches
+    FROM batting_scorecard b
+    JOIN matches m ON b.match_id = m.match_id
+    GROUP BY b.player_name, b.team_name, DATE_TRUNC('quarter', b.match_date::timestamp)
+    HAVING COUNT(*) >= $1
+    ORDER BY b.player_name, quarter
+    """, Param("min_matches", "int", 3, "Innings in quarter at least", min_value=1)),
+}
@@ -0,0 +1,312 @@
+# ===========================================================
+#     Query executor (admission, timeouts, cancellation)
+# ===========================================================
+#
+# Every dashboard query borrows its connection through connection():
+#
+#   admission   at most QUERY_SLOTS queries run at once; CRUD is admitted ahead
+#               of ANALYTICS and analytics may hold at most ANALYTICS_SLOTS of
+#               them, so one heavy dashboard user cannot starve page lookups,
+#               writes or the nightly ingest. Waiters queue up to QUEUE_TIMEOUT.
+#   timeouts    SET LOCAL statement_timeout per query (Query.timeout or the
+#               class default); the watchdog enforces the same budget on the
+#               whole run, e.g. across the FETCHes of a streamed result
+#   cancel      a rerun / stop reaches the script as Streamlit's RerunException /
+#               StopException at its next st call (e.g. between the batches of a
+#               streamed result): the run is recorded as cancelled and the pool
+#               rolls it back. For a single long statement the watchdog also polls
+#               the session's pending script request and issues pg_cancel_backend;
+#               that peeks at Streamlit internals (checked against the pinned
+#               version in tests/test_query_executor.py) and, if they change, it
+#               warns once and leaves such statements to their timeout.
+#   routing     reads go to db.route_read() (replica unless it lags / is down),
+#               writes to the primary; after a write the session's WAL position is
+#               kept in session_state so its next reads see it (read-your-writes)
+#   slow log    runs over SLOW_QUERY_SECONDS are appended to SLOW_QUERY_LOG
+
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2 import errors
+
+import db
+import metrics
+
+CRUD = "crud"
+ANALYTICS = "analytics"
+PRIORITY = {CRUD: 0, ANALYTICS: 1}          # lower is admitted first
+
+QUERY_SLOTS = int(os.getenv("QUERY_SLOTS", str(db.POOL_MAX)))
+ANALYTICS_SLOTS = int(os.getenv("QUERY_ANALYTICS_SLOTS", "2"))
+QUEUE_TIMEOUT = float(os.getenv("QUERY_QUEUE_TIMEOUT", "30"))
+TIMEOUTS = {
+    CRUD: float(os.getenv("QUERY_TIMEOUT_CRUD", "5")),
+    ANALYTICS: float(os.getenv("QUERY_TIMEOUT_ANALYTICS", "20")),
+}
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "2"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")
+WATCH_INTERVAL = 0.2
+LAST_WRITE_KEY = "_db_last_write"           # session_state: (primary LSN, unix time) of the last write
+
+
+class QueryRejected(Exception):
+    """No slot became free within QUEUE_TIMEOUT."""
+
+
+class QueryTimeout(Exception):
+    """The query ran past its statement timeout."""
+
+
+class QueryCancelled(Exception):
+    """The session that started the query reran or went away."""
+
+
+# ---------------- Streamlit session ----------------
+def _script_ctx():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+
+
+def _last_write(ctx):
+    if ctx is None:
+        return None, None
+    import streamlit as st
+    return st.session_state.get(LAST_WRITE_KEY, (None, None))
+
+
+def _remember_write(ctx, lsn):
+    if ctx is not None:
+        import streamlit as st
+        st.session_state[LAST_WRITE_KEY] = (lsn, time.time())
+
+
+def _newest(a, b):
+    """The later of two (LSN, unix time) read-your-writes tokens."""
+    if a[0] is None:
+        return b
+    if b[0] is None:
+        return a
+    return a if db.lsn_int(a[0]) >= db.lsn_int(b[0]) else b
+
+
+_unsupported_warned = False
+
+
+def _interrupted(ctx):
+    """True once the session has a rerun / stop pending (new widget value, page switch, tab closed)."""
+    global _unsupported_warned
+    requests = getattr(ctx, "script_requests", None) if ctx is not None else None
+    if requests is None:
+        return False
+    state = getattr(requests, "_state", None)
+    if state is None:
+        if not _unsupported_warned:
+            _unsupported_warned = True
+            metrics.inc("cricbuzz_db_watchdog_unsupported_total")
+            print("⚠️ query watchdog: this Streamlit version hides pending reruns; "
+                  "abandoned queries now run until their timeout")
+        return False
+    return state.name != "CONTINUE"
+
+
+# ---------------- Admission ----------------
+class Admission:
+    def __init__(self, slots, limits):
+        self.slots = slots
+        self.limits = limits                # class -> max concurrent
+        self._cond = threading.Condition()
+        self._running = {cls: 0 for cls in PRIORITY}
+        self._waiting = []                  # sorted (priority, seq, cls)
+        self._seq = itertools.count()
+
+    def _has_room(self, cls):
+        if sum(self._running.values()) >= self.slots:
+            return False
+        return self._running[cls] < self.limits.get(cls, self.slots)
+
+    def _next(self):
+        return next((t for t in self._waiting if self._has_room(t[2])), None)
+
+    def acquire(self, cls, timeout, ctx=None):
+        ticket = (PRIORITY[cls], next(self._seq), cls)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiting.append(ticket)
+            self._waiting.sort()
+            try:
+                while self._next() != ticket:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise QueryRejected(f"database busy: no {cls} slot within {timeout:g}s")
+                    if _interrupted(ctx):
+                        raise QueryCancelled("session moved on while queued")
+                    self._cond.wait(min(remaining, WATCH_INTERVAL))
+                self._running[cls] += 1
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self, cls):
+        with self._cond:
+            self._running[cls] -= 1
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self._running), len(self._waiting)
+
+
+admission = Admission(QUERY_SLOTS, {ANALYTICS: ANALYTICS_SLOTS})
+
+
+# ---------------- Watchdog ----------------
+class _Run:
+    __slots__ = ("name", "role", "pid", "ctx", "deadline", "reason", "active", "lock")
+
+    def __init__(self, name, role, pid, ctx, deadline):
+        self.name = name
+        self.role = role
+        self.pid = pid
+        self.ctx = ctx
+        self.deadline = deadline
+        self.reason = None          # "cancelled" | "timeout" once the watchdog fired
+        self.active = True          # False once the connection may go back to the pool
+        self.lock = threading.Lock()
+
+
+class _Watchdog:
+    def __init__(self):
+        self._runs = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, run):
+        with self._lock:
+            self._runs.add(run)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="query-watchdog", daemon=True)
+                self._thread.start()
+
+    def discard(self, run):
+        with self._lock:
+            self._runs.discard(run)
+        with run.lock:              # never cancel a backend that is already serving someone else
+            run.active = False
+
+    def _loop(self):
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            with self._lock:
+                runs = [r for r in self._runs if r.reason is None]
+            now = time.monotonic()
+            for run in runs:
+                if _interrupted(run.ctx):
+                    self._cancel(run, "cancelled")
+                elif now > run.deadline:
+                    self._cancel(run, "timeout")
+
+    def _cancel(self, run, reason):
+        try:
+            with run.lock:
+                if not run.active:
+                    return
+                run.reason = reason
+                conn = db.connect(run.role)
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT pg_cancel_backend(%s)", (run.pid,))
+                finally:
+                    conn.close()
+            metrics.inc("cricbuzz_db_query_cancelled_total", query=run.name, reason=reason)
+        except Exception as e:
+            print(f"⚠️ could not cancel backend {run.pid} ({run.name}): {e}")
+
+
+_watchdog = _Watchdog()
+
+
+# ---------------- Slow query log ----------------
+_log_lock = threading.Lock()
+
+
+def _log_slow(name, cls, role, seconds, queued, outcome, sql, args):
+    metrics.inc("cricbuzz_db_slow_queries_total", query=name)
+    print(f"🐢 slow query {name} ({cls}, {role}): {seconds:.2f}s, queued {queued:.2f}s, {outcome}")
+    entry = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "query": name, "class": cls, "role": role,
+             "seconds": round(seconds, 3), "queued": round(queued, 3), "outcome": outcome,
+             "sql": " ".join((sql or "").split())[:500], "args": repr(args)[:200]}
+    try:
+        with _log_lock, open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"⚠️ could not write slow query log: {e}")
+
+
+# ---------------- Executor ----------------
+@contextmanager
+def connection(name, cls=ANALYTICS, timeout=None, sql=None, args=(), write=False, after=None):
+    """
+    Admit a query of class `cls`, borrow a pooled connection with its statement
+    timeout set, and watch it until the block exits. psycopg2's QueryCanceled is
+    translated to QueryTimeout / QueryCancelled. `write=True` pins the primary,
+    commits when the block exits cleanly (not inside it: a commit would end the
+    SET LOCAL timeout with the transaction) and records the write for read-your-writes. `after` = (primary LSN, unix time) the
+    read must see on top of the session's own writes (cache_bus.written()).
+    `sql` / `args` only feed the slow log.
+    """
+    timeout = timeout or TIMEOUTS[cls]
+    ctx = _script_ctx()
+    role = db.PRIMARY if write else db.route_read(*_newest(_last_write(ctx), after or (None, None)))
+    queued_at = time.perf_counter()
+    try:
+        admission.acquire(cls, QUEUE_TIMEOUT, ctx)
+    except QueryRejected:
+        metrics.inc("cricbuzz_db_admission_rejected_total", query=name, cls=cls)
+        raise
+    queued = time.perf_counter() - queued_at
+    metrics.observe("cricbuzz_db_queue_seconds", queued, cls=cls)
+
+    run, outcome = None, "ok"
+    start = time.perf_counter()
+    try:
+        with db.pooled(role) as conn:
+            role = conn.role
+            metrics.inc("cricbuzz_db_route_total", cls=cls, role=role)
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL statement_timeout = %s", (int(timeout * 1000),))
+            run = _Run(name, role, conn.get_backend_pid(), ctx, time.monotonic() + timeout)
+            _watchdog.add(run)
+            try:
+                yield conn
+                if write:
+                    conn.commit()
+                    _remember_write(ctx, db.current_lsn(conn))
+            except errors.QueryCanceled as e:
+                outcome = run.reason or "timeout"
+                if outcome == "cancelled":
+                    raise QueryCancelled(f"{name} cancelled: session moved on") from e
+                metrics.inc("cricbuzz_db_query_timeouts_total", query=name)
+                raise QueryTimeout(f"{name} exceeded its {timeout:g}s time limit") from e
+            except metrics.script_control_exceptions():
+                # the session reran / stopped mid-query; the pool rolls back what is left open
+                outcome = run.reason or "cancelled"
+                if run.reason is None:
+                    metrics.inc("cricbuzz_db_query_cancelled_total", query=name, reason="rerun")
+                raise
+            except BaseException:
+                outcome = run.reason or "aborted"
+                raise
+            finally:
+                _watchdog.discard(run)
+    finally:
+        admission.release(cls)
+        seconds = time.perf_counter() - start
+        if seconds + queued >= SLOW_QUERY_SECONDS:
+            _log_slow(name, cls, role, seconds, queued, outcome, sql, args)
@@ -0,0 +1,168 @@
+# ===========================================================
+#       Query result spool (Arrow batches -> Parquet / CSV)
+# ===========================================================
+#
+# Large analytics results never live in memory as one DataFrame. Rows are
+# pulled in CHUNK_ROWS chunks, converted to Arrow record batches and appended
+# to a Parquet file (one row group per chunk = one page) and a CSV export as
+# they arrive. Pages are read back one row group at a time, so a session holds
+# at most one chunk regardless of the result size.
+#
+#   <SPOOL_DIR>/<key>.parquet / .csv / .json     key = query + bound parameters
+#
+# Small results (planner estimate <= STREAM_THRESHOLD) run through the
+# prepared statement, capped at STREAM_THRESHOLD + 1 rows; larger ones, and
+# small ones the planner underestimated, stream from a named server-side cursor.
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+import db
+import metrics
+
+SPOOL_DIR = os.getenv("RESULT_SPOOL_DIR", "results")
+CHUNK_ROWS = int(os.getenv("RESULT_CHUNK_ROWS", "2000"))           # rows per batch / page
+STREAM_THRESHOLD = int(os.getenv("RESULT_STREAM_THRESHOLD", "20000"))
+SPOOL_TTL = float(os.getenv("RESULT_SPOOL_TTL", "300"))             # seconds a spooled result is reused
+SPOOL_KEEP = float(os.getenv("RESULT_SPOOL_KEEP", "3600"))          # seconds before old spools are deleted
+
+# Postgres type OID -> (arrow type, value converter)
+_INT = (pa.int64(), int)
+_FLOAT = (pa.float64(), float)
+_TYPES = {
+    16: (pa.bool_(), bool),
+    20: _INT, 21: _INT, 23: _INT,
+    700: _FLOAT, 701: _FLOAT, 1700: _FLOAT,         # numeric -> float64 (ROUND(...) results)
+    1082: (pa.date32(), None),
+    1114: (pa.timestamp("us"), None),
+    1184: (pa.timestamp("us", tz="UTC"), None),
+}
+_TEXT = (pa.string(), str)
+
+
+def _column_types(description):
+    return [_TYPES.get(d[1], _TEXT) for d in description]
+
+
+def _batch(description, rows, types):
+    arrays = []
+    for i, (arrow_type, conv) in enumerate(types):
+        values = [r[i] for r in rows]
+        if conv is not None:
+            values = [None if v is None else conv(v) for v in values]
+        arrays.append(pa.array(values, type=arrow_type))
+    return pa.RecordBatch.from_arrays(arrays, names=[d[0] for d in description])
+
+
+class SpoolResult:
+    def __init__(self, base, meta):
+        self.base = base
+        self.meta = meta        # {"rows", "estimate", "pages", "columns", "mode", "seconds"}
+
+    @property
+    def parquet_path(self):
+        return self.base + ".parquet"
+
+    @property
+    def csv_path(self):
+        return self.base + ".csv"
+
+    def page(self, n):
+        """DataFrame for page n (0-based): exactly one Parquet row group."""
+        if not self.meta["pages"]:
+            return pa.table({c: [] for c in self.meta["columns"]}).to_pandas()
+        return pq.ParquetFile(self.parquet_path).read_row_group(n).to_pandas()
+
+
+def _key(name, sql, args):
+    return hashlib.sha1(repr((name, sql, args)).encode()).hexdigest()[:20]
+
+
+def _cleanup():
+    cutoff = time.time() - SPOOL_KEEP
+    for path in glob.glob(os.path.join(SPOOL_DIR, "*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def cached(name, query, args):
+    """A finished spool for (query, args) younger than SPOOL_TTL, else None."""
+    base = os.path.join(SPOOL_DIR, _key(name, query.sql, args))
+    try:
+        if time.time() - os.path.getmtime(base + ".json") > SPOOL_TTL:
+            return None
+        with open(base + ".json", encoding="utf-8") as f:
+            return SpoolResult(base, json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def spool(conn, name, query, args, on_batch=None):
+    """
+    Run `query` with `args` on `conn`, writing every chunk straight to disk.
+    on_batch(batch_no, rows_so_far, estimate, first_page_df) is called after each chunk
+    so the page can show progress and the first page before the query finishes.
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    _cleanup()
+    base = os.path.join(SPOOL_DIR, _key(name, query.sql, args))
+    tmp = f"{base}.{os.getpid()}-{threading.get_ident()}.tmp"
+    start = time.perf_counter()
+
+    estimate = db.estimate_rows(conn, query.sql, query.types, args)
+    chunks = None
+    if estimate <= STREAM_THRESHOLD:
+        chunks = db.fetch_prepared(conn, query.sql, query.types, args, chunk_rows=CHUNK_ROWS,
+                                   max_rows=STREAM_THRESHOLD)
+    mode = "prepared" if chunks is not None else "stream"
+    if chunks is None:
+        chunks = db.stream(conn, query.sql, query.types, args, chunk_rows=CHUNK_ROWS)
+
+    writer = csv = None
+    columns, rows_total, pages = [], 0, 0
+    try:
+        for description, rows in chunks:
+            if writer is None:
+                types = _column_types(description)
+                columns = [d[0] for d in description]
+                first = _batch(description, rows, types)
+                writer = pq.ParquetWriter(tmp + ".parquet", first.schema)
+                csv = pacsv.CSVWriter(tmp + ".csv", first.schema)
+                batch = first
+            else:
+                batch = _batch(description, rows, types)
+            writer.write_batch(batch, row_group_size=CHUNK_ROWS)
+            csv.write_batch(batch)
+            rows_total += len(rows)
+            pages += 1
+            if on_batch is not None:
+                on_batch(pages, rows_total, estimate, batch.to_pandas() if pages == 1 else None)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            csv.close()
+        for path in glob.glob(tmp + ".*"):
+            os.remove(path)
+        raise
+    if writer is not None:
+        writer.close()
+        csv.close()
+        os.replace(tmp + ".parquet", base + ".parquet")
+        os.replace(tmp + ".csv", base + ".csv")
+    meta = {"rows": rows_total, "estimate": estimate, "pages": pages, "columns": columns,
+            "mode": mode, "seconds": round(time.perf_counter() - start, 3)}
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    metrics.inc("cricbuzz_result_spool_rows_total", rows_total, mode=mode)
+    return SpoolResult(base, meta)
@@ -0,0 +1,238 @@
+# ===========================================================
+#        Scorecard archive (compressed segments + mmap index)
+# ===========================================================
+#
+# Append-only local store of raw /mcenter/v1/{id}/scard payloads so the
+# loaders and the live page never download a finished scorecard twice, and
+# every derived table can be rebuilt from disk with zero API calls.
+#
+#   <root>/seg-000001.dat   records: header(match_id, length, crc32) + zlib(JSON)
+#   <root>/index.bin        fixed 24-byte entries: match_id, segment, offset, length
+#
+# Later entries for the same match_id supersede earlier ones. The index is
+# memory-mapped and folded into a dict; it is re-mapped when another process
+# appends to it.
+
+import glob
+import itertools
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:          # Windows: single-writer assumption, thread lock only
+    fcntl = None
+
+ARCHIVE_DIR = os.getenv("SCARD_ARCHIVE_DIR", os.path.join("archive", "scorecards"))
+SEGMENT_BYTES = int(os.getenv("SCARD_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+HEADER = struct.Struct("<QII")      # match_id, body length, crc32(body)
+ENTRY = struct.Struct("<QIQI")      # match_id, segment no, offset, record length
+_SEG_RE = re.compile(r"seg-(\d+)\.dat$")
+
+
+@contextmanager
+def _file_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ScorecardArchive:
+    def __init__(self, root=ARCHIVE_DIR, segment_bytes=SEGMENT_BYTES):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self._index_path = os.path.join(root, "index.bin")
+        self._lock_path = os.path.join(root, "archive.lock")
+        self._lock = threading.RLock()
+        self._offsets = {}          # match_id -> (segment, offset, length)
+        self._mapped = 0            # bytes of index.bin folded into _offsets
+        self._mm = None
+        self._readers = {}          # segment -> open file object
+        with self._lock:
+            self._refresh()
+
+    # ---------------- Index ----------------
+    def _refresh(self):
+        try:
+            size = os.path.getsize(self._index_path)
+        except FileNotFoundError:
+            return
+        size -= size % ENTRY.size          # ignore a torn trailing entry
+        if size <= self._mapped:
+            return
+        if self._mm is not None:
+            self._mm.close()
+        with open(self._index_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        for mid, seg, off, length in ENTRY.iter_unpack(self._mm[self._mapped:size]):
+            self._offsets[mid] = (seg, off, length)
+        self._mapped = size
+
+    def __contains__(self, match_id):
+        with self._lock:
+            if int(match_id) not in self._offsets:
+                self._refresh()
+            return int(match_id) in self._offsets
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
+
+    def match_ids(self):
+        with self._lock:
+            self._refresh()
+            return list(self._offsets)
+
+    # ---------------- Segments ----------------
+    def _segment_path(self, seg):
+        return os.path.join(self.root, f"seg-{seg:06d}.dat")
+
+    def _segments(self):
+        segs = []
+        for p in glob.glob(os.path.join(self.root, "seg-*.dat")):
+            m = _SEG_RE.search(p)
+            if m:
+                segs.append(int(m.group(1)))
+        return sorted(segs)
+
+    def _reader(self, seg):
+        f = self._readers.get(seg)
+        if f is None:
+            f = self._readers[seg] = open(self._segment_path(seg), "rb")
+        return f
+
+    @staticmethod
+    def _decode(match_id, raw):
+        mid, length, crc = HEADER.unpack_from(raw)
+        body = raw[HEADER.size:HEADER.size + length]
+        if mid != match_id or len(body) != length or zlib.crc32(body) != crc:
+            return None
+        return json.loads(zlib.decompress(body))
+
+    # ---------------- Public API ----------------
+    def get_record(self, match_id):
+        """{'payload': raw scard JSON, 'match_info': listing matchInfo or None}, or None."""
+        match_id = int(match_id)
+        with self._lock:
+            loc = self._offsets.get(match_id)
+            if loc is None:
+                self._refresh()
+                loc = self._offsets.get(match_id)
+            if loc is None:
+                return None
+            seg, off, length = loc
+            f = self._reader(seg)
+            f.seek(off)
+            raw = f.read(length)
+        return self._decode(match_id, raw)
+
+    def get(self, match_id):
+        rec = self.get_record(match_id)
+        return rec["payload"] if rec else None
+
+    def put(self, match_id, payload, match_info=None):
+        match_id = int(match_id)
+        body = zlib.compress(
+            json.dumps({"payload": payload, "match_info": match_info}, separators=(",", ":")).encode(), 6)
+        record = HEADER.pack(match_id, len(body), zlib.crc32(body)) + body
+
+        with self._lock, _file_lock(self._lock_path):
+            segs = self._segments()
+            seg = segs[-1] if segs else 1
+            path = self._segment_path(seg)
+            if os.path.exists(path) and os.path.getsize(path) + len(record) > self.segment_bytes:
+                seg += 1
+                path = self._segment_path(seg)
+            with open(path, "ab") as f:
+                off = f.seek(0, os.SEEK_END)
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self._index_path, "a+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                if end % ENTRY.size:
+                    f.truncate(end - end % ENTRY.size)
+                f.write(ENTRY.pack(match_id, seg, off, len(record)))
+            self._refresh()
+            self._offsets[match_id] = (seg, off, len(record))
+
+    def get_or_fetch(self, match_id, fetch, complete=True, match_info=None):
+        """
+        Read-through for finished matches: serve from disk, else call fetch() and archive
+        a non-empty result. In-progress matches (complete=False) always go to the API and
+        are not archived, since their scorecard is still changing.
+        """
+        if not complete:
+            return fetch()
+        metrics.cache_lookup("scorecard_archive")
+        payload = self.get(match_id)
+        if payload is not None:
+            return payload
+        metrics.cache_miss("scorecard_archive")
+        payload = fetch()
+        if payload:
+            self.put(match_id, payload, match_info)
+        return payload
+
+    def replay(self):
+        """Yield (match_id, payload, match_info) for the latest copy of every match, in disk order."""
+        with self._lock:
+            self._refresh()
+            entries = sorted((seg, off, length, mid) for mid, (seg, off, length) in self._offsets.items())
+        damaged = 0
+        for seg, group in itertools.groupby(entries, key=lambda e: e[0]):
+            # records are read at their indexed offsets from a mapping of the segment, so a torn
+            # or corrupt record costs only itself and memory stays at one record, not one segment
+            with open(self._segment_path(seg), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+            try:
+                for _, off, length, mid in group:
+                    rec = None
+                    if mm is not None and off + HEADER.size <= size:
+                        rec = self._decode(mid, mm[off:off + length])
+                    if rec is None:
+                        damaged += 1
+                        continue
+                    yield mid, rec["payload"], rec.get("match_info")
+            finally:
+                if mm is not None:
+                    mm.close()
+        if damaged:
+            print(f"⚠️ scorecard archive: skipped {damaged} damaged record(s) during replay")
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_archive():
+    """Process-wide archive at ARCHIVE_DIR."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ScorecardArchive()
+        return _archive
+
+
+if __name__ == "__main__":
+    a = get_archive()
+    segs = a._segments()
+    size = sum(os.path.getsize(a._segment_path(s)) for s in segs)
+    print(f"📦 {len(a)} scorecards in {len(segs)} segment(s), {size / 1024 / 1024:.1f} MB at {a.root}")
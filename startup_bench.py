@@ -0,0 +1,97 @@
+# ===========================================================
+#        Startup benchmark — time to first paint per page
+# ===========================================================
+#
+# Every page is opened in a fresh interpreter, the way a new pod serves its first
+# request after a deploy or scale-out: import Streamlit, run app.py with the page
+# selected, then rerun it once more (warm). Times are medians over --runs.
+#
+#   import      interpreter + streamlit + AppTest imports
+#   first       first script run of the page = time to first paint (page imports,
+#               pools, first queries / API calls included)
+#   warm        the same page rerun in the same process
+#   heavy       heavy modules already loaded when the first paint finished
+#
+#   python startup_bench.py                             # all pages, 3 runs each
+#   python startup_bench.py --pages crud_operations --runs 5
+#
+# Pages that call the Cricbuzz API or Postgres include those round trips; the
+# background warm-up imports are disabled in the child so `heavy` reflects only
+# what the page itself needed.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_T0 = time.perf_counter()
+
+ENTRYPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+HEAVY = ("pandas", "pyarrow", "requests")
+
+
+def _child(page):
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+
+    at = AppTest.from_file(ENTRYPOINT, default_timeout=120)
+    if page != "home":
+        at.switch_page(page + ".py")
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter()
+    heavy = [m for m in HEAVY if m in sys.modules]
+    at.run()
+    warm = time.perf_counter()
+    print(json.dumps({
+        "import": imported - _T0, "first": first - start, "warm": warm - first,
+        "heavy": heavy, "errors": [str(e.value)[:200] for e in at.exception],
+    }))
+
+
+def measure(page, runs):
+    env = dict(os.environ, APP_WARM_IMPORTS="0")
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, __file__, "--child", page], env=env,
+                             capture_output=True, text=True, cwd=os.path.dirname(ENTRYPOINT))
+        lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        if out.returncode or not lines:
+            print(f"⚠️ {page}: benchmark run failed\n{out.stderr[-2000:]}")
+            return None
+        samples.append(json.loads(lines[-1]))
+    med = lambda k: statistics.median(s[k] for s in samples)
+    return {"import": med("import"), "first": med("first"), "warm": med("warm"),
+            "heavy": samples[-1]["heavy"], "errors": samples[-1]["errors"]}
+
+
+def main(argv=None):
+    import app_shell
+    pages = ["home"] + [script[:-3] for script, _, _ in app_shell.PAGES if script]
+
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--pages", nargs="+", choices=pages, default=pages)
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--child", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+    if args.child:
+        _child(args.child)
+        return 0
+
+    print(f"{'page':<18}{'import':>9}{'first':>9}{'warm':>9}  heavy modules at first paint")
+    for page in args.pages:
+        r = measure(page, args.runs)
+        if r is None:
+            continue
+        print(f"{page:<18}{r['import']:>8.2f}s{r['first']:>8.2f}s{r['warm']:>8.2f}s  "
+              f"{', '.join(r['heavy']) or '-'}")
+        for err in r["errors"]:
+            print(f"    ⚠️ {err}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
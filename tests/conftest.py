@@ -0,0 +1,5 @@
+import os
+import sys
+
+# flat root modules (models, api_client, ...) and the ingest package import from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
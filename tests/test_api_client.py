@@ -0,0 +1,124 @@
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import api_client
+from api_client import QuotaBudget, QuotaExhausted
+
+KEY = "test-key-abcdef"
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    b = QuotaBudget()
+    monkeypatch.setattr(b, "start", lambda: None)      # tests sync by hand
+    monkeypatch.setattr(api_client, "DAILY_BUDGET", 10)
+    monkeypatch.setattr(api_client, "MONTHLY_BUDGET", 0)
+    monkeypatch.setattr(api_client, "CLASS_BUDGETS", {})
+    return b
+
+
+def test_endpoint_class():
+    assert api_client.endpoint_class("/mcenter/v1/123/scard") == "scorecard"
+    assert api_client.endpoint_class("/mcenter/v1/123/comm") == "match"
+    assert api_client.endpoint_class("/matches/v1/live") == "matches"
+    assert api_client.endpoint_class("/stats/v1/rankings/batsmen?formatType=odi") == "rankings"
+    assert api_client.endpoint_class("/stats/v1/player/6635") == "player"
+
+
+def shared_table():
+    """_flush stand-in backed by a dict, like api_quota_usage."""
+    rows = {}
+    def flush(pending, today):
+        for (pool, cls, d), calls in pending.items():
+            rows[(pool, cls, d)] = rows.get((pool, cls, d), 0) + calls
+        day = {(p, c): n for (p, c, d), n in rows.items() if d == today}
+        month = {(p, c): n for (p, c, d), n in rows.items() if d.replace(day=1) == today.replace(day=1)}
+        return day, month
+    return staticmethod(flush)
+
+
+def test_backfill_stops_at_the_interactive_reserve(budget, monkeypatch):
+    monkeypatch.setattr(QuotaBudget, "_flush", shared_table())
+    for _ in range(8):
+        budget.record(KEY, "match")
+    budget._sync()
+    assert budget.check(KEY, "match", api_client.INTERACTIVE) == "low"
+    with pytest.raises(QuotaExhausted):
+        budget.check(KEY, "match", api_client.BACKFILL)
+
+
+def test_sync_retries_after_a_database_error(budget, monkeypatch):
+    def down(pending, today):
+        raise OSError("connection refused")
+    monkeypatch.setattr(QuotaBudget, "_flush", staticmethod(down))
+    budget.record(KEY, "match")
+    budget._sync()
+    assert budget._failures == 1
+    assert budget._pending                      # kept for the next attempt
+
+    flushed = {}
+    def up(pending, today):
+        flushed.update(pending)
+        return {(budget.pool(KEY), "match"): 7}, {(budget.pool(KEY), "match"): 7}
+    monkeypatch.setattr(QuotaBudget, "_flush", staticmethod(up))
+    budget._sync()
+    assert budget._failures == 0 and sum(flushed.values()) == 1
+    assert budget._used(budget.pool(KEY), None, datetime.now(timezone.utc).date()) == (7, 7)
+
+
+def test_daily_count_resets_with_the_utc_date(budget):
+    pool, today = budget.pool(KEY), date(2025, 3, 15)
+    budget._synced_day = today - timedelta(days=1)
+    budget._day = {(pool, "match"): 9}
+    budget._month = {(pool, "match"): 40}
+    budget._pending = {(pool, "match", today - timedelta(days=1)): 2, (pool, "match", today): 1}
+    assert budget._used(pool, None, today) == (1, 43)
+    assert budget._used(pool, None, date(2025, 4, 1)) == (0, 0)
+
+
+def test_check_does_not_wait_for_the_database(monkeypatch):
+    monkeypatch.setattr(api_client.atexit, "register", lambda fn: None)
+    b, release = QuotaBudget(), threading.Event()
+    b._flush = lambda pending, today: release.wait(5) and ({}, {})
+    started = time.monotonic()
+    assert b.check(KEY, "match", api_client.INTERACTIVE) == "ok"
+    assert time.monotonic() - started < 1                 # the sync thread is the one waiting
+    release.set()
+
+
+class FakeConn:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, args=None):
+        self.log.append(" ".join(sql.split())[:40])
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        self.log.append("close")
+
+
+def test_flush_creates_the_table_once_and_closes(monkeypatch):
+    import db
+    log, seen = [], {}
+    monkeypatch.setattr(db, "connect", lambda **kw: seen.update(kw) or FakeConn(log))
+    b = QuotaBudget()
+    b._flush({}, date(2025, 3, 15))
+    b._flush({}, date(2025, 3, 15))
+    assert sum("CREATE TABLE" in sql for sql in log) == 1
+    assert log.count("close") == 2
+    assert seen["connect_timeout"] == api_client.SYNC_CONNECT_TIMEOUT
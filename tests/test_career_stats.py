@@ -0,0 +1,62 @@
+import pandas as pd
+
+from ingest import career_stats
+
+PROFILES = pd.DataFrame(columns=["player_id", "full_name", "role", "batting_style", "bowling_style"])
+
+
+def frames():
+    """One ODI: player 1 (India) scores 120 and is caught by Smith (player 2, Australia)."""
+    bat = pd.DataFrame([
+        {"match_id": 10, "player_id": 1, "player_name": "Virat Kohli", "team_name": "India",
+         "runs": 120, "balls_faced": 100, "dismissal": "c Smith b Starc", "match_date": "2025-01-05"},
+        {"match_id": 10, "player_id": 2, "player_name": "Steve Smith", "team_name": "Australia",
+         "runs": 0, "balls_faced": 1, "dismissal": "lbw b Bumrah", "match_date": "2025-01-05"},
+    ])
+    bowl = pd.DataFrame([
+        {"match_id": 10, "player_id": 3, "player_name": "Mitchell Starc", "team_name": "Australia",
+         "overs": 10.0, "runs_conceded": 45, "wickets": 4, "match_date": "2025-01-05"},
+    ])
+    field = pd.DataFrame([{"match_id": 10, "player_name": "Smith", "team_name": "Australia",
+                           "catches": 1, "stumpings": 0}])
+    roster = pd.concat([bat, bowl])[["match_id", "team_name", "player_id", "player_name"]]
+    fmts = pd.DataFrame([{"match_id": 10, "format": "ODI"}])
+    return bat, bowl, field, roster, fmts
+
+
+def test_full_aggregate():
+    bat, bowl, field, roster, fmts = frames()
+    stats, unresolved = career_stats.aggregate(bat, bowl, field, roster, fmts, PROFILES)
+    stats = stats.set_index("player_id")
+    assert unresolved == 0
+    assert stats.loc[1, ["runs", "hundreds", "innings", "not_outs", "batting_average"]].tolist() == [120, 1, 1, 0, 120.0]
+    assert stats.loc[1, "strike_rate"] == 120.0
+    assert stats.loc[2, ["ducks", "catches"]].tolist() == [1, 1]
+    assert stats.loc[3, ["wickets", "balls_bowled", "four_wicket_hauls", "best_bowling_innings"]].tolist() == \
+        [4, 60, 1, "4/45"]
+    assert stats.loc[3, "economy_rate"] == 4.5
+
+
+def test_incremental_refresh_leaves_out_opponent_fielders():
+    bat, bowl, field, roster, fmts = frames()
+    # load(cur, players=[1]) returns player 1's rows but the whole match roster and fielding
+    mine = bat[bat["player_id"] == 1]
+    stats, _ = career_stats.aggregate(mine, bowl.iloc[0:0], field, roster, fmts, PROFILES, players=[1])
+    assert stats["player_id"].tolist() == [1]
+    assert stats.iloc[0]["catches"] == 0
+
+
+def test_resolve_fielders_needs_a_unique_surname():
+    _, _, field, roster, _ = frames()
+    twin = pd.DataFrame([{"match_id": 10, "team_name": "Australia", "player_id": 4, "player_name": "Jake Smith"}])
+    resolved, unresolved = career_stats.resolve_fielders(field, pd.concat([roster, twin]))
+    assert resolved.empty and unresolved == 1
+
+
+def test_formats():
+    matches = pd.DataFrame([
+        {"match_id": 1, "match_format": "T20", "series_type": "International", "series_name": "India tour"},
+        {"match_id": 2, "match_format": "T20", "series_type": "League", "series_name": "Indian Premier League 2025"},
+        {"match_id": 3, "match_format": "T20", "series_type": "Domestic", "series_name": "Ranji"},
+    ])
+    assert career_stats.formats(matches).set_index("match_id")["format"].to_dict() == {1: "T20I", 2: "IPL"}
@@ -0,0 +1,63 @@
+import pytest
+
+from ingest import fetch_queue, pipeline
+from ingest.common import FetchFailed
+
+
+@pytest.fixture
+def cur():
+    """A session-local fetch_queue (TEMP shadows the real one) in the layout keyed per endpoint."""
+    import psycopg2
+    import db
+    try:
+        conn = db.connect()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no database: {e}")
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE fetch_queue (
+                stage TEXT NOT NULL, endpoint TEXT NOT NULL, item_key TEXT NOT NULL, path TEXT,
+                context JSONB, status TEXT NOT NULL DEFAULT 'pending', attempts INT NOT NULL DEFAULT 1,
+                last_status INT, last_error TEXT, next_attempt_at TIMESTAMP NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (stage, endpoint, item_key))""")
+        yield cur
+    conn.rollback()
+    conn.close()
+
+
+def failed(path, status=429, retry_after=None):
+    return FetchFailed(path, status=status, retry_after=retry_after)
+
+
+def test_ensure_tables_folds_rows_per_endpoint(cur):
+    cur.execute("""INSERT INTO fetch_queue (stage, endpoint, item_key, attempts, next_attempt_at) VALUES
+                   ('scorecards', '/mcenter/v1/{id}/scard', '7', 3, now()),
+                   ('scorecards', '/mcenter/v1/{id}/comm', '7', 1, now())""")
+    fetch_queue.ensure_tables(cur)
+    cur.execute("SELECT endpoint, attempts FROM fetch_queue")
+    assert cur.fetchall() == [("/mcenter/v1/{id}/scard", 3)]
+    fetch_queue.ensure_tables(cur)                        # already keyed per item: no-op
+
+
+def test_attempts_count_across_endpoints(cur):
+    fetch_queue.ensure_tables(cur)
+    assert fetch_queue.enqueue(cur, "scorecards", 7, failed("/mcenter/v1/7/scard")) == 1
+    assert fetch_queue.enqueue(cur, "scorecards", 7, failed("/mcenter/v1/7/comm")) == 2
+    cur.execute("SELECT endpoint, attempts FROM fetch_queue WHERE item_key = '7'")
+    assert cur.fetchall() == [("/mcenter/v1/{id}/comm", 2)]
+
+
+def test_parked_items_skip_the_normal_pass(cur, monkeypatch):
+    fetch_queue.ensure_tables(cur)
+    cur.execute("""INSERT INTO fetch_queue (stage, endpoint, item_key, status, next_attempt_at) VALUES
+                   ('players', '/teams', 'waiting', 'pending', now() + interval '1 hour'),
+                   ('players', '/teams', 'dead', 'dead', now() - interval '1 hour'),
+                   ('players', '/teams', 'due', 'pending', now() - interval '1 minute')""")
+    assert fetch_queue.parked(cur, "players") == {"waiting", "dead"}
+    assert [k for k, _ in fetch_queue.due(cur, "players")] == ["due"]
+
+    ctx = pipeline.StageContext(-1, "players", cur.connection)
+    assert ctx.is_done("waiting") and ctx.is_done("dead")
+    assert not ctx.is_done("due") and not ctx.is_done("new")
+    assert not pipeline.StageContext(-1, "players", cur.connection, replay=True).is_done("waiting")
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from ingest.common import backoff_delay, parse_retry_after
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", 120.0),
+    ("0.5", 0.5),
+    ("-3", 0.0),
+    (None, None),
+    ("", None),
+    ("soon", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    assert 80 <= parse_retry_after(later) <= 90
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(minutes=5), usegmt=True)
+    assert parse_retry_after(earlier) == 0.0
+
+
+def test_backoff_delay_bounds():
+    for attempt in range(8):
+        delays = [backoff_delay(attempt, base=0.5, cap=4) for _ in range(200)]
+        assert all(0 <= d <= min(4, 0.5 * 2 ** attempt) for d in delays)
+    assert max(backoff_delay(10, base=0.5, cap=4) for _ in range(200)) > 2     # jitter spans the capped window
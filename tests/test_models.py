@@ -0,0 +1,163 @@
+import pytest
+
+import models
+from models import parse_commentary, parse_match_list, parse_scorecard, parse_series_detail
+
+IND = {"teamId": 2, "teamName": "India", "teamSName": "IND"}
+AUS = {"teamId": 4, "teamName": "Australia", "teamSName": "AUS"}
+
+
+def match_info(mid=101, **extra):
+    return {"matchId": mid, "seriesId": 7, "seriesName": "Border-Gavaskar Trophy", "matchDesc": "1st Test",
+            "matchFormat": "TEST", "startDate": "1700000000000", "state": "Complete",
+            "status": "India won by 295 runs", "team1": IND, "team2": AUS,
+            "venueInfo": {"id": 9, "ground": "Perth Stadium", "city": "Perth", "country": "Australia"}, **extra}
+
+
+def test_parse_match_list():
+    payload = {"typeMatches": [{"matchType": "International", "seriesMatches": [
+        {"seriesAdWrapper": {"seriesId": 7, "seriesName": "Border-Gavaskar Trophy", "matches": [
+            {"matchInfo": match_info(),
+             "matchScore": {"team1Score": {"inngs1": {"runs": 150, "wickets": 10, "overs": "49.4"}}}},
+            {"matchInfo": {"matchDesc": "no id"}},
+        ]}},
+        {"adDetail": {"name": "ad"}},
+    ]}]}
+    [series] = parse_match_list(payload)
+    assert (series.id, series.name, series.match_type) == (7, "Border-Gavaskar Trophy", "International")
+    [m] = series.matches
+    assert m.match_id == 101 and m.format == "TEST" and m.start_ms == 1700000000000
+    assert (m.team1.id, m.team1.name, m.team2.short_name) == (2, "India", "AUS")
+    assert m.venue.ground == "Perth Stadium"
+    assert (m.team1_score.runs, m.team1_score.wickets, m.team1_score.overs) == (150, 10, 49.4)
+    assert m.team2_score is None
+
+
+def test_parse_match_list_fills_series_from_wrapper():
+    payload = {"typeMatches": [{"matchType": "League", "seriesMatches": [
+        {"seriesAdWrapper": {"seriesId": 8, "seriesName": "IPL 2025",
+                             "matches": [{"matchInfo": {"matchId": 5, "team1": IND, "team2": AUS}}]}},
+    ]}]}
+    [m] = parse_match_list(payload)[0].matches
+    assert (m.series_id, m.series_name) == (8, "IPL 2025")
+
+
+def test_parse_series_detail_shapes():
+    payload = {"matchDetailsMap": [{"match": [{"matchInfo": match_info(1)}]}],
+               "matches": [match_info(2)]}
+    series = parse_series_detail(payload, series_id="7")
+    assert series.id == 7
+    assert sorted(m.match_id for m in series.matches) == [1, 2]
+
+
+def test_parse_scorecard():
+    payload = {"scorecard": [{
+        "inningsId": 1, "batTeamName": "India", "score": "487/6",
+        "batsman": [
+            {"id": 1413, "name": "Virat Kohli", "runs": "100", "balls": 143, "fours": 8, "sixes": 2,
+             "strkRate": "69.93", "outDec": "not out"},
+            {"id": 8733, "name": "KL Rahul †", "runs": 77, "balls": 176, "outDec": "c Carey b Starc"},
+        ],
+        "bowler": [{"id": 7710, "name": "Mitchell Starc", "overs": "26", "maidens": 7, "runs": 111,
+                    "wickets": 2, "economy": "4.27"}],
+    }]}
+    match = models.parse_match_info(match_info())
+    [inns] = parse_scorecard(payload, match)
+    assert (inns.innings_id, inns.number, inns.runs, inns.wickets) == (1, 1, 487, 6)
+    assert (inns.bat_team, inns.bat_team_id) == ("India", 2)
+    assert (inns.bowl_team, inns.bowl_team_id) == ("Australia", 4)       # the other side of the match
+
+    kohli, rahul = inns.batting
+    assert (kohli.player_id, kohli.runs, kohli.strike_rate, kohli.position) == (1413, 100, 69.93, 1)
+    assert (rahul.name, rahul.dismissal, rahul.position) == ("KL Rahul", "c Carey b Starc", 2)
+    [starc] = inns.bowling
+    assert (starc.overs, starc.wickets, starc.economy) == (26.0, 2, 4.27)
+
+
+def test_parse_scorecard_team_details_shape():
+    payload = {"scoreCard": [{
+        "inningsId": 2,
+        "batTeamDetails": {"batTeamId": 4, "batTeamName": "Australia",
+                           "batsmenData": {"bat_1": {"batId": 6250, "batName": "Steve Smith", "batRuns": 17}}},
+        "bowlTeamDetails": {"bowlTeamId": 2, "bowlTeamName": "India",
+                            "bowlersData": {"bowl_1": {"bowlId": 9311, "bowlName": "Jasprit Bumrah",
+                                                       "bowlOvs": 18, "bowlWkts": 5}}},
+        "scoreDetails": {"runs": 104, "wickets": 10, "overs": 51.2},
+    }]}
+    [inns] = parse_scorecard(payload)
+    assert (inns.innings_id, inns.bat_team, inns.bowl_team_id) == (2, "Australia", 2)
+    assert (inns.runs, inns.wickets, inns.overs) == (104, 10, 51.2)
+    assert (inns.batting[0].player_id, inns.batting[0].runs) == (6250, 17)
+    assert (inns.bowling[0].name, inns.bowling[0].wickets) == ("Jasprit Bumrah", 5)
+
+
+# ---------------- Commentary ----------------
+@pytest.mark.parametrize("result, event, expected", [
+    ("no run, defended", "NONE", (0, 0, "", False)),
+    ("1 run, pushed to cover", "NONE", (1, 0, "", False)),
+    ("FOUR, driven", "FOUR", (4, 0, "", False)),
+    ("SIX, over long-on", "SIX", (6, 0, "", False)),
+    ("wide, down leg", "NONE", (0, 1, "wd", False)),
+    ("3 wides, past the keeper", "NONE", (0, 3, "wd", False)),
+    ("no ball, 2 runs", "NONE", (2, 1, "nb", False)),
+    ("no ball, FOUR", "NONE", (4, 1, "nb", False)),
+    ("leg byes, 2 runs", "NONE", (0, 2, "lb", False)),
+    ("byes, FOUR", "NONE", (0, 4, "b", False)),
+    ("out Caught by Rohit!!", "WICKET", (0, 0, "", True)),
+    ("wide, stumped!", "WICKET", (0, 1, "wd", True)),
+])
+def test_ball_result(result, event, expected):
+    assert models._ball_result(result, event) == expected
+
+
+def ball(nbr, text, innings=2, **extra):
+    return {"ballNbr": nbr, "overNumber": round((nbr - 1) // 6 + ((nbr - 1) % 6 + 1) / 10, 1),
+            "inningsId": innings, "timestamp": 1700000000000 + nbr, "commText": text, "event": "NONE", **extra}
+
+
+def test_parse_commentary():
+    payload = {
+        "commentaryList": [
+            ball(8, "B0$ to Sodhi, out Caught by Rohit!! B1$", event="WICKET",
+                 commentaryFormats={"bold": {"formatId": ["B0$", "B1$"],
+                                             "formatValue": ["Hardik Pandya", "Sodhi c Rohit"]}},
+                 batsmanStriker={"batId": 10692, "batName": "Ish Sodhi", "batRuns": 9, "batBalls": 7},
+                 bowlerStriker={"bowlId": 9647, "bowlName": "Hardik Pandya", "bowlOvs": 1.2, "bowlWkts": 1}),
+            {"commText": "End of over 1", "inningsId": 2},
+            ball(7, "Bumrah to Santner, wide, down leg"),
+            ball(6, "Bumrah to Santner, FOUR, through point", innings=1),
+        ],
+        "miniscore": {
+            "inningsId": 2,
+            "batsmanStriker": {"batId": 10100, "batName": "Mitchell Santner", "batRuns": 3, "batBalls": 4},
+            "batsmanNonStriker": {"batName": ""},
+            "bowlerStriker": {"bowlId": 9647, "bowlName": "Hardik Pandya", "bowlOvs": 1.2},
+            "lastWicket": "Ish Sodhi c Rohit b Hardik Pandya 9(7) - 12/1 in 1.2 ov.",
+            "matchScoreDetails": {"state": "In Progress", "inningsScoreList": [
+                {"inningsId": 2, "batTeamId": 4, "batTeamName": "AUS", "score": 12, "wickets": 1, "overs": 1.2},
+                {"inningsId": 1, "batTeamName": "IND", "score": 180, "wickets": 6, "overs": 20},
+            ]},
+        },
+    }
+    deliveries, live = parse_commentary(payload, models.parse_match_info(match_info()))
+
+    assert [(d.innings_id, d.ball_nbr) for d in deliveries] == [(1, 6), (2, 7), (2, 8)]
+    four, wide, out = deliveries
+    assert (four.bowler, four.batter, four.runs, four.over) == ("Bumrah", "Santner", 4, 0.6)
+    assert (wide.runs, wide.extras, wide.extra_type) == (0, 1, "wd")
+    assert (out.bowler, out.batter, out.wicket) == ("Hardik Pandya", "Sodhi", True)      # B0$ substituted
+    assert (out.batting.player_id, out.batting.runs, out.bowling.wickets) == (10692, 9, 1)
+
+    assert live.innings_id == 2 and not live.complete
+    first, second = live.innings
+    assert (first.innings_id, first.bat_team, first.bowl_team, first.runs) == (1, "India", "Australia", 180)
+    assert (second.bat_team_id, second.bowl_team_id, second.overs) == (4, 2, 1.2)
+    assert [b.player_id for b in live.batting] == [10100]
+    assert [b.player_id for b in live.bowling] == [9647]
+    w = live.last_wicket
+    assert (w.name, w.dismissal, w.runs, w.balls) == ("Ish Sodhi", "c Rohit b Hardik Pandya", 9, 7)
+
+
+def test_parse_commentary_empty():
+    deliveries, live = parse_commentary({})
+    assert deliveries == [] and live.innings == [] and live.last_wicket is None
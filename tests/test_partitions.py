@@ -0,0 +1,134 @@
+from datetime import date
+
+import pytest
+
+from ingest import partitions
+from models import Match
+
+
+class Cursor:
+    """Records statements; to_regclass / SELECT answers come from `rows`."""
+
+    def __init__(self, rows=()):
+        self.rows, self.sql = list(rows), []
+
+    def execute(self, sql, args=None):
+        self.sql.append((" ".join(sql.split()), args))
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+
+def test_partition_name():
+    assert partitions.partition_name("matches", 2025) == "matches_y2025"
+    assert partitions.partition_name("ball_by_ball", 2024) == "ball_by_ball_y2024"
+    child = partitions.partition_name("batting_scorecard", 2023)
+    assert int(child.rsplit("_y", 1)[1]) == 2023          # how archive reads the year back
+
+
+def test_create_year_bounds():
+    cur = Cursor()
+    partitions.create_year(cur, "matches", 2025)
+    [(sql, _)] = cur.sql
+    assert sql.startswith("CREATE TABLE IF NOT EXISTS matches_y2025 PARTITION OF matches")
+    assert "FROM ('2025-01-01') TO ('2026-01-01')" in sql
+
+
+def test_ensure_for_creates_missing_year(monkeypatch):
+    monkeypatch.setattr(partitions, "_known", set())
+    cur = Cursor(rows=[(None,)])
+    partitions.ensure_for(cur, "bowling_scorecard", date(2022, 12, 31))
+    assert cur.sql[0] == ("SELECT to_regclass(%s)", ("bowling_scorecard_y2022",))
+    assert "bowling_scorecard_y2022 PARTITION OF bowling_scorecard" in cur.sql[1][0]
+
+
+def test_ensure_for_skips_known_year(monkeypatch):
+    monkeypatch.setattr(partitions, "_known", {("matches", 2025)})
+    cur = Cursor()
+    partitions.ensure_for(cur, "matches", date(2025, 6, 1))
+    assert cur.sql == []
+
+
+def test_match_date_prefers_parsed_match():
+    match = Match(match_id=1, start_ms=1735862400000)
+    cur = Cursor()
+    assert partitions.match_date(cur, 1, match) == match.start_date
+    assert cur.sql == []
+    assert partitions.match_date(Cursor(rows=[(date(2024, 3, 1),)]), 1) == date(2024, 3, 1)
+    assert partitions.match_date(Cursor(rows=[None]), 1) == date.today()
+
+
+# ---------------- migrate (needs Postgres) ----------------
+LEGACY = "partnerships_t"
+
+
+def ddl(cur, name):
+    from ingest import partnerships
+    partnerships.create_partnerships(cur, name)
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    import psycopg2
+    import db
+    try:
+        conn = db.connect()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no database: {e}")
+    monkeypatch.setitem(partitions.PARTITIONED, LEGACY, partitions.PARTITIONED["partnerships"])
+    monkeypatch.setitem(partitions.NATURAL_KEYS, LEGACY, partitions.NATURAL_KEYS["partnerships"])
+
+    def drop():
+        conn.rollback()
+        with conn.cursor() as cur:
+            for t in (LEGACY, f"{LEGACY}_part", f"{LEGACY}_legacy"):
+                cur.execute(f"DROP TABLE IF EXISTS {t} CASCADE")
+            cur.execute(f"DROP FUNCTION IF EXISTS {LEGACY}_mirror() CASCADE")
+        conn.commit()
+
+    drop()
+    with conn.cursor() as cur:
+        # the pre-partitioning layout: plain inserts, nothing unique but the id
+        cur.execute(f"""CREATE TABLE {LEGACY} (
+            id BIGSERIAL PRIMARY KEY, match_id BIGINT, match_format TEXT, team1_name TEXT, team2_name TEXT,
+            innings_number INT, batsman1 TEXT, batsman2 TEXT, runs INT, balls INT, wicket_number INT)""")
+    conn.commit()
+    yield conn
+    drop()
+    conn.close()
+
+
+def legacy_rows(cur, rows):
+    cur.executemany(f"""INSERT INTO {LEGACY} (match_id, innings_number, wicket_number, batsman1, runs)
+                        VALUES (%s, %s, %s, %s, %s)""", rows)
+
+
+def test_migrate_folds_legacy_duplicates(conn):
+    with conn.cursor() as cur:
+        # the same wicket from the recent and the completed listing, the later load wins
+        legacy_rows(cur, [(-1, 1, 1, "Rohit", 10), (-1, 1, 2, "Gill", 30),
+                          (-1, 1, 1, "Rohit", 12), (-2, 1, 1, "Head", 50)])
+    conn.commit()
+
+    partitions.migrate(conn, LEGACY, ddl, batch_rows=2)
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT id, match_id, wicket_number, runs FROM {LEGACY} ORDER BY id")
+        assert cur.fetchall() == [(2, -1, 2, 30), (3, -1, 1, 12), (4, -2, 1, 50)]
+        assert partitions.is_partitioned(cur, LEGACY)
+
+
+def test_mirror_keeps_latest_duplicate(conn):
+    cols = ["id", "match_id", "match_format", "team1_name", "team2_name", "innings_number",
+            "batsman1", "batsman2", "runs", "balls", "wicket_number"]
+    with conn.cursor() as cur:
+        ddl(cur, f"{LEGACY}_part")
+        partitions.create_year(cur, LEGACY, date.today().year, parent=f"{LEGACY}_part")
+        partitions._install_mirror(cur, LEGACY, f"{LEGACY}_part", cols)
+        legacy_rows(cur, [(-1, 1, 1, "Rohit", 10), (-1, 1, 1, "Rohit", 12)])     # live duplicate
+        cur.execute(f"SELECT id, runs FROM {LEGACY}_part")
+        assert cur.fetchall() == [(2, 12)]
+
+        cur.execute(f"DELETE FROM {LEGACY} WHERE id = 2")                         # the kept row goes
+        cur.execute(f"SELECT id, runs FROM {LEGACY}_part")
+        assert cur.fetchall() == [(1, 10)]
+    conn.rollback()
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+from streamlit.runtime.scriptrunner_utils.exceptions import StopException
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData, ScriptRequests
+
+import metrics
+import query_executor
+
+
+def session():
+    return SimpleNamespace(script_requests=ScriptRequests())
+
+
+def test_interrupted_sees_pending_rerun_and_stop():
+    # fails when Streamlit stops exposing the pending request the watchdog polls
+    ctx = session()
+    assert not query_executor._interrupted(ctx)
+    ctx.script_requests.request_rerun(RerunData())
+    assert query_executor._interrupted(ctx)
+
+    ctx = session()
+    ctx.script_requests.request_stop()
+    assert query_executor._interrupted(ctx)
+    assert not query_executor._interrupted(None)
+
+
+def test_interrupted_warns_once_when_internals_change(monkeypatch, capsys):
+    monkeypatch.setattr(query_executor, "_unsupported_warned", False)
+    ctx = SimpleNamespace(script_requests=object())
+    assert not query_executor._interrupted(ctx)
+    assert not query_executor._interrupted(ctx)
+    assert capsys.readouterr().out.count("hides pending reruns") == 1
+
+
+def test_script_control_exceptions_cover_stop_and_rerun():
+    from streamlit.runtime.scriptrunner_utils.exceptions import RerunException
+    assert issubclass(StopException, metrics.script_control_exceptions())
+    assert issubclass(RerunException, metrics.script_control_exceptions())
+
+
+def test_stop_inside_a_query_is_recorded_as_cancelled():
+    import psycopg2
+    try:
+        query_executor.db.connect().close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"no database: {e}")
+    key = metrics._key("cricbuzz_db_query_cancelled_total", {"query": "test_stop", "reason": "rerun"})
+    before = metrics._counters.get(key, 0)
+    with pytest.raises(StopException):
+        with query_executor.connection("test_stop", query_executor.CRUD) as conn, conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            raise StopException()
+    assert metrics._counters.get(key, 0) == before + 1
+    assert query_executor.admission.snapshot() == ({query_executor.CRUD: 0, query_executor.ANALYTICS: 0}, 0)
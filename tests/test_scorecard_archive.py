@@ -0,0 +1,37 @@
+import struct
+
+from scorecard_archive import HEADER, ScorecardArchive
+
+
+def test_replay_yields_latest_copy_in_disk_order(tmp_path):
+    a = ScorecardArchive(str(tmp_path), segment_bytes=60)
+    a.put(1, {"v": 1})
+    a.put(2, {"v": 2}, match_info={"matchId": 2})
+    a.put(1, {"v": 3})
+    assert len(a._segments()) > 1
+    assert [(mid, p["v"], info) for mid, p, info in a.replay()] == [(2, 2, {"matchId": 2}), (1, 3, None)]
+
+
+def test_replay_skips_a_torn_record_and_keeps_the_rest(tmp_path, capsys):
+    a = ScorecardArchive(str(tmp_path))
+    for mid in (1, 2, 3):
+        a.put(mid, {"v": mid})
+    seg, off, _ = a._offsets[2]
+    # a garbage length in the middle header used to throw every later record out of step
+    with open(a._segment_path(seg), "r+b") as f:
+        f.seek(off + 8)
+        f.write(struct.pack("<I", 1 << 20))
+
+    assert [mid for mid, _, _ in ScorecardArchive(str(tmp_path)).replay()] == [1, 3]
+    assert "skipped 1 damaged record" in capsys.readouterr().out
+    assert a.get(2) is None and a.get(3) == {"v": 3}
+
+
+def test_replay_survives_a_truncated_segment(tmp_path):
+    a = ScorecardArchive(str(tmp_path))
+    a.put(1, {"v": 1})
+    a.put(2, {"v": 2})
+    seg, off, _ = a._offsets[2]
+    with open(a._segment_path(seg), "r+b") as f:
+        f.truncate(off + HEADER.size // 2)
+    assert [mid for mid, _, _ in a.replay()] == [1]